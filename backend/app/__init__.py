@@ -1,15 +1,36 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from fastapi.responses import PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routes import restaurants
+from app.config import settings
+from app.dependencies import drain_services, warm_up_services
+from app.routes import photos, restaurants
+from app.services.http_client import close_http_clients
+from app.utils.async_utils import run_blocking
+from app.utils.metrics import REGISTRY
+from app.utils.tracing import TracingMiddleware, tracer
+import asyncio
 import os
 from dotenv import load_dotenv
 
 load_dotenv()
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Services are built lazily; warming them in the background lets the worker
+    # accept requests (and answer /health) before the AI stack is loaded
+    if settings.WARM_UP_ON_STARTUP:
+        asyncio.create_task(run_blocking(warm_up_services))
+    yield
+    await drain_services(settings.SERVER_GRACEFUL_TIMEOUT)
+    await close_http_clients()
+    tracer.shutdown()
+
 app = FastAPI(
     title="Restaurant Finder API",
     description="Backend API for restaurant discovery application",
-    version="0.1.0"
+    version="0.1.0",
+    lifespan=lifespan
 )
 
 # CORS configuration
@@ -25,10 +46,15 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Trace-Id"],
 )
 
+# Root span per request (no-op unless TRACING_EXPORTER is set)
+app.add_middleware(TracingMiddleware)
+
 # Include routers
 app.include_router(restaurants.router, prefix="/api/restaurants", tags=["restaurants"])
+app.include_router(photos.router, prefix="/api/photos", tags=["photos"])
 
 @app.get("/")
 async def root():
@@ -38,6 +64,11 @@ async def root():
 async def health_check():
     return {"status": "ok"}
 
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """Per-stage latency histograms and counters in Prometheus text format"""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
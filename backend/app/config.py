@@ -15,17 +15,109 @@ class Settings:
     GOOGLE_MAPS_API_KEY = os.getenv("GOOGLE_MAPS_API_KEY", "")
     GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
     GEMINI_MODEL = "gemini-2.5-flash"
+    # Upstream base URLs - point these at mock_upstream for load tests. With GEMINI_API_BASE_URL
+    # set, the agents call the Gemini REST API there instead of going through the SDK.
+    GEMINI_API_BASE_URL = os.getenv("GEMINI_API_BASE_URL", "")  # e.g. https://generativelanguage.googleapis.com
+    GEMINI_REQUEST_TIMEOUT = float(os.getenv("GEMINI_REQUEST_TIMEOUT", "120"))  # seconds, REST client only
+    GOOGLE_MAPS_BASE_URL = os.getenv("GOOGLE_MAPS_BASE_URL", "https://maps.googleapis.com")
+    PIPELINE_MODE = os.getenv("PIPELINE_MODE", "three_stage")  # three_stage | single_pass
+    LOCAL_PREFILTER_ENABLED = os.getenv("LOCAL_PREFILTER_ENABLED", "true").lower() == "true"
+    PROMPT_ENCODING = os.getenv("PROMPT_ENCODING", "json")  # json (minified) | table - restaurants in agent prompts
     
     # Server Configuration
     BACKEND_URL = os.getenv("BACKEND_URL", "http://localhost:8000")
     FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
     
+    # Production server (serve.py / gunicorn.conf.py)
+    SERVER_HOST = os.getenv("SERVER_HOST", "0.0.0.0")
+    SERVER_PORT = int(os.getenv("SERVER_PORT", "8000"))
+    WEB_CONCURRENCY = int(os.getenv("WEB_CONCURRENCY", str(os.cpu_count() or 1)))  # worker processes
+    SERVER_BACKLOG = int(os.getenv("SERVER_BACKLOG", "2048"))  # pending connections per listening socket
+    SERVER_KEEPALIVE = int(os.getenv("SERVER_KEEPALIVE", "5"))  # seconds an idle keep-alive connection stays open
+    SERVER_GRACEFUL_TIMEOUT = int(os.getenv("SERVER_GRACEFUL_TIMEOUT", "30"))  # seconds to drain in-flight searches
+    SERVER_MAX_REQUESTS = int(os.getenv("SERVER_MAX_REQUESTS", "0"))  # recycle workers after N requests (0 = never)
+    
     # Default values
     DEFAULT_SEARCH_RADIUS = 5000  # meters
     DEFAULT_MIN_RATING = 3.5
     MAX_RESULTS_PER_PAGE = 50
     
-    # Database (placeholder)
+    # Startup
+    WARM_UP_ON_STARTUP = os.getenv("WARM_UP_ON_STARTUP", "true").lower() == "true"  # build services in background
+    
+    # Concurrency
+    BLOCKING_IO_WORKERS = int(os.getenv("BLOCKING_IO_WORKERS", "16"))  # threads for blocking SDK calls
+    
+    # Shared HTTP clients
+    HTTP_TIMEOUT = float(os.getenv("HTTP_TIMEOUT", "10"))  # seconds per request
+    HTTP_CONNECT_TIMEOUT = float(os.getenv("HTTP_CONNECT_TIMEOUT", "3"))
+    HTTP_MAX_CONNECTIONS = int(os.getenv("HTTP_MAX_CONNECTIONS", "100"))
+    HTTP_MAX_CONNECTIONS_PER_HOST = int(os.getenv("HTTP_MAX_CONNECTIONS_PER_HOST", "10"))
+    HTTP_MAX_KEEPALIVE = int(os.getenv("HTTP_MAX_KEEPALIVE", "20"))
+    HTTP_KEEPALIVE_EXPIRY = float(os.getenv("HTTP_KEEPALIVE_EXPIRY", "30"))  # seconds idle
+    HTTP_USER_AGENT = os.getenv(
+        "HTTP_USER_AGENT",
+        "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36"
+    )
+    
+    # Image enrichment
+    IMAGE_ENRICHMENT_CONCURRENCY = int(os.getenv("IMAGE_ENRICHMENT_CONCURRENCY", "8"))
+    IMAGE_ENRICHMENT_DEADLINE = float(os.getenv("IMAGE_ENRICHMENT_DEADLINE", "8"))  # seconds for the whole stage
+    IMAGE_WEBSITE_TIMEOUT = float(os.getenv("IMAGE_WEBSITE_TIMEOUT", "5"))  # seconds per website scrape
+    IMAGE_PLACES_TIMEOUT = float(os.getenv("IMAGE_PLACES_TIMEOUT", "4"))  # seconds per Google Maps lookup
+    IMAGE_SCAN_STREAMING = os.getenv("IMAGE_SCAN_STREAMING", "true").lower() == "true"  # false = parse whole page
+    IMAGE_SCAN_MAX_BYTES = int(os.getenv("IMAGE_SCAN_MAX_BYTES", str(512 * 1024)))  # stop reading pages after this
+    IMAGE_SCAN_CHUNK_SIZE = int(os.getenv("IMAGE_SCAN_CHUNK_SIZE", str(16 * 1024)))
+    
+    # Places photo proxy (/api/photos)
+    PHOTO_CACHE_DIR = os.getenv("PHOTO_CACHE_DIR", "./photo_cache")
+    PHOTO_CACHE_BACKEND = os.getenv("PHOTO_CACHE_BACKEND", "sqlite")  # reference -> digest index
+    PHOTO_CACHE_TTL = float(os.getenv("PHOTO_CACHE_TTL", str(30 * 24 * 3600)))
+    PHOTO_CACHE_MAX_ENTRIES = int(os.getenv("PHOTO_CACHE_MAX_ENTRIES", "50000"))
+    PHOTO_FETCH_MAX_WIDTH = int(os.getenv("PHOTO_FETCH_MAX_WIDTH", "800"))
+    PHOTO_THUMBNAIL_WIDTH = int(os.getenv("PHOTO_THUMBNAIL_WIDTH", "400"))  # resized with Pillow
+    
+    # Caching
+    CACHE_BACKEND = os.getenv("CACHE_BACKEND", "memory")  # memory | sqlite
+    CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "./cache.db")
+    SEARCH_CACHE_TTL = float(os.getenv("SEARCH_CACHE_TTL", "3600"))  # seconds
+    SEARCH_CACHE_MAX_ENTRIES = int(os.getenv("SEARCH_CACHE_MAX_ENTRIES", "256"))
+    PLACE_CACHE_BACKEND = os.getenv("PLACE_CACHE_BACKEND", "sqlite")  # persistent by default
+    PLACE_CACHE_TTL = float(os.getenv("PLACE_CACHE_TTL", str(7 * 24 * 3600)))
+    PLACE_CACHE_NEGATIVE_TTL = float(os.getenv("PLACE_CACHE_NEGATIVE_TTL", str(6 * 3600)))
+    PLACE_CACHE_MAX_ENTRIES = int(os.getenv("PLACE_CACHE_MAX_ENTRIES", "5000"))
+    WEBSITE_IMAGE_CACHE_BACKEND = os.getenv("WEBSITE_IMAGE_CACHE_BACKEND", "sqlite")
+    WEBSITE_IMAGE_CACHE_TTL = float(os.getenv("WEBSITE_IMAGE_CACHE_TTL", str(30 * 24 * 3600)))  # kept for revalidation
+    WEBSITE_IMAGE_FRESH_FOR = float(os.getenv("WEBSITE_IMAGE_FRESH_FOR", str(24 * 3600)))  # served without a request
+    WEBSITE_IMAGE_NEGATIVE_TTL = float(os.getenv("WEBSITE_IMAGE_NEGATIVE_TTL", str(6 * 3600)))
+    WEBSITE_IMAGE_CACHE_MAX_ENTRIES = int(os.getenv("WEBSITE_IMAGE_CACHE_MAX_ENTRIES", "20000"))
+    GEOCODE_CACHE_BACKEND = os.getenv("GEOCODE_CACHE_BACKEND", "sqlite")
+    GEOCODE_CACHE_TTL = float(os.getenv("GEOCODE_CACHE_TTL", str(30 * 24 * 3600)))
+    GEOCODE_CACHE_NEGATIVE_TTL = float(os.getenv("GEOCODE_CACHE_NEGATIVE_TTL", str(3600)))
+    GEOCODE_CACHE_MAX_ENTRIES = int(os.getenv("GEOCODE_CACHE_MAX_ENTRIES", "20000"))
+    DIETARY_VERDICT_CACHE_BACKEND = os.getenv("DIETARY_VERDICT_CACHE_BACKEND", "sqlite")  # per restaurant + requirement
+    DIETARY_VERDICT_CACHE_TTL = float(os.getenv("DIETARY_VERDICT_CACHE_TTL", str(7 * 24 * 3600)))
+    DIETARY_VERDICT_CACHE_MAX_ENTRIES = int(os.getenv("DIETARY_VERDICT_CACHE_MAX_ENTRIES", "20000"))
+    
+    # Dietary validation batching (checks from concurrent searches share one Gemini call)
+    DIETARY_BATCHING_ENABLED = os.getenv("DIETARY_BATCHING_ENABLED", "true").lower() == "true"
+    DIETARY_BATCH_WINDOW = float(os.getenv("DIETARY_BATCH_WINDOW", "0.05"))  # seconds to collect checks before a call
+    DIETARY_BATCH_MAX_CHECKS = int(os.getenv("DIETARY_BATCH_MAX_CHECKS", "60"))  # send early once this many are queued
+    
+    # Database
     DATABASE_URL = os.getenv("DATABASE_URL", "sqlite:///./test.db")
+    RESTAURANT_STORE_BACKEND = os.getenv("RESTAURANT_STORE_BACKEND", "memory")  # memory | sqlite
+    RESTAURANT_STORE_MAX_ENTRIES = int(os.getenv("RESTAURANT_STORE_MAX_ENTRIES", "10000"))
+    
+    # Spatial index over stored restaurants
+    SPATIAL_INDEX_CELL_DEG = float(os.getenv("SPATIAL_INDEX_CELL_DEG", "0.01"))  # ~1.1km cells
+    SPATIAL_SHORTCUT_ENABLED = os.getenv("SPATIAL_SHORTCUT_ENABLED", "true").lower() == "true"
+    SPATIAL_SHORTCUT_MIN_RESULTS = int(os.getenv("SPATIAL_SHORTCUT_MIN_RESULTS", "3"))
+    
+    # Request tracing
+    TRACING_EXPORTER = os.getenv("TRACING_EXPORTER", "none")  # none | json | otlp
+    TRACE_DIR = os.getenv("TRACE_DIR", "./traces")  # one <trace_id>.json per request with the json exporter
+    OTLP_ENDPOINT = os.getenv("OTLP_ENDPOINT", "http://localhost:4318/v1/traces")
+    TRACE_SAMPLE_RATE = float(os.getenv("TRACE_SAMPLE_RATE", "1.0"))  # fraction of requests traced
 
 settings = Settings()
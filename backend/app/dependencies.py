@@ -0,0 +1,70 @@
+# Lazily constructed, shared service instances injected into routes with Depends
+import functools
+import threading
+import time
+from typing import Callable, TypeVar
+from app.config import settings
+from app.services.gemini_agent_service import GeminiAgentService, get_genai
+from app.services.photo_service import PhotoService
+from app.services.restaurant_store import RestaurantStore
+
+T = TypeVar("T")
+
+_lock = threading.RLock()
+
+
+def lazy_singleton(factory: Callable[[], T]) -> Callable[[], T]:
+    """Build the instance on first call (once, even across threads) and reuse it afterwards"""
+    instance = None
+
+    @functools.wraps(factory)
+    def get() -> T:
+        nonlocal instance
+        if instance is None:
+            with _lock:
+                if instance is None:
+                    instance = factory()
+        return instance
+
+    def reset() -> None:
+        nonlocal instance
+        instance = None
+
+    get.reset = reset
+    get.peek = lambda: instance  # the instance if already built, without building it
+    return get
+
+
+@lazy_singleton
+def get_gemini_service() -> GeminiAgentService:
+    return GeminiAgentService()
+
+
+@lazy_singleton
+def get_restaurant_store() -> RestaurantStore:
+    return RestaurantStore()
+
+
+@lazy_singleton
+def get_photo_service() -> PhotoService:
+    return PhotoService()
+
+
+def warm_up_services() -> None:
+    """Build the services and load the Gemini SDK ahead of the first search (runs in a worker thread)"""
+    started = time.perf_counter()
+    try:
+        get_restaurant_store()
+        get_gemini_service()
+        if settings.GEMINI_API_KEY:
+            get_genai()
+        print(f"✓ Services warmed up in {time.perf_counter() - started:.2f}s")
+    except Exception as e:
+        print(f"⚠️ Service warm-up failed, services will be built on first use: {e}")
+
+
+async def drain_services(timeout: float) -> None:
+    """Let in-flight searches finish before the worker exits"""
+    gemini_service = get_gemini_service.peek()
+    if gemini_service is not None:
+        await gemini_service.drain(timeout)
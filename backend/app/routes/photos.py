@@ -0,0 +1,43 @@
+from fastapi import APIRouter, Depends, HTTPException, Request
+from fastapi.responses import FileResponse, Response
+from app.dependencies import get_photo_service
+from app.services.photo_service import PhotoService
+import re
+
+router = APIRouter()
+
+PHOTO_REFERENCE_PATTERN = re.compile(r'^[A-Za-z0-9_-]{16,1024}$')
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+
+@router.get("/{photo_reference}")
+async def get_photo(
+    photo_reference: str,
+    request: Request,
+    photo_service: PhotoService = Depends(get_photo_service)
+):
+    """
+    Serve a Google Places photo by reference without exposing the API key
+    
+    The photo is fetched from Google once and kept as a thumbnail on disk; the
+    file's content digest is its ETag, so it can be cached by clients forever.
+    """
+    if not PHOTO_REFERENCE_PATTERN.match(photo_reference):
+        raise HTTPException(status_code=400, detail="Invalid photo reference")
+    
+    try:
+        photo = await photo_service.get_photo(photo_reference)
+    except Exception as e:
+        print(f"❌ Error in get_photo: {str(e)}")
+        raise HTTPException(status_code=502, detail="Photo could not be fetched")
+    
+    if photo is None:
+        raise HTTPException(status_code=404, detail="Photo not found")
+    
+    path, digest, content_type = photo
+    etag = f'"{digest}"'
+    headers = {"Cache-Control": IMMUTABLE_CACHE_CONTROL, "ETag": etag}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    
+    # FileResponse streams from disk (zero-copy sendfile where the server supports it)
+    return FileResponse(path, media_type=content_type, headers=headers)
@@ -1,17 +1,73 @@
-from fastapi import APIRouter, HTTPException, Query
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from typing import Dict, List, Optional
 from app.models.schemas import SearchRequest, SearchResponse, RestaurantResponse
 from app.services.gemini_agent_service import GeminiAgentService
-from app.utils.helpers import validate_filters
+from app.services.restaurant_store import RestaurantStore
+from app.config import settings
+from app.dependencies import get_gemini_service, get_restaurant_store
+from app.utils.async_utils import run_blocking
+from app.utils.metrics import SEARCHES
+from app.utils.helpers import validate_filters, is_real_image_url, make_restaurant_id, canonical_search_key
+import json
 import os
 
 router = APIRouter()
 
-# Initialize services
-gemini_service = GeminiAgentService()
+def to_restaurant_response(restaurant: Dict) -> RestaurantResponse:
+    """Convert an agent pipeline restaurant dict into a RestaurantResponse"""
+    restaurant_name = restaurant.get('name', 'Unknown')
+    
+    # Images are filled in by the pipeline's concurrent enrichment stage;
+    # only pass through REAL restaurant images - no generic fallbacks
+    restaurant_image = restaurant.get('image')
+    if not is_real_image_url(restaurant_image):
+        restaurant_image = None
+    
+    cuisines = restaurant.get('cuisines') or restaurant.get('cuisine') or []
+    if isinstance(cuisines, str):
+        cuisines = [c.strip() for c in cuisines.split(',') if c.strip()]
+    
+    return RestaurantResponse(
+        id=restaurant.get('id') or make_restaurant_id(restaurant_name, restaurant.get('address', '')),
+        name=restaurant_name,
+        address=restaurant.get('address') or '',
+        latitude=float(restaurant.get('latitude') or 0),
+        longitude=float(restaurant.get('longitude') or 0),
+        rating=float(restaurant.get('rating') or 0),
+        budget=restaurant.get('budget') or '',
+        cuisines=cuisines,
+        image=restaurant_image,
+        website=restaurant.get('website') or restaurant.get('website_url'),
+        menuLink=restaurant.get('menuLink') or restaurant.get('menu_url'),
+        matchingItems=restaurant.get('matching_menu_items', restaurant.get('matchingItems', [])),
+        phone=restaurant.get('phone', ''),
+        hours=restaurant.get('hours', ''),
+        accessibility=restaurant.get('accessibility_features', restaurant.get('accessibility', [])),
+        serviceTypes=restaurant.get('service_types', restaurant.get('serviceTypes', [])),
+        tags=restaurant.get('tags', []),
+        matchScore=restaurant.get('match_score'),
+        whyItMatches=restaurant.get('why_it_matches'),
+    )
+
+def to_restaurant_responses(restaurants: List[Dict]) -> List[RestaurantResponse]:
+    """Convert pipeline restaurants, skipping any that can't be parsed"""
+    responses = []
+    for restaurant in restaurants:
+        try:
+            responses.append(to_restaurant_response(restaurant))
+        except Exception as e:
+            print(f"⚠️ Error parsing restaurant data: {str(e)}")
+            import traceback
+            traceback.print_exc()
+    return responses
 
 @router.post("/search")
-async def search_restaurants(request: SearchRequest) -> SearchResponse:
+async def search_restaurants(
+    request: SearchRequest,
+    gemini_service: GeminiAgentService = Depends(get_gemini_service),
+    restaurant_store: RestaurantStore = Depends(get_restaurant_store)
+) -> SearchResponse:
     """
     Search for restaurants based on location and filters using Gemini AI Agent
     
@@ -38,8 +94,27 @@ async def search_restaurants(request: SearchRequest) -> SearchResponse:
         print(f"🔍 Searching for restaurants in {request.location}")
         print(f"📋 Filters: {filters}")
         
+        # Answer from the spatial index when an earlier search already covered this area;
+        # cached and in-flight searches are cheaper still, so they skip the geocode
+        radius_m = request.radius or settings.DEFAULT_SEARCH_RADIUS
+        filters_key = canonical_search_key('', filters)
+        center = None
+        if settings.SPATIAL_SHORTCUT_ENABLED and not await gemini_service.has_cached_search(request.location, filters):
+            center = await run_blocking(gemini_service.web_scraper.geocoder.geocode, request.location)
+            if center:
+                local_results = restaurant_store.covered_search(filters_key, center['lat'], center['lng'], radius_m)
+                if local_results is not None:
+                    print(f"⚡ Answered from {len(local_results)} known restaurants within {radius_m}m")
+                    SEARCHES.inc(source="spatial_index")
+                    return SearchResponse(
+                        totalFound=len(local_results),
+                        restaurants=local_results,
+                        location=request.location,
+                        filters=request.filters
+                    )
+        
         # Use Gemini AI Agent to search restaurants
-        ai_response = gemini_service.search_restaurants(
+        ai_response = await gemini_service.search_restaurants_async(
             location=request.location,
             filters=filters
         )
@@ -53,86 +128,18 @@ async def search_restaurants(request: SearchRequest) -> SearchResponse:
             )
         
         # Transform AI response to RestaurantResponse objects
-        restaurants_data = []
-        for restaurant in ai_response.get('restaurants', []):
-            try:
-                # Only use REAL restaurant images - no generic fallbacks or example URLs
-                restaurant_image = restaurant.get('image')
-                restaurant_name = restaurant.get('name', 'Unknown')
-                restaurant_website = restaurant.get('website')
-                
-                # Validate that image is a real restaurant image (not generic placeholder or example URL)
-                if restaurant_image:
-                    # Reject generic placeholder services and example.com URLs
-                    if any(generic in restaurant_image.lower() for generic in ['picsum', 'unsplash', 'placeholder', 'via.placeholder', 'example.com', 'example.org', 'lorem', 'dummy']):
-                        print(f"⚠️ Rejected invalid/placeholder URL for {restaurant_name}: {restaurant_image}")
-                        restaurant_image = None
-                    elif not restaurant_image.startswith('http'):
-                        print(f"⚠️ Invalid image URL for {restaurant_name}: {restaurant_image}")
-                        restaurant_image = None
-                
-                # If no valid image, try to fetch a real one
-                if not restaurant_image:
-                    print(f"📸 Attempting to fetch real restaurant image for {restaurant_name}...")
-                    from app.services.google_maps_service import GoogleMapsService
-                    google_maps = GoogleMapsService()
-                    
-                    # Try website first
-                    if restaurant_website:
-                        try:
-                            real_image = google_maps.get_image_from_website(restaurant_website, restaurant_name)
-                            if real_image:
-                                restaurant_image = real_image
-                                print(f"✓ Found real image from website for {restaurant_name}")
-                        except Exception as e:
-                            print(f"  ✗ Website scraping failed: {e}")
-                    
-                    # Try Google Maps if website didn't work
-                    if not restaurant_image:
-                        try:
-                            location = request.location
-                            real_image = google_maps.get_restaurant_photo(restaurant_name, location)
-                            if real_image:
-                                restaurant_image = real_image
-                                print(f"✓ Found real image from Google Maps for {restaurant_name}")
-                        except Exception as e:
-                            print(f"  ✗ Google Maps failed: {e}")
-                
-                if not restaurant_image:
-                    print(f"❌ No real restaurant image available for {restaurant_name} - will show placeholder in UI")
-                    restaurant_image = None
-                
-                restaurant_obj = RestaurantResponse(
-                    id=restaurant.get('id', restaurant.get('name', '').replace(' ', '_').lower()),
-                    name=restaurant_name,
-                    address=restaurant.get('address', ''),
-                    latitude=float(restaurant.get('latitude', 0)),
-                    longitude=float(restaurant.get('longitude', 0)),
-                    rating=float(restaurant.get('rating', 0)),
-                    budget=restaurant.get('budget', ''),
-                    cuisines=restaurant.get('cuisines', []),
-                    image=restaurant_image,
-                    website=restaurant.get('website') or restaurant.get('website_url'),
-                    menuLink=restaurant.get('menuLink') or restaurant.get('menu_url'),
-                    matchingItems=restaurant.get('matching_menu_items', restaurant.get('matchingItems', [])),
-                    phone=restaurant.get('phone', ''),
-                    hours=restaurant.get('hours', ''),
-                    accessibility=restaurant.get('accessibility_features', restaurant.get('accessibility', [])),
-                    serviceTypes=restaurant.get('service_types', restaurant.get('serviceTypes', [])),
-                    tags=restaurant.get('tags', []),
-                    matchScore=restaurant.get('match_score'),
-                    whyItMatches=restaurant.get('why_it_matches'),
-                )
-                print(f"✅ Restaurant {restaurant_name}")
-                restaurants_data.append(restaurant_obj)
-            except Exception as e:
-                print(f"⚠️ Error parsing restaurant data: {str(e)}")
-                import traceback
-                traceback.print_exc()
-                continue
+        restaurants_data = to_restaurant_responses(ai_response.get('restaurants', []))
         
         print(f"✅ Found {len(restaurants_data)} restaurants")
         
+        # Index results so details and listing don't need another AI search
+        await run_blocking(restaurant_store.add_many, restaurants_data, request.location)
+        if center:
+            restaurant_store.record_coverage(
+                filters_key, center['lat'], center['lng'], radius_m,
+                [restaurant.id for restaurant in restaurants_data]
+            )
+        
         return SearchResponse(
             totalFound=len(restaurants_data),
             restaurants=restaurants_data,
@@ -146,8 +153,73 @@ async def search_restaurants(request: SearchRequest) -> SearchResponse:
         print(f"❌ Error in search_restaurants: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Search error: {str(e)}")
 
+@router.post("/search/stream")
+async def search_restaurants_stream(
+    request: SearchRequest,
+    gemini_service: GeminiAgentService = Depends(get_gemini_service),
+    restaurant_store: RestaurantStore = Depends(get_restaurant_store)
+) -> StreamingResponse:
+    """
+    Streaming variant of /search that emits NDJSON events as pipeline stages complete
+    
+    Events (one JSON object per line, each with an "event" key):
+    - candidates: restaurants as a streaming stage produces them (scraper, transform), one per event
+    - update: restaurants after a filtering/scoring stage, with "removed" ids
+    - image: {"id", "image"} as each restaurant image is found
+    - done: the final SearchResponse fields
+    - error: {"detail"} if the search failed
+    
+    Every restaurant carries a stable id so the client can patch results in place.
+    """
+    if not request.location or len(request.location.strip()) == 0:
+        raise HTTPException(status_code=400, detail="Location is required")
+    
+    filters = validate_filters(request.filters.dict() if request.filters else {})
+    print(f"🔍 Streaming search for restaurants in {request.location}")
+    
+    async def event_stream():
+        try:
+            async for event in gemini_service.search_restaurants_stream(request.location, filters):
+                kind = event["event"]
+                if kind in ("candidates", "update"):
+                    payload = {
+                        "event": kind,
+                        "stage": event["stage"],
+                        "restaurants": [r.model_dump() for r in to_restaurant_responses(event["restaurants"])],
+                    }
+                    if kind == "update":
+                        payload["removed"] = event["removed"]
+                elif kind == "image":
+                    payload = {"event": kind, "stage": event["stage"], "id": event["id"], "image": event["image"]}
+                elif kind == "done":
+                    result = event["result"]
+                    restaurants_data = to_restaurant_responses(result.get("restaurants", []))
+                    await run_blocking(restaurant_store.add_many, restaurants_data, request.location)
+                    payload = {
+                        "event": kind,
+                        **SearchResponse(
+                            totalFound=len(restaurants_data),
+                            restaurants=restaurants_data,
+                            location=request.location,
+                            filters=request.filters
+                        ).model_dump(),
+                    }
+                    if result.get("error"):
+                        payload["error"] = result["error"]
+                else:
+                    continue
+                yield json.dumps(payload) + "\n"
+        except Exception as e:
+            print(f"❌ Error in search_restaurants_stream: {str(e)}")
+            yield json.dumps({"event": "error", "detail": f"Search error: {str(e)}"}) + "\n"
+    
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson")
+
 @router.get("/{restaurant_id}")
-async def get_restaurant_details(restaurant_id: str) -> RestaurantResponse:
+async def get_restaurant_details(
+    restaurant_id: str,
+    restaurant_store: RestaurantStore = Depends(get_restaurant_store)
+) -> RestaurantResponse:
     """
     Get detailed information about a specific restaurant
     
@@ -158,9 +230,13 @@ async def get_restaurant_details(restaurant_id: str) -> RestaurantResponse:
         RestaurantResponse with full restaurant details
     """
     try:
-        # TODO: Implement restaurant details retrieval from cache or database
-        raise HTTPException(status_code=404, detail="Restaurant not found")
+        restaurant = restaurant_store.get(restaurant_id)
+        if restaurant is None:
+            raise HTTPException(status_code=404, detail="Restaurant not found")
+        return restaurant
     
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
@@ -168,7 +244,8 @@ async def get_restaurant_details(restaurant_id: str) -> RestaurantResponse:
 async def list_restaurants(
     location: Optional[str] = Query(None),
     skip: int = Query(0),
-    limit: int = Query(10)
+    limit: int = Query(10),
+    restaurant_store: RestaurantStore = Depends(get_restaurant_store)
 ):
     """
     List restaurants with optional location filter
@@ -182,10 +259,12 @@ async def list_restaurants(
         Dictionary with restaurant list and pagination info
     """
     try:
-        # TODO: Implement listing with pagination from database
+        skip = max(0, skip)
+        limit = max(1, min(limit, settings.MAX_RESULTS_PER_PAGE))
+        total, restaurants = restaurant_store.list(location=location, skip=skip, limit=limit)
         return {
-            "total": 0,
-            "restaurants": [],
+            "total": total,
+            "restaurants": restaurants,
             "skip": skip,
             "limit": limit
         }
@@ -0,0 +1,169 @@
+# Micro-batched dietary validation across concurrent searches, with a per-check verdict cache
+import asyncio
+from typing import Dict, List, Optional, Set, Tuple
+from app.config import settings
+from app.utils.async_utils import run_blocking
+from app.utils.cache import create_cache, MISSING, TTLCache
+from app.utils.helpers import make_restaurant_id, normalize_text
+from app.utils.metrics import DIETARY_BATCH_SIZE
+from app.utils.tracing import start_span
+
+# (restaurant id, normalized dietary requirement)
+CheckKey = Tuple[str, str]
+
+
+class DietaryBatchScheduler:
+    """
+    Collects (restaurant, requirement) checks from concurrent searches for a short
+    window and judges them with one DietaryValidationAgent.judge_batch_async call.
+
+    Verdicts are cached per restaurant id and requirement, so a restaurant that
+    appears in many searches is judged once. Searches waiting on the same check
+    share one future, whether it is still queued or already in a batch.
+    """
+
+    def __init__(self, validator, window: Optional[float] = None, max_checks: Optional[int] = None,
+                 cache: Optional[TTLCache] = None):
+        self.validator = validator
+        self.window = settings.DIETARY_BATCH_WINDOW if window is None else window
+        self.max_checks = max_checks or settings.DIETARY_BATCH_MAX_CHECKS
+        self.cache = cache or create_cache(
+            "dietary_verdicts", settings.DIETARY_VERDICT_CACHE_TTL,
+            settings.DIETARY_VERDICT_CACHE_MAX_ENTRIES, settings.DIETARY_VERDICT_CACHE_BACKEND
+        )
+        self.batches_sent = 0
+        self._queued: Dict[CheckKey, Tuple[Dict, str]] = {}
+        self._waiting: Dict[CheckKey, asyncio.Future] = {}
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._batches: Set[asyncio.Task] = set()
+
+    async def validate(self, restaurants: List[Dict], dietary_requirements: List[str]) -> Dict:
+        """Drop-in for DietaryValidationAgent.validate_dietary_match_async"""
+        if not dietary_requirements:
+            return {"validated_restaurants": restaurants, "total_validated": len(restaurants), "removed_count": 0}
+
+        checks: Dict[CheckKey, Tuple[Dict, str]] = {}
+        for restaurant in restaurants:
+            if not restaurant.get('id'):
+                restaurant['id'] = make_restaurant_id(restaurant.get('name', ''), restaurant.get('address', ''))
+            for requirement in dietary_requirements:
+                checks.setdefault((restaurant['id'], normalize_text(requirement)), (restaurant, requirement))
+
+        # The verdict cache may be SQLite (shared between workers) - read it off the event loop
+        verdicts: Dict[CheckKey, Optional[Dict]] = await run_blocking(self._cached_verdicts, list(checks))
+        waits: Dict[CheckKey, asyncio.Future] = {
+            key: self._submit(key, *check) for key, check in checks.items() if key not in verdicts
+        }
+
+        print(f"🥗 Dietary Validation: {len(verdicts)} cached verdicts, {len(waits)} checks queued for batching")
+        if waits:
+            # Shielded: a search that goes away must not cancel checks other searches share
+            results = await asyncio.gather(*(asyncio.shield(future) for future in waits.values()))
+            verdicts.update(zip(waits, results))
+        return self._combine(restaurants, dietary_requirements, verdicts)
+
+    async def drain(self, timeout: Optional[float] = None) -> None:
+        """Send anything still queued and wait for in-flight batches"""
+        self._flush()
+        if self._batches:
+            await asyncio.wait(list(self._batches), timeout=timeout)
+
+    def _submit(self, key: CheckKey, restaurant: Dict, requirement: str) -> asyncio.Future:
+        future = self._waiting.get(key)
+        if future is not None:
+            return future
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._waiting[key] = future
+        self._queued[key] = (restaurant, requirement)
+        if len(self._queued) >= self.max_checks:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return future
+
+    def _flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._queued:
+            return
+        checks, self._queued = self._queued, {}
+        task = asyncio.ensure_future(self._run_batch(checks))
+        self._batches.add(task)
+        task.add_done_callback(self._batches.discard)
+
+    async def _run_batch(self, checks: Dict[CheckKey, Tuple[Dict, str]]) -> None:
+        self.batches_sent += 1
+        DIETARY_BATCH_SIZE.observe(len(checks))
+        verdicts: Dict[CheckKey, Dict] = {}
+        try:
+            with start_span("dietary.batch", checks=len(checks)) as span:
+                try:
+                    verdicts = await self.validator.judge_batch_async(list(checks.values()))
+                except Exception as e:
+                    # Waiters get no verdict and keep their restaurants, as an unbatched failure would
+                    span.set_error(e)
+                    print(f"Error validating dietary batch: {e}")
+                span.set_attribute("verdicts", len(verdicts))
+            await run_blocking(self._cache_verdicts, {key: verdicts[key] for key in checks if key in verdicts})
+        finally:
+            # Always release the waiters, even if the batch was cancelled (e.g. at shutdown)
+            for key in checks:
+                future = self._waiting.pop(key, None)
+                if future is not None and not future.done():
+                    future.set_result(verdicts.get(key))
+
+    def _cached_verdicts(self, keys: List[CheckKey]) -> Dict[CheckKey, Optional[Dict]]:
+        found = {}
+        for key in keys:
+            verdict = self.cache.get(self._cache_key(key))
+            if verdict is not MISSING:
+                found[key] = verdict
+        return found
+
+    def _cache_verdicts(self, verdicts: Dict[CheckKey, Dict]) -> None:
+        for key, verdict in verdicts.items():
+            self.cache.set(self._cache_key(key), verdict)
+
+    @staticmethod
+    def _cache_key(key: CheckKey) -> str:
+        return f"{key[0]}|{key[1]}"
+
+    @staticmethod
+    def _combine(restaurants: List[Dict], dietary_requirements: List[str],
+                 verdicts: Dict[CheckKey, Optional[Dict]]) -> Dict:
+        """Turn per-check verdicts back into one search's validation result"""
+        validated = []
+        removal_reasons = []
+        for restaurant in restaurants:
+            found = [verdicts.get((restaurant['id'], normalize_text(req))) for req in dietary_requirements]
+            rejected = [verdict for verdict in found if verdict and not verdict.get('supported')]
+            if rejected:
+                reason = rejected[0].get('notes') or f"does not support {rejected[0].get('requirement')}"
+                removal_reasons.append(f"{restaurant.get('name')}: {reason}")
+                continue
+            if any(verdict is None for verdict in found):
+                validated.append(restaurant)  # not judged (call failed or check skipped) - keep as is
+                continue
+
+            result = dict(restaurant)
+            result['dietary_match_confidence'] = min(int(verdict.get('confidence') or 0) for verdict in found)
+            result['dietary_validation_notes'] = " ".join(v['notes'] for v in found if v.get('notes'))
+            # Dishes that fit every requirement
+            items = list(found[0].get('matching_menu_items') or [])
+            for verdict in found[1:]:
+                allowed = set(verdict.get('matching_menu_items') or [])
+                items = [item for item in items if item in allowed]
+            if items:
+                result['matching_menu_items'] = items
+            validated.append(result)
+
+        removed = len(restaurants) - len(validated)
+        print(f"✓ Dietary Validation: {len(validated)} restaurants passed validation, {removed} removed")
+        return {
+            "validated_restaurants": validated,
+            "total_validated": len(validated),
+            "removed_count": removed,
+            "removal_reasons": removal_reasons,
+        }
@@ -1,57 +1,199 @@
 # Gemini AI Agent Service with Sequential Agents for restaurant discovery
+import asyncio
+import copy
+import hashlib
 import json
-import re
-from typing import List, Dict, Optional, Any
-import google.generativeai as genai
+import time
+from contextlib import contextmanager
+from typing import AsyncIterator, List, Dict, Optional, Any, Tuple
 from app.config import settings
-from app.services.google_maps_service import GoogleMapsService
-import requests
+from app.services.google_maps_service import GoogleMapsService, get_google_maps_service
+from app.services.geocoding_service import GeocodingService
+from app.services.dietary_batch_scheduler import DietaryBatchScheduler
+from app.services.gemini_rest import GeminiRESTModel
+from app.services.image_enrichment_service import ImageEnrichmentService
+from app.utils.async_utils import run_blocking, run_sync
+from app.utils.cache import create_cache, MISSING
+from app.utils.filtering import (
+    RestaurantIndex, build_local_results, can_score_locally, prefilter_restaurants, restore_original_fields,
+)
+from app.utils.helpers import canonical_search_key, make_restaurant_id, normalize_text
+from app.utils.json_stream import JSONItemStream, parse_json_document
+from app.utils.metrics import LLM_LATENCY, LLM_TOKENS, SEARCHES, STAGE_LATENCY, UPSTREAM_ERRORS
+from app.utils.prompt_builder import (
+    DIETARY_FIELDS, SINGLE_PASS_FIELDS, TRANSFORMER_FIELDS,
+    encode_filters, estimate_tokens, fields_for, restaurants_section,
+)
+from app.utils.single_flight import EventFanout, SingleFlight
+from app.utils.tracing import start_span
 
-# Configure Gemini API
-if not settings.GEMINI_API_KEY:
-    raise ValueError("❌ GEMINI_API_KEY is not set in environment variables!")
+_genai = None
 
-genai.configure(api_key=settings.GEMINI_API_KEY)
 
-class WebScraperAgent:
-    """Agent dedicated to scraping and fetching restaurant information from the web"""
+def get_genai():
+    """Import and configure the Gemini SDK on first use - it is the slowest import in the app"""
+    global _genai
+    if _genai is None:
+        if not settings.GEMINI_API_KEY:
+            raise ValueError("❌ GEMINI_API_KEY is not set in environment variables!")
+        import google.generativeai as genai
+        genai.configure(api_key=settings.GEMINI_API_KEY)
+        _genai = genai
+    return _genai
+
+DIETARY_RULES = """RULES FOR EACH DIETARY REQUIREMENT:
+- Vegetarian: Must have substantial vegetable-based dishes, no meat
+- Vegan: Must have plant-based dishes with no animal products
+- Gluten-Free: Must offer gluten-free alternatives or naturally gluten-free dishes
+- Dairy-Free: Must have dishes without dairy products
+- Nut-Free: Must be able to prepare dishes without nuts
+- Halal: Must follow halal food preparation standards
+- Kosher: Must follow kosher food preparation standards"""
+
+PIPELINE_THREE_STAGE = "three_stage"
+PIPELINE_SINGLE_PASS = "single_pass"
+
+NO_RESULTS = {
+    "restaurants": [],
+    "error": "No restaurants found matching your criteria",
+    "searchSummary": "Search returned no results"
+}
+
+
+def _stage_update(stage: str, before: List[Dict], after: List[Dict]) -> Dict:
+    """Progress event with a stage's surviving restaurants and the ids it removed"""
+    kept = {r.get('id') for r in after}
+    return {
+        "event": "update",
+        "stage": stage,
+        "restaurants": after,
+        "removed": [r.get('id') for r in before if r.get('id') not in kept]
+    }
+
+@contextmanager
+def _pipeline_stage(stage: str):
+    """Time a pipeline stage into STAGE_LATENCY and trace it as a span"""
+    with start_span(f"pipeline.{stage}", stage=stage) as span, STAGE_LATENCY.time(stage=stage):
+        yield span
+
+def _keep_original_image(restaurant: Dict, original: Optional[Dict]) -> None:
+    """Put back the original image URL, or a placeholder if neither has a valid one"""
+    if original and str(original.get('image') or '').startswith('http'):
+        restaurant['image'] = original['image']
+    elif not str(restaurant.get('image') or '').startswith('http'):
+        restaurant_name = restaurant.get('name', 'restaurant')
+        seed = hashlib.md5(restaurant_name.encode()).hexdigest()[:8]
+        restaurant['image'] = f"https://picsum.photos/seed/{seed}/400/300"
+        print(f"📸 Added fallback image for {restaurant_name}: {restaurant['image']}")
+
+
+class GeminiAgent:
+    """Base class for agents backed by a Gemini model"""
+    
+    agent_name = "gemini"
     
     def __init__(self):
+        self._model = None
+    
+    @property
+    def model(self):
+        """The agent's Gemini model, created on first use"""
+        if self._model is None:
+            if settings.GEMINI_API_BASE_URL:
+                # REST API at a configured endpoint (e.g. mock_upstream for load tests)
+                self._model = GeminiRESTModel(settings.GEMINI_MODEL, settings.GEMINI_API_BASE_URL, settings.GEMINI_API_KEY)
+            else:
+                self._model = get_genai().GenerativeModel(settings.GEMINI_MODEL)
+        return self._model
+    
+    async def _generate(self, prompt: str, generation_config: Optional[Dict] = None) -> str:
+        """Send a prompt to Gemini without blocking the event loop and return the response text"""
+        with start_span("gemini.generate_content", agent=self.agent_name, prompt_chars=len(prompt),
+                        streamed=False) as span:
+            try:
+                with LLM_LATENCY.time(agent=self.agent_name):
+                    response = await self.model.generate_content_async(prompt, generation_config=generation_config)
+            except Exception:
+                UPSTREAM_ERRORS.inc(upstream="gemini")
+                raise
+            self._record_usage(response, span, prompt)
+            text = response.text.strip()
+            span.set_attribute("response_chars", len(text))
+            return text
+    
+    async def _stream_items(self, prompt: str, parser: JSONItemStream) -> AsyncIterator[Any]:
+        """Stream a Gemini response and yield each JSON array item as soon as it is complete"""
+        with start_span("gemini.generate_content", agent=self.agent_name, prompt_chars=len(prompt),
+                        streamed=True) as span:
+            started = time.perf_counter()
+            items = 0
+            try:
+                response = await self.model.generate_content_async(prompt, stream=True)
+                async for chunk in response:
+                    try:
+                        text = chunk.text
+                    except ValueError:
+                        continue  # chunk without text parts (e.g. only finish metadata)
+                    for item in parser.feed(text):
+                        if not items:
+                            span.set_attribute("first_item_ms", round((time.perf_counter() - started) * 1000, 1))
+                        items += 1
+                        yield item
+            except Exception:
+                UPSTREAM_ERRORS.inc(upstream="gemini")
+                raise
+            finally:
+                LLM_LATENCY.observe(time.perf_counter() - started, agent=self.agent_name)
+                span.set_attribute("response_chars", len(parser.text))
+                span.set_attribute("items", items)
+            # Streamed responses report token usage once the stream is exhausted
+            self._record_usage(response, span, prompt)
+    
+    def _record_usage(self, response, span=None, prompt: str = "") -> None:
+        """Report the call's token counts (estimated from the prompt if the API sent no usage)"""
+        usage = getattr(response, 'usage_metadata', None)
+        if usage:
+            prompt_tokens = getattr(usage, 'prompt_token_count', 0) or 0
+            response_tokens = getattr(usage, 'candidates_token_count', 0) or 0
+            LLM_TOKENS.inc(prompt_tokens, agent=self.agent_name, kind="prompt")
+            LLM_TOKENS.inc(response_tokens, agent=self.agent_name, kind="response")
+            if span is not None:
+                span.set_attribute("prompt_tokens", prompt_tokens)
+                span.set_attribute("response_tokens", response_tokens)
+            print(f"🔢 {self.agent_name}: {prompt_tokens} prompt + {response_tokens} response tokens")
+        else:
+            estimated = estimate_tokens(prompt)
+            if span is not None:
+                span.set_attribute("prompt_tokens_estimated", estimated)
+            print(f"🔢 {self.agent_name}: ~{estimated} prompt tokens (estimated, no usage reported)")
+
+
+class WebScraperAgent(GeminiAgent):
+    """Agent dedicated to scraping and fetching restaurant information from the web"""
+    
+    agent_name = "web_scraper"
+    
+    def __init__(self, google_maps: Optional[GoogleMapsService] = None):
         """Initialize web scraper agent"""
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
-        self.session = requests.Session()
-        self.session.headers.update({
-            'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
-        })
-        # Initialize Google Maps service for photo fetching
-        self.google_maps = GoogleMapsService()
+        super().__init__()
+        # Shared Google Maps service (pooled HTTP session) for geocoding and photo fetching
+        self.google_maps = google_maps or get_google_maps_service()
+        self.geocoder = GeocodingService(self.google_maps)
     
     def search_restaurants_web(self, location: str, filters: Dict) -> Dict:
+        """Synchronous wrapper around search_restaurants_web_async for scripts"""
+        return run_sync(self.search_restaurants_web_async(location, filters))
+    
+    async def search_restaurants_web_async(self, location: str, filters: Dict) -> Dict:
         """
         Agent that searches for restaurants using web scraping and API calls.
         Converts filter criteria to a web search query.
         """
-        print(f"🌐 Web Scraper Agent: Searching for restaurants in {location}")
-        
         # Build search query from filters
         search_query = self._build_search_query(location, filters)
         
         try:
-            # First, try to get results from Google Places-like query
-            results = self._search_google_places_equivalent(location, filters)
-            
-            if results:
-                print(f"✓ Web Scraper Agent: Found {len(results)} restaurants")
-                return {
-                    "raw_results": results,
-                    "search_query": search_query,
-                    "total_found": len(results),
-                    "status": "success"
-                }
-            else:
-                # Fallback: Use Gemini to generate realistic restaurant data based on location and filters
-                return self._generate_restaurant_data(location, filters, search_query)
-        
+            results = [result async for result in self.stream_restaurants_web(location, filters)]
         except Exception as e:
             print(f"✗ Web Scraper Agent Error: {str(e)}")
             return {
@@ -59,6 +201,44 @@ class WebScraperAgent:
                 "error": str(e),
                 "status": "error"
             }
+        
+        if not results:
+            return {
+                "raw_results": [],
+                "error": "Failed to generate restaurant data",
+                "status": "error"
+            }
+        
+        return {
+            "raw_results": results,
+            "search_query": search_query,
+            "total_found": len(results),
+            "status": "success"
+        }
+    
+    async def stream_restaurants_web(self, location: str, filters: Dict) -> AsyncIterator[Dict]:
+        """Yield restaurants one at a time, as soon as the model finishes writing each one"""
+        print(f"🌐 Web Scraper Agent: Searching for restaurants in {location}")
+        
+        # First, try to get results from Google Places-like query
+        found = 0
+        async for result in self._search_google_places_equivalent(location, filters):
+            found += 1
+            yield self._with_id(result)
+        
+        if found:
+            print(f"✓ Web Scraper Agent: Found {found} restaurants")
+            return
+        
+        # Fallback: Use Gemini to generate realistic restaurant data based on location and filters
+        async for result in self._generate_restaurant_data(location, filters):
+            yield self._with_id(result)
+    
+    @staticmethod
+    def _with_id(restaurant: Dict) -> Dict:
+        """Give a restaurant the stable id later stages use to match LLM output back to it"""
+        restaurant['id'] = make_restaurant_id(restaurant.get('name', ''), restaurant.get('address', ''))
+        return restaurant
     
     def _build_search_query(self, location: str, filters: Dict) -> str:
         """Convert filter criteria to a web search query"""
@@ -75,7 +255,7 @@ class WebScraperAgent:
         
         return " ".join(query_parts)
     
-    def _search_google_places_equivalent(self, location: str, filters: Dict) -> List[Dict]:
+    async def _search_google_places_equivalent(self, location: str, filters: Dict) -> AsyncIterator[Dict]:
         """
         Search for restaurants using web APIs and scraping.
         This could integrate with Google Places API or other restaurant databases.
@@ -92,20 +272,13 @@ Return a JSON array of REAL, ACTUAL restaurants with exact names and addresses.
 Format: [{{"name": "exact name", "address": "exact address", "cuisine": "type"}}]"""
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Extract JSON
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if json_match:
-                results = json.loads(json_match.group())
-                return results if isinstance(results, list) else []
+            items = (result async for result in self._stream_items(prompt, JSONItemStream()) if isinstance(result, dict))
+            async for result in self._with_coordinates(items, location):
+                yield result
         except Exception as e:
             print(f"Error in web search: {e}")
-        
-        return []
     
-    def _generate_restaurant_data(self, location: str, filters: Dict, search_query: str) -> Dict:
+    async def _generate_restaurant_data(self, location: str, filters: Dict) -> AsyncIterator[Dict]:
         """Generate comprehensive restaurant data when web scraping unavailable"""
         print(f"📊 Web Scraper Agent: Generating restaurant data...")
         
@@ -172,158 +345,109 @@ Return ONLY a valid JSON array with no markdown:
 ]"""
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Remove markdown code blocks if present
-            if response_text.startswith('```'):
-                response_text = response_text.split('```')[1]
-                if response_text.startswith('json'):
-                    response_text = response_text[4:]
-            response_text = response_text.strip()
-            
-            # Extract JSON array
-            json_match = re.search(r'\[.*\]', response_text, re.DOTALL)
-            if json_match:
-                raw_results = json.loads(json_match.group())
-                # Ensure all results have required fields and fetch real photos
-                for result in raw_results:
-                    if 'latitude' not in result or not result['latitude']:
-                        result['latitude'] = self._geocode_address(result.get('address', location))['lat']
-                    if 'longitude' not in result or not result['longitude']:
-                        result['longitude'] = self._geocode_address(result.get('address', location))['lng']
-                    
-                    # ALWAYS ensure there's a valid image URL - try multiple sources
-                    restaurant_name = result.get('name', '')
-                    existing_image = result.get('image', '')
-                    website_url = result.get('website', '')
-                    
-                    # Clean up existing image URL - reject fake/example URLs
-                    if existing_image:
-                        existing_image = existing_image.strip()
-                        # Remove placeholder URLs and example.com URLs
-                        invalid_domains = ['placeholder', 'via.placeholder', 'example.com', 'example.org', 'lorem', 'dummy', 'test.com']
-                        if any(invalid in existing_image.lower() for invalid in invalid_domains):
-                            print(f"  ⚠️ Rejected invalid/example URL: {existing_image}")
-                            existing_image = ''
-                    
-                    # If no valid image, try to fetch from multiple sources
-                    if not existing_image or not existing_image.startswith('http'):
-                        print(f"📸 Fetching photo for {restaurant_name}...")
-                        photo_url = None
-                        
-                        # First, try to get from restaurant website if available
-                        if website_url:
-                            print(f"  → Trying to fetch REAL restaurant image from website: {website_url}")
-                            try:
-                                photo_url = self.google_maps.get_image_from_website(website_url, restaurant_name)
-                                if photo_url:
-                                    result['image'] = photo_url
-                                    print(f"✓ Found REAL restaurant photo from website for {restaurant_name}")
-                            except Exception as e:
-                                print(f"  ✗ Website scraping failed: {e}")
-                        
-                        # If website scraping didn't work, try Google Maps (REAL restaurant photos)
-                        if not photo_url:
-                            print(f"  → Trying Google Maps for REAL restaurant photo...")
-                            try:
-                                photo_url = self.google_maps.get_restaurant_photo(restaurant_name, location)
-                                if photo_url:
-                                    result['image'] = photo_url
-                                    print(f"✓ Found REAL restaurant photo from Google Maps for {restaurant_name}")
-                                else:
-                                    print(f"  ⚠️ No real restaurant photo found in Google Maps for {restaurant_name}")
-                            except Exception as e:
-                                print(f"  ✗ Google Maps failed: {e}")
-                        
-                        # CRITICAL: Only use real restaurant images - NO generic fallbacks
-                        if not result.get('image') or not result['image'].startswith('http'):
-                            print(f"  ⚠️  No real restaurant image found for {restaurant_name} - image will be missing")
-                            # Don't set a generic fallback - let it be None so frontend can handle it
-                            result['image'] = None
-                    else:
-                        # Image exists, but verify it's a real restaurant image (not generic placeholder)
-                        if not existing_image.startswith('http'):
-                            result['image'] = None
-                        elif any(generic in existing_image.lower() for generic in ['picsum', 'unsplash', 'placeholder', 'via.placeholder', 'example.com', 'example.org', 'lorem', 'dummy']):
-                            # If it's a generic placeholder, try to get a real one
-                            print(f"  ⚠️ Found generic placeholder for {restaurant_name}, trying to get real image...")
-                            if website_url:
-                                try:
-                                    real_photo = self.google_maps.get_image_from_website(website_url, restaurant_name)
-                                    if real_photo:
-                                        result['image'] = real_photo
-                                        print(f"✓ Replaced placeholder with real image from website")
-                                except:
-                                    pass
-                            if not result.get('image') or any(generic in result.get('image', '').lower() for generic in ['picsum', 'unsplash']):
-                                # Try Google Maps
-                                try:
-                                    real_photo = self.google_maps.get_restaurant_photo(restaurant_name, location)
-                                    if real_photo:
-                                        result['image'] = real_photo
-                                        print(f"✓ Replaced placeholder with real image from Google Maps")
-                                except:
-                                    pass
-                            # If still no real image, set to None
-                            if not result.get('image') or any(generic in result.get('image', '').lower() for generic in ['picsum', 'unsplash']):
-                                result['image'] = None
-                                print(f"  ❌ No real restaurant image available for {restaurant_name}")
-                
-                return {
-                    "raw_results": raw_results if isinstance(raw_results, list) else [],
-                    "search_query": search_query,
-                    "total_found": len(raw_results) if isinstance(raw_results, list) else 0,
-                    "status": "success"
-                }
+            # Markdown fences and prose around the array are skipped by the parser
+            items = (result async for result in self._stream_items(prompt, JSONItemStream()) if isinstance(result, dict))
+            # Ensure each result has coordinates; images are filled in later by
+            # the concurrent image enrichment stage
+            async for result in self._with_coordinates(items, location):
+                yield result
         except Exception as e:
             print(f"Error generating data: {e}")
-        
-        return {
-            "raw_results": [],
-            "error": "Failed to generate restaurant data",
-            "status": "error"
-        }
     
-    def _geocode_address(self, address: str) -> Dict:
-        """Simple geocoding - returns approximate coordinates"""
-        # This is a fallback - in production you'd use Google Geocoding API
-        # For now, return approximate coordinates for major cities
-        location_coords = {
-            'new york': {'lat': 40.7128, 'lng': -74.0060},
-            'los angeles': {'lat': 34.0522, 'lng': -118.2437},
-            'chicago': {'lat': 41.8781, 'lng': -87.6298},
-            'san francisco': {'lat': 37.7749, 'lng': -122.4194},
-            'seattle': {'lat': 47.6062, 'lng': -122.3321},
-            'boston': {'lat': 42.3601, 'lng': -71.0589},
-            'miami': {'lat': 25.7617, 'lng': -80.1918},
-        }
+    async def _with_coordinates(self, results: AsyncIterator[Dict], location: str) -> AsyncIterator[Dict]:
+        """
+        Pass streamed restaurants through with coordinates filled in.
         
-        address_lower = address.lower()
-        for city, coords in location_coords.items():
-            if city in address_lower:
-                return coords
+        Restaurants that already have coordinates are yielded at once. The rest are
+        geocoded concurrently while the model stream keeps being read, one lookup per
+        distinct address shared by every restaurant at it, and are yielded as their
+        lookups finish.
+        """
+        ready: asyncio.Queue = asyncio.Queue()
+        finished = object()
+        lookups: Dict[str, asyncio.Future] = {}
+        locating: List[asyncio.Task] = []
         
-        # Default to NYC if not found
-        return {'lat': 40.7128, 'lng': -74.0060}
+        def lookup(address: str) -> asyncio.Future:
+            if address not in lookups:
+                lookups[address] = asyncio.ensure_future(run_blocking(self.geocoder.geocode, address))
+            return lookups[address]
+        
+        async def locate(result: Dict) -> None:
+            try:
+                point = await lookup(result.get('address') or location) or await lookup(location)
+            except Exception as e:
+                print(f"  ⚠️ Geocoding failed: {type(e).__name__}")
+                point = None
+            if not point:
+                print(f"  ⚠️ Could not geocode {result.get('name', 'restaurant')}")
+                point = {'lat': 0.0, 'lng': 0.0}
+            result['latitude'] = result.get('latitude') or point['lat']
+            result['longitude'] = result.get('longitude') or point['lng']
+            ready.put_nowait(result)
+        
+        async def read() -> None:
+            try:
+                async for result in results:
+                    if result.get('latitude') and result.get('longitude'):
+                        ready.put_nowait(result)
+                    else:
+                        locating.append(asyncio.ensure_future(locate(result)))
+                await asyncio.gather(*locating)
+            finally:
+                ready.put_nowait(finished)
+        
+        reader = asyncio.ensure_future(read())
+        try:
+            while True:
+                result = await ready.get()
+                if result is finished:
+                    break
+                yield result
+            await reader  # re-raise a failed model stream
+        finally:
+            for task in [reader, *locating, *lookups.values()]:
+                task.cancel()
 
 
-class DataTransformerAgent:
+class DataTransformerAgent(GeminiAgent):
     """Agent dedicated to transforming and formatting restaurant data for frontend display"""
     
-    def __init__(self):
-        """Initialize data transformer agent"""
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+    agent_name = "data_transformer"
     
     def transform_restaurant_data(self, raw_restaurants: List[Dict], filters: Dict) -> Dict:
+        """Synchronous wrapper around transform_restaurant_data_async for scripts"""
+        return run_sync(self.transform_restaurant_data_async(raw_restaurants, filters))
+    
+    async def transform_restaurant_data_async(self, raw_restaurants: List[Dict], filters: Dict) -> Dict:
         """
         Transform raw restaurant data into frontend-displayable format.
         Filters restaurants based on ALL criteria and enriches data.
         """
+        result = {}
+        transformed_restaurants = [
+            transformed async for transformed
+            in self.stream_transformed_restaurants(raw_restaurants, filters, result)
+        ]
+        if not transformed_restaurants:
+            return {
+                "transformed_restaurants": [],
+                "error": "Failed to transform restaurant data",
+                "search_summary": "No results could be processed"
+            }
+        result['transformed_restaurants'] = transformed_restaurants
+        return result
+    
+    async def stream_transformed_restaurants(self, raw_restaurants: List[Dict], filters: Dict,
+                                             summary: Optional[Dict] = None) -> AsyncIterator[Dict]:
+        """
+        Yield each transformed restaurant as soon as the model finishes writing it.
+        The summary fields that follow the array are copied into `summary` at the end.
+        """
         print(f"🔄 Data Transformer Agent: Processing {len(raw_restaurants)} restaurants")
         
-        restaurants_json = json.dumps(raw_restaurants, indent=2)
-        filters_json = json.dumps(filters, indent=2)
+        restaurants_block = restaurants_section(raw_restaurants, fields_for(TRANSFORMER_FIELDS, filters))
+        filters_json = encode_filters(filters)
         
         # Build dietary requirements summary
         dietary_requirements = filters.get('dietary', [])
@@ -331,8 +455,7 @@ class DataTransformerAgent:
         
         prompt = f"""You are a data transformer. Process these restaurants and filters.
 
-RESTAURANTS:
-{restaurants_json}
+{restaurants_block}
 
 FILTERS (what user selected):
 {filters_json}
@@ -348,26 +471,18 @@ TASK:
    - accessibility_features (list)
    - service_types_available (list)
 3. Sort by match_score descending
-4. Include coordinates as lat/lon (estimate if needed)
-5. IMPORTANT: Only include restaurants that can accommodate the dietary restrictions
-6. CRITICAL: Preserve the "image" field from the original restaurant data - do not remove or modify image URLs
+4. IMPORTANT: Only include restaurants that can accommodate the dietary restrictions
+5. Copy "id" and "name" exactly as given - address, coordinates, images and contact details are filled in afterwards
 
 Return ONLY valid JSON:
 {{
   "transformed_restaurants": [
     {{
-      "id": "unique_id",
+      "id": "id from the input",
       "name": "restaurant name",
-      "address": "full address",
-      "latitude": 37.7749,
-      "longitude": -122.4194,
       "rating": 4.5,
       "budget": "$$ or $$$",
       "cuisines": ["type1", "type2"],
-      "image": "url_if_available - MUST preserve original image URL from input",
-      "website": "url",
-      "phone": "phone_number",
-      "hours": "hours",
       "match_score": 95,
       "matching_menu_items": ["dish1", "dish2"],
       "why_it_matches": "reason",
@@ -381,54 +496,71 @@ Return ONLY valid JSON:
   "search_summary": "Found 5 restaurants matching your criteria"
 }}"""
         
+        parser = JSONItemStream(key='transformed_restaurants')
+        index = RestaurantIndex(raw_restaurants)
+        count = 0
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
-            
-            # Extract JSON
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                
-                # Post-process to ensure images are preserved from original data
-                transformed_restaurants = result.get('transformed_restaurants', [])
-                for transformed in transformed_restaurants:
-                    # Find matching original restaurant by name
-                    original = next(
-                        (r for r in raw_restaurants if r.get('name') == transformed.get('name')),
-                        None
-                    )
-                    # Always ensure image exists
-                    if original and original.get('image') and original.get('image').startswith('http'):
-                        transformed['image'] = original.get('image')
-                    elif not transformed.get('image') or not transformed.get('image', '').startswith('http'):
-                        # Generate fallback if no valid image
-                        import hashlib
-                        restaurant_name = transformed.get('name', 'restaurant')
-                        seed = hashlib.md5(restaurant_name.encode()).hexdigest()[:8]
-                        transformed['image'] = f"https://picsum.photos/seed/{seed}/400/300"
-                        print(f"📸 Added fallback image for {restaurant_name}: {transformed['image']}")
-                
-                print(f"✓ Data Transformer Agent: Transformed {len(transformed_restaurants)} restaurants")
-                return result
+            async for transformed in self._stream_items(prompt, parser):
+                if isinstance(transformed, dict):
+                    count += 1
+                    yield self._post_process(transformed, index)
         except Exception as e:
             print(f"Error transforming data: {e}")
         
-        return {
-            "transformed_restaurants": [],
-            "error": "Failed to transform restaurant data",
-            "search_summary": "No results could be processed"
-        }
+        document = parser.document()
+        if not count and isinstance(document, dict):
+            # Nothing streamed (e.g. an unexpected layout) - fall back to the complete document
+            for transformed in document.get('transformed_restaurants') or []:
+                if isinstance(transformed, dict):
+                    count += 1
+                    yield self._post_process(transformed, index)
+        
+        if summary is not None:
+            if isinstance(document, dict):
+                summary.update({k: v for k, v in document.items() if k != 'transformed_restaurants'})
+            summary.setdefault('search_summary', f"Found {count} matching restaurants")
+        print(f"✓ Data Transformer Agent: Transformed {count} restaurants")
+    
+    @staticmethod
+    def _post_process(transformed: Dict, index: RestaurantIndex) -> Dict:
+        """Ensure images are preserved from original data"""
+        _keep_original_image(transformed, index.find(transformed))
+        return transformed
 
 
-class DietaryValidationAgent:
+class DietaryValidationAgent(GeminiAgent):
     """Agent dedicated to validating that restaurants truly accommodate dietary restrictions"""
     
-    def __init__(self):
-        """Initialize dietary validation agent"""
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+    agent_name = "dietary_validator"
+    
+    BATCH_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "verdicts": {
+                "type": "array",
+                "items": {
+                    "type": "object",
+                    "properties": {
+                        "id": {"type": "string"},
+                        "name": {"type": "string"},
+                        "requirement": {"type": "string"},
+                        "supported": {"type": "boolean"},
+                        "confidence": {"type": "integer"},
+                        "matching_menu_items": {"type": "array", "items": {"type": "string"}},
+                        "notes": {"type": "string"},
+                    },
+                    "required": ["id", "requirement", "supported"],
+                },
+            },
+        },
+        "required": ["verdicts"],
+    }
     
     def validate_dietary_match(self, restaurants: List[Dict], dietary_requirements: List[str]) -> Dict:
+        """Synchronous wrapper around validate_dietary_match_async for scripts"""
+        return run_sync(self.validate_dietary_match_async(restaurants, dietary_requirements))
+    
+    async def validate_dietary_match_async(self, restaurants: List[Dict], dietary_requirements: List[str]) -> Dict:
         """
         Validate that restaurants genuinely accommodate dietary restrictions.
         Removes restaurants that don't truly align with dietary needs.
@@ -443,13 +575,12 @@ class DietaryValidationAgent:
         
         print(f"🥗 Dietary Validation Agent: Validating {len(restaurants)} restaurants against dietary requirements")
         
-        restaurants_json = json.dumps(restaurants, indent=2)
+        restaurants_block = restaurants_section(restaurants, DIETARY_FIELDS)
         dietary_str = ', '.join(dietary_requirements)
         
         prompt = f"""You are a dietary validation expert. Evaluate if these restaurants truly support these dietary needs.
 
-RESTAURANTS:
-{restaurants_json}
+{restaurants_block}
 
 DIETARY REQUIREMENTS TO VALIDATE: {dietary_str}
 
@@ -460,20 +591,15 @@ TASK:
 4. Keep only restaurants that have substantial menu options for these dietary requirements
 5. For kept restaurants, add "dietary_match_confidence" (0-100) indicating how well they accommodate
 
-RULES FOR EACH DIETARY REQUIREMENT:
-- Vegetarian: Must have substantial vegetable-based dishes, no meat
-- Vegan: Must have plant-based dishes with no animal products
-- Gluten-Free: Must offer gluten-free alternatives or naturally gluten-free dishes
-- Dairy-Free: Must have dishes without dairy products
-- Nut-Free: Must be able to prepare dishes without nuts
-- Halal: Must follow halal food preparation standards
-- Kosher: Must follow kosher food preparation standards
+{DIETARY_RULES}
 
 Return ONLY valid JSON:
 {{
   "validated_restaurants": [
     {{
-      ...all restaurant fields,
+      "id": "id from the input",
+      "name": "restaurant name",
+      "matching_menu_items": ["dishes that fit the dietary requirements"],
       "dietary_match_confidence": 95,
       "dietary_validation_notes": "reason why this restaurant matches the dietary requirements"
     }}
@@ -484,32 +610,16 @@ Return ONLY valid JSON:
 }}"""
         
         try:
-            response = self.model.generate_content(prompt)
-            response_text = response.text.strip()
+            response_text = await self._generate(prompt)
             
             # Extract JSON
-            json_match = re.search(r'\{.*\}', response_text, re.DOTALL)
-            if json_match:
-                result = json.loads(json_match.group())
-                
+            result = parse_json_document(response_text)
+            if isinstance(result, dict):
                 # Post-process to ensure images are preserved
                 validated_restaurants = result.get('validated_restaurants', [])
+                index = RestaurantIndex(restaurants)
                 for validated in validated_restaurants:
-                    # Find matching original restaurant by name
-                    original = next(
-                        (r for r in restaurants if r.get('name') == validated.get('name')),
-                        None
-                    )
-                    # Always ensure image exists
-                    if original and original.get('image') and original.get('image').startswith('http'):
-                        validated['image'] = original.get('image')
-                    elif not validated.get('image') or not validated.get('image', '').startswith('http'):
-                        # Generate fallback if no valid image
-                        import hashlib
-                        restaurant_name = validated.get('name', 'restaurant')
-                        seed = hashlib.md5(restaurant_name.encode()).hexdigest()[:8]
-                        validated['image'] = f"https://picsum.photos/seed/{seed}/400/300"
-                        print(f"📸 Added fallback image for {restaurant_name}: {validated['image']}")
+                    _keep_original_image(validated, index.find(validated))
                 
                 removed = result.get('removed_count', 0)
                 validated = len(validated_restaurants)
@@ -523,6 +633,154 @@ Return ONLY valid JSON:
             "total_validated": len(restaurants),
             "removed_count": 0
         }
+    
+    async def judge_batch_async(self, checks: List[Tuple[Dict, str]]) -> Dict[Tuple[str, str], Dict]:
+        """
+        Judge many (restaurant, dietary requirement) checks - possibly from different
+        searches - in one structured-output call. Returns verdicts keyed by
+        (restaurant id, normalized requirement); checks the model skipped are missing.
+        """
+        restaurants = list({restaurant['id']: restaurant for restaurant, _ in checks}.values())
+        requirements_by_id: Dict[str, List[str]] = {}
+        for restaurant, requirement in checks:
+            requirements_by_id.setdefault(restaurant['id'], []).append(requirement)
+        checks_text = "\n".join(
+            f"{restaurant_id}: {', '.join(requirements)}" for restaurant_id, requirements in requirements_by_id.items()
+        )
+        
+        prompt = f"""You are a dietary validation expert. Judge whether each restaurant truly supports each dietary requirement listed for it.
+
+{restaurants_section(restaurants, DIETARY_FIELDS)}
+
+CHECKS (restaurant id: requirements):
+{checks_text}
+
+TASK:
+Return one verdict per check with the restaurant id, the requirement exactly as listed, and:
+- supported: true only if the restaurant has substantial menu options for that requirement
+- confidence (0-100) in the verdict
+- matching_menu_items: ONLY dishes that fit that requirement
+- notes: one sentence explaining the verdict
+
+{DIETARY_RULES}"""
+        
+        # Plain dict: the SDK accepts it, and so does the REST client (GEMINI_API_BASE_URL)
+        generation_config = {"response_mime_type": "application/json", "response_schema": self.BATCH_SCHEMA}
+        response_text = await self._generate(prompt, generation_config=generation_config)
+        
+        index = RestaurantIndex(restaurants)
+        verdicts = {}
+        for verdict in json.loads(response_text).get('verdicts', []):
+            original = index.find(verdict)
+            if original and verdict.get('requirement'):
+                verdicts[(original['id'], normalize_text(verdict['requirement']))] = verdict
+        print(f"✓ Dietary Validation Agent: {len(verdicts)}/{len(checks)} checks judged "
+              f"for {len(restaurants)} restaurants in one call")
+        return verdicts
+
+
+class SinglePassAgent(GeminiAgent):
+    """Agent that filters, scores and validates dietary fit in one structured-output call"""
+    
+    agent_name = "single_pass"
+    
+    RESTAURANT_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "id": {"type": "string"},
+            "name": {"type": "string"},
+            "rating": {"type": "number"},
+            "budget": {"type": "string"},
+            "cuisines": {"type": "array", "items": {"type": "string"}},
+            "match_score": {"type": "integer"},
+            "matching_menu_items": {"type": "array", "items": {"type": "string"}},
+            "why_it_matches": {"type": "string"},
+            "accessibility_features": {"type": "array", "items": {"type": "string"}},
+            "service_types": {"type": "array", "items": {"type": "string"}},
+            "tags": {"type": "array", "items": {"type": "string"}},
+            "dietary_match_confidence": {"type": "integer"},
+            "dietary_validation_notes": {"type": "string"},
+        },
+        "required": ["name", "match_score"],
+    }
+    
+    RESPONSE_SCHEMA = {
+        "type": "object",
+        "properties": {
+            "transformed_restaurants": {"type": "array", "items": RESTAURANT_SCHEMA},
+            "removed_count": {"type": "integer"},
+            "search_summary": {"type": "string"},
+        },
+        "required": ["transformed_restaurants"],
+    }
+    
+    def filter_and_validate(self, raw_restaurants: List[Dict], filters: Dict) -> Dict:
+        """Synchronous wrapper around filter_and_validate_async for scripts"""
+        return run_sync(self.filter_and_validate_async(raw_restaurants, filters))
+    
+    async def filter_and_validate_async(self, raw_restaurants: List[Dict], filters: Dict) -> Dict:
+        """
+        Filter restaurants on ALL criteria, score them and validate dietary
+        accommodation in a single Gemini call with a JSON response schema.
+        """
+        print(f"⚡ Single-Pass Agent: Processing {len(raw_restaurants)} restaurants")
+        
+        restaurants_block = restaurants_section(raw_restaurants, fields_for(SINGLE_PASS_FIELDS, filters))
+        filters_json = encode_filters(filters)
+        dietary_requirements = filters.get('dietary', [])
+        dietary_str = ', '.join(dietary_requirements) if dietary_requirements else 'None specified'
+        
+        prompt = f"""You are a restaurant matching expert. Filter, score and validate these restaurants in one pass.
+
+{restaurants_block}
+
+FILTERS (what user selected):
+{filters_json}
+
+DIETARY REQUIREMENTS: {dietary_str}
+
+TASK:
+1. Keep only restaurants that match ALL user criteria exactly
+2. If dietary requirements are given, keep only restaurants with substantial menu options
+   for them, and set dietary_match_confidence (0-100) and dietary_validation_notes
+3. For each kept restaurant set match_score (0-100 based on how well it matches ALL filters,
+   especially dietary), matching_menu_items (ONLY dishes that fit the dietary needs),
+   why_it_matches, accessibility_features and service_types
+4. Sort by match_score descending
+5. Copy id and name exactly as given in the input
+6. Set removed_count to the number of input restaurants you dropped
+
+{DIETARY_RULES}"""
+        
+        # Plain dict: the SDK accepts it, and so does the REST client (GEMINI_API_BASE_URL)
+        generation_config = {"response_mime_type": "application/json", "response_schema": self.RESPONSE_SCHEMA}
+        
+        try:
+            response_text = await self._generate(prompt, generation_config=generation_config)
+            result = json.loads(response_text)
+            
+            # Preserve fields the model must not rewrite from the original data
+            restaurants = result.get('transformed_restaurants', [])
+            index = RestaurantIndex(raw_restaurants)
+            for restaurant in restaurants:
+                original = index.find(restaurant)
+                if original:
+                    if original.get('image') and str(original['image']).startswith('http'):
+                        restaurant['image'] = original['image']
+                    for field in ('latitude', 'longitude', 'website'):
+                        if original.get(field) and not restaurant.get(field):
+                            restaurant[field] = original[field]
+            
+            print(f"✓ Single-Pass Agent: {len(restaurants)} restaurants matched, {result.get('removed_count', 0)} removed")
+            return result
+        except Exception as e:
+            print(f"Error in single-pass filtering: {e}")
+        
+        return {
+            "transformed_restaurants": [],
+            "error": "Failed to filter restaurant data",
+            "search_summary": "No results could be processed"
+        }
 
 
 class GeminiAgentService:
@@ -533,7 +791,15 @@ class GeminiAgentService:
         self.web_scraper = WebScraperAgent()
         self.data_transformer = DataTransformerAgent()
         self.dietary_validator = DietaryValidationAgent()
-        self.model = genai.GenerativeModel(settings.GEMINI_MODEL)
+        self.dietary_scheduler = DietaryBatchScheduler(self.dietary_validator)
+        self.single_pass = SinglePassAgent()
+        self.pipeline_mode = settings.PIPELINE_MODE
+        self.image_enricher = ImageEnrichmentService(self.web_scraper.google_maps)
+        self.search_cache = create_cache(
+            "search", settings.SEARCH_CACHE_TTL, settings.SEARCH_CACHE_MAX_ENTRIES
+        )
+        self.search_flights = SingleFlight("search")
+        self._search_events: Dict[str, EventFanout] = {}
     
     def build_search_prompt(self, location: str, filters: Dict) -> str:
         """Build a detailed prompt for Gemini to search restaurants based on filters"""
@@ -545,69 +811,257 @@ class GeminiAgentService:
             '$$$$': 'Fine dining ($60+ per person)'
         }
     
-    def search_restaurants(self, location: str, filters: Dict) -> Dict:
+    def search_restaurants(self, location: str, filters: Dict, pipeline_mode: Optional[str] = None) -> Dict:
+        """Synchronous wrapper around search_restaurants_async for scripts"""
+        return run_sync(self.search_restaurants_async(location, filters, pipeline_mode))
+    
+    async def search_restaurants_async(self, location: str, filters: Dict, pipeline_mode: Optional[str] = None) -> Dict:
+        """
+        Search restaurants, serving identical location + filter requests from the result cache.
+        Concurrent identical searches share one in-flight pipeline run.
+        
+        pipeline_mode overrides settings.PIPELINE_MODE ("three_stage" or "single_pass").
+        """
+        pipeline_mode, cache_key = self._search_key(location, filters, pipeline_mode)
+        if self.search_flights.in_flight(cache_key):
+            SEARCHES.inc(source="coalesced")
+        result = await asyncio.shield(self._search_task(location, filters, pipeline_mode, cache_key))
+        # Every caller gets its own copy of the shared result
+        return copy.deepcopy(result)
+    
+    async def search_restaurants_stream(self, location: str, filters: Dict, pipeline_mode: Optional[str] = None) -> AsyncIterator[Dict]:
+        """
+        Run a search as a stream of progress events, each a dict with an "event" key:
+        
+        - "candidates": restaurants newly produced by a streaming stage (the web
+          scraper, the data transformer), one event per restaurant as the model
+          finishes writing it
+        - "update": restaurants after a filtering/scoring stage, plus ids it removed
+        - "image": an image found for one restaurant
+        - "done": the final result, identical to search_restaurants_async's return value
+        
+        Restaurants carry a stable "id" from ingestion onwards, so clients can patch
+        earlier results in place. Cached searches produce only the "done" event. A
+        search joining an identical one already in flight shares its pipeline run:
+        it gets the events so far, then follows the run live.
+        """
+        pipeline_mode, cache_key = self._search_key(location, filters, pipeline_mode)
+        if self.search_flights.in_flight(cache_key):
+            print(f"🔗 Joining in-flight search for {location}")
+            SEARCHES.inc(source="coalesced")
+        task = self._search_task(location, filters, pipeline_mode, cache_key)
+        fanout = self._search_events.get(cache_key)
+        if fanout is None:
+            # The shared run is just finishing - its result is all that's left
+            result = await asyncio.shield(task)
+            yield {"event": "done", "stage": "coalesced", "result": copy.deepcopy(result)}
+            return
+        
+        async for event in fanout.subscribe():
+            if event["event"] == "done":
+                # Every subscriber gets its own copy of the shared result
+                event = {**event, "result": copy.deepcopy(event["result"])}
+            yield event
+        # Re-raise the pipeline's error, if it failed, to this subscriber too
+        await asyncio.shield(task)
+    
+    async def has_cached_search(self, location: str, filters: Dict, pipeline_mode: Optional[str] = None) -> bool:
+        """Whether a search would be answered without a new pipeline run (cached or already in flight)"""
+        pipeline_mode, cache_key = self._search_key(location, filters, pipeline_mode)
+        if self.search_flights.in_flight(cache_key):
+            return True
+        return await run_blocking(self.search_cache.contains, cache_key)
+    
+    async def drain(self, timeout: float) -> None:
+        """Wait up to timeout seconds for in-flight searches to finish (graceful shutdown)"""
+        if self.search_flights.in_flight_count:
+            print(f"⏳ Draining {self.search_flights.in_flight_count} in-flight searches")
+        still_running = await self.search_flights.drain(timeout)
+        if still_running:
+            print(f"⚠️ {still_running} searches still running after {timeout}s - abandoning them")
+        await self.dietary_scheduler.drain(timeout)
+    
+    def _search_key(self, location: str, filters: Dict, pipeline_mode: Optional[str]) -> Tuple[str, str]:
+        """Resolve the pipeline mode and build the cache / single-flight key for a search"""
+        pipeline_mode = pipeline_mode or self.pipeline_mode
+        if pipeline_mode not in (PIPELINE_THREE_STAGE, PIPELINE_SINGLE_PASS):
+            raise ValueError(f"Unknown pipeline mode: {pipeline_mode}")
+        return pipeline_mode, f"{pipeline_mode}:{canonical_search_key(location, filters)}"
+    
+    def _search_task(self, location: str, filters: Dict, pipeline_mode: str, cache_key: str) -> asyncio.Task:
+        """The shared pipeline run for a search, started with its event fan-out if none is in flight"""
+        if not self.search_flights.in_flight(cache_key):
+            self._search_events[cache_key] = EventFanout()
+        return self.search_flights.start(
+            cache_key, self._collect_search, location, filters, pipeline_mode, cache_key
+        )
+    
+    async def _collect_search(self, location: str, filters: Dict, pipeline_mode: str, cache_key: str) -> Dict:
+        """Run a search once, publishing its events to every subscribed stream, and return the result"""
+        fanout = self._search_events[cache_key]
+        result = None
+        try:
+            async for event in self._cached_pipeline_events(location, filters, pipeline_mode, cache_key):
+                fanout.publish(event)
+                if event["event"] == "done":
+                    result = event["result"]
+        finally:
+            fanout.close()
+            if self._search_events.get(cache_key) is fanout:
+                del self._search_events[cache_key]
+        return result
+    
+    async def _cached_pipeline_events(self, location: str, filters: Dict, pipeline_mode: str, cache_key: str) -> AsyncIterator[Dict]:
+        """Serve a search from the result cache, or run the pipeline and cache its result"""
+        # The cache may be SQLite (shared between workers) - keep its I/O off the event loop
+        cached = await run_blocking(self.search_cache.get, cache_key)
+        if cached is not MISSING:
+            print(f"⚡ Search cache hit for {location} ({await run_blocking(self.search_cache.stats)})")
+            SEARCHES.inc(source="cache")
+            yield {"event": "done", "stage": "cache", "result": copy.deepcopy(cached)}
+            return
+        
+        SEARCHES.inc(source="pipeline")
+        started = time.perf_counter()
+        with start_span("pipeline.search", location=location, pipeline_mode=pipeline_mode) as span:
+            async for event in self._pipeline_events(location, filters, pipeline_mode):
+                if event["event"] == "done":
+                    STAGE_LATENCY.observe(time.perf_counter() - started, stage="total")
+                    span.set_attribute("results", event["result"].get("totalFound", 0))
+                    if event["result"].get("restaurants"):
+                        await run_blocking(self.search_cache.set, cache_key, copy.deepcopy(event["result"]))
+                yield event
+    
+    async def _pipeline_events(self, location: str, filters: Dict, pipeline_mode: str) -> AsyncIterator[Dict]:
         """
         Main orchestration method using sequential agents:
         1. WebScraperAgent: Finds real restaurants with dietary considerations
         2. DataTransformerAgent: Transforms and filters data
         3. DietaryValidationAgent: Validates dietary accommodation
+        4. ImageEnrichmentService: Fills in missing images concurrently
+        
+        In single-pass mode steps 2 and 3 are one SinglePassAgent call.
         """
         print(f"\n{'='*60}")
         print(f"🔍 SEARCH INITIATED")
         print(f"Location: {location}")
         print(f"Filters: {filters}")
+        print(f"Pipeline: {pipeline_mode}")
         print(f"{'='*60}\n")
         
         # STEP 1: Web Scraper Agent finds restaurants (now with dietary awareness)
         print("📍 STEP 1: Web Scraper Agent")
         print("-" * 60)
-        web_search_result = self.web_scraper.search_restaurants_web(location, filters)
+        raw_restaurants = []
+        with _pipeline_stage("scraper") as span:
+            try:
+                # Each restaurant is emitted as soon as the model finishes writing it
+                async for restaurant in self.web_scraper.stream_restaurants_web(location, filters):
+                    raw_restaurants.append(restaurant)
+                    yield {"event": "candidates", "stage": "scraper", "restaurants": [restaurant]}
+            except Exception as e:
+                span.set_error(e)
+                print(f"✗ Web Scraper Agent Error: {str(e)}")
+            span.set_attribute("restaurants", len(raw_restaurants))
         
-        if web_search_result.get("status") == "error" or not web_search_result.get("raw_results"):
+        if not raw_restaurants:
             print(f"⚠️  No restaurants found by web scraper")
-            return {
-                "restaurants": [],
-                "error": "No restaurants found matching your criteria",
-                "searchSummary": "Search returned no results"
-            }
+            yield {"event": "done", "stage": "scraper", "result": copy.deepcopy(NO_RESULTS)}
+            return
         
-        raw_restaurants = web_search_result.get("raw_results", [])
         print(f"✓ Found {len(raw_restaurants)} raw restaurant results\n")
         
-        # STEP 2: Data Transformer Agent processes and filters
-        print("📍 STEP 2: Data Transformer Agent")
-        print("-" * 60)
-        transformed_result = self.data_transformer.transform_restaurant_data(raw_restaurants, filters)
-        
-        if "error" in transformed_result:
-            print(f"⚠️  Error during transformation: {transformed_result.get('error')}")
-        
-        transformed_restaurants = transformed_result.get("transformed_restaurants", [])
-        print(f"✓ Transformed into {len(transformed_restaurants)} displayable restaurants\n")
+        # Check hard criteria (rating, budget, cuisine, service type) locally so only
+        # survivors go into the prompts; each agent sends just the fields it needs
+        candidates = raw_restaurants
+        if settings.LOCAL_PREFILTER_ENABLED:
+            candidates = prefilter_restaurants(raw_restaurants, filters)
+            print(f"🧮 Local pre-filter: {len(candidates)}/{len(raw_restaurants)} restaurants pass hard criteria\n")
+            yield _stage_update("prefilter", raw_restaurants, candidates)
+            if not candidates:
+                yield {"event": "done", "stage": "prefilter", "result": copy.deepcopy(NO_RESULTS)}
+                return
         
-        # STEP 3: Dietary Validation Agent validates dietary restrictions
-        print("📍 STEP 3: Dietary Validation Agent")
-        print("-" * 60)
-        dietary_requirements = filters.get('dietary', [])
-        if dietary_requirements:
-            validation_result = self.dietary_validator.validate_dietary_match(
-                transformed_restaurants, 
-                dietary_requirements
+        if settings.LOCAL_PREFILTER_ENABLED and can_score_locally(candidates, filters):
+            # STEP 2: Nothing needs the LLM's judgement - score locally and skip the LLM
+            print("📍 STEP 2: Local scoring (no soft criteria, all hard criteria checked, LLM skipped)")
+            print("-" * 60)
+            with _pipeline_stage("local_score"):
+                final_restaurants = build_local_results(candidates, filters)
+            print(f"✓ Scored {len(final_restaurants)} restaurants locally\n")
+            yield _stage_update("local_score", candidates, final_restaurants)
+        elif pipeline_mode == PIPELINE_SINGLE_PASS:
+            # STEP 2: Single-Pass Agent filters, scores and validates dietary fit at once
+            print("📍 STEP 2: Single-Pass Agent")
+            print("-" * 60)
+            with _pipeline_stage("single_pass"):
+                single_pass_result = await self.single_pass.filter_and_validate_async(candidates, filters)
+            if "error" in single_pass_result:
+                print(f"⚠️  Error during single-pass filtering: {single_pass_result.get('error')}")
+            final_restaurants = restore_original_fields(
+                single_pass_result.get("transformed_restaurants", []), candidates
             )
-            final_restaurants = validation_result.get("validated_restaurants", [])
-            print(f"✓ Validated {len(final_restaurants)} restaurants for dietary requirements\n")
+            print(f"✓ Matched {len(final_restaurants)} restaurants\n")
+            yield _stage_update("single_pass", candidates, final_restaurants)
         else:
-            final_restaurants = transformed_restaurants
-            print(f"✓ No dietary restrictions to validate\n")
+            # STEP 2: Data Transformer Agent processes and filters
+            print("📍 STEP 2: Data Transformer Agent")
+            print("-" * 60)
+            transformed_restaurants = []
+            candidate_index = RestaurantIndex(candidates)
+            with _pipeline_stage("transform") as span:
+                async for transformed in self.data_transformer.stream_transformed_restaurants(candidates, filters):
+                    restore_original_fields([transformed], candidate_index)
+                    transformed_restaurants.append(transformed)
+                    yield {"event": "candidates", "stage": "transform", "restaurants": [transformed]}
+                span.set_attribute("restaurants", len(transformed_restaurants))
+            
+            if not transformed_restaurants:
+                print(f"⚠️  Error during transformation: no restaurants returned")
+            
+            print(f"✓ Transformed into {len(transformed_restaurants)} displayable restaurants\n")
+            yield _stage_update("transform", candidates, transformed_restaurants)
+            
+            # STEP 3: Dietary Validation Agent validates dietary restrictions
+            print("📍 STEP 3: Dietary Validation Agent")
+            print("-" * 60)
+            dietary_requirements = filters.get('dietary', [])
+            if dietary_requirements:
+                # Batched with concurrent searches' checks, reusing cached verdicts
+                validate = (self.dietary_scheduler.validate if settings.DIETARY_BATCHING_ENABLED
+                            else self.dietary_validator.validate_dietary_match_async)
+                with _pipeline_stage("dietary"):
+                    validation_result = await validate(transformed_restaurants, dietary_requirements)
+                final_restaurants = restore_original_fields(
+                    validation_result.get("validated_restaurants", []), transformed_restaurants
+                )
+                print(f"✓ Validated {len(final_restaurants)} restaurants for dietary requirements\n")
+                yield _stage_update("dietary", transformed_restaurants, final_restaurants)
+            else:
+                final_restaurants = transformed_restaurants
+                print(f"✓ No dietary restrictions to validate\n")
+        
+        # STEP 4: Fill in missing images concurrently, bounded by a deadline
+        print("📍 STEP 4: Image Enrichment")
+        print("-" * 60)
+        with _pipeline_stage("images"):
+            async for restaurant in self.image_enricher.enrich_iter(final_restaurants, location):
+                yield {"event": "image", "stage": "images", "id": restaurant.get('id'), "image": restaurant['image']}
+        print()
         
         print(f"{'='*60}")
         print(f"✅ SEARCH COMPLETE")
         print(f"{'='*60}\n")
         
-        return {
-            "restaurants": final_restaurants,
-            "totalFound": len(final_restaurants),
-            "searchSummary": f"Found {len(final_restaurants)} restaurants matching your criteria",
-            "filters_applied": filters
+        yield {
+            "event": "done",
+            "stage": "images",
+            "result": {
+                "restaurants": final_restaurants,
+                "totalFound": len(final_restaurants),
+                "searchSummary": f"Found {len(final_restaurants)} restaurants matching your criteria",
+                "filters_applied": filters,
+                "pipeline_mode": pipeline_mode
+            }
         }
 
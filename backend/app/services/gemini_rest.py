@@ -0,0 +1,150 @@
+# Gemini REST API client (generateContent / streamGenerateContent) over the shared HTTP client
+import dataclasses
+import json
+from types import SimpleNamespace
+from typing import Any, AsyncIterator, Dict, Optional
+import httpx
+from app.config import settings
+from app.services.http_client import get_async_client
+
+
+class GeminiAPIError(Exception):
+    """Non-200 answer from the Gemini REST API"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Gemini API error {status_code}: {message}")
+        self.status_code = status_code
+
+
+class GeminiRESTResponse:
+    """One generateContent response (or stream chunk) exposing .text and .usage_metadata like the SDK"""
+
+    def __init__(self, payload: Dict):
+        self.payload = payload
+        self.usage_metadata = _usage(payload.get('usageMetadata'))
+
+    @property
+    def text(self) -> str:
+        candidates = self.payload.get('candidates') or []
+        parts = (candidates[0].get('content') or {}).get('parts') if candidates else None
+        if not parts:
+            raise ValueError("Response has no text parts")
+        return "".join(part.get('text', '') for part in parts)
+
+
+class GeminiRESTStream:
+    """Async iterable of streamed chunks; usage_metadata is set once the stream is exhausted"""
+
+    def __init__(self, url: str, body: Dict, headers: Dict):
+        self.url = url
+        self.body = body
+        self.headers = headers
+        self.usage_metadata = None
+
+    async def __aiter__(self) -> AsyncIterator[GeminiRESTResponse]:
+        client = get_async_client()
+        async with client.stream('POST', self.url, json=self.body, headers=self.headers,
+                                 timeout=_timeout()) as response:
+            if response.status_code != 200:
+                await response.aread()
+                raise GeminiAPIError(response.status_code, _error_message(response))
+            # Server-sent events: one GenerateContentResponse per "data:" line
+            async for line in response.aiter_lines():
+                if not line.startswith('data:'):
+                    continue
+                chunk = GeminiRESTResponse(json.loads(line[len('data:'):]))
+                if chunk.usage_metadata is not None:
+                    self.usage_metadata = chunk.usage_metadata
+                yield chunk
+
+
+class GeminiRESTModel:
+    """
+    Drop-in for genai.GenerativeModel that talks to the Gemini REST API.
+
+    Used when GEMINI_API_BASE_URL is set (e.g. the local mock upstream for load
+    tests). Only generate_content_async - the one call the agents make - is provided.
+    """
+
+    def __init__(self, model_name: str, base_url: str, api_key: str = ""):
+        self.model_name = model_name
+        self.base_url = base_url.rstrip('/')
+        self.api_key = api_key
+
+    def _url(self, method: str) -> str:
+        return f"{self.base_url}/v1beta/models/{self.model_name}:{method}"
+
+    async def generate_content_async(self, prompt: str, stream: bool = False, generation_config: Any = None):
+        body = {"contents": [{"role": "user", "parts": [{"text": prompt}]}]}
+        config = _generation_config(generation_config)
+        if config:
+            body["generationConfig"] = config
+        headers = {"x-goog-api-key": self.api_key, "Content-Type": "application/json"}
+
+        if stream:
+            return GeminiRESTStream(self._url("streamGenerateContent?alt=sse"), body, headers)
+
+        response = await get_async_client().post(self._url("generateContent"), json=body, headers=headers,
+                                                  timeout=_timeout())
+        if response.status_code != 200:
+            raise GeminiAPIError(response.status_code, _error_message(response))
+        return GeminiRESTResponse(response.json())
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.GEMINI_REQUEST_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+
+def _usage(usage: Optional[Dict]):
+    if not usage:
+        return None
+    return SimpleNamespace(
+        prompt_token_count=usage.get('promptTokenCount', 0),
+        candidates_token_count=usage.get('candidatesTokenCount', 0),
+        total_token_count=usage.get('totalTokenCount', 0),
+    )
+
+
+def _error_message(response: httpx.Response) -> str:
+    try:
+        return response.json().get('error', {}).get('message', response.text[:200])
+    except ValueError:
+        return response.text[:200]
+
+
+def _generation_config(config: Any) -> Optional[Dict]:
+    """Convert an SDK GenerationConfig (or dict) into the REST API's camelCase generationConfig"""
+    if config is None:
+        return None
+    if dataclasses.is_dataclass(config):
+        config = dataclasses.asdict(config)
+    result = {}
+    for key, value in dict(config).items():
+        if value is None:
+            continue
+        if key == 'response_schema':
+            value = _rest_schema(value)
+        result[_camel(key)] = value
+    return result
+
+
+def _rest_schema(schema: Any) -> Any:
+    """REST schemas spell types as enum names (OBJECT, STRING, ...) and use camelCase keys"""
+    if isinstance(schema, list):
+        return [_rest_schema(item) for item in schema]
+    if not isinstance(schema, dict):
+        return schema
+    converted = {}
+    for key, value in schema.items():
+        if key == 'type' and isinstance(value, str):
+            converted[key] = value.upper()
+        elif key == 'properties':
+            converted[key] = {name: _rest_schema(prop) for name, prop in value.items()}
+        else:
+            converted[_camel(key)] = _rest_schema(value)
+    return converted
+
+
+def _camel(name: str) -> str:
+    head, *rest = name.split('_')
+    return head + ''.join(part.title() for part in rest)
@@ -0,0 +1,200 @@
+# Geocoding with a local gazetteer, a persistent cache and Google Geocoding as the upstream
+import time
+from typing import Dict, Optional, Tuple
+from app.config import settings
+from app.services.google_maps_service import GoogleMapsService, get_google_maps_service
+from app.utils.cache import create_cache, MISSING
+from app.utils.helpers import normalize_text
+from app.utils.metrics import GEOCODE_LATENCY
+from app.utils.tracing import start_span
+
+# City-center coordinates for common search locations, keyed by normalized name
+CITY_GAZETTEER = {
+    'new york': (40.7128, -74.0060),
+    'new york city': (40.7128, -74.0060),
+    'nyc': (40.7128, -74.0060),
+    'manhattan': (40.7831, -73.9712),
+    'brooklyn': (40.6782, -73.9442),
+    'los angeles': (34.0522, -118.2437),
+    'chicago': (41.8781, -87.6298),
+    'houston': (29.7604, -95.3698),
+    'phoenix': (33.4484, -112.0740),
+    'philadelphia': (39.9526, -75.1652),
+    'san antonio': (29.4241, -98.4936),
+    'san diego': (32.7157, -117.1611),
+    'dallas': (32.7767, -96.7970),
+    'austin': (30.2672, -97.7431),
+    'san jose': (37.3382, -121.8863),
+    'san francisco': (37.7749, -122.4194),
+    'oakland': (37.8044, -122.2712),
+    'berkeley': (37.8715, -122.2730),
+    'seattle': (47.6062, -122.3321),
+    'portland': (45.5152, -122.6784),
+    'denver': (39.7392, -104.9903),
+    'boston': (42.3601, -71.0589),
+    'washington dc': (38.9072, -77.0369),
+    'atlanta': (33.7490, -84.3880),
+    'miami': (25.7617, -80.1918),
+    'orlando': (28.5383, -81.3792),
+    'las vegas': (36.1699, -115.1398),
+    'new orleans': (29.9511, -90.0715),
+    'nashville': (36.1627, -86.7816),
+    'minneapolis': (44.9778, -93.2650),
+    'detroit': (42.3314, -83.0458),
+    'pittsburgh': (40.4406, -79.9959),
+    'salt lake city': (40.7608, -111.8910),
+    'honolulu': (21.3069, -157.8583),
+    'toronto': (43.6532, -79.3832),
+    'montreal': (45.5019, -73.5674),
+    'vancouver': (49.2827, -123.1207),
+    'london': (51.5074, -0.1278),
+    'paris': (48.8566, 2.3522),
+    'tokyo': (35.6762, 139.6503),
+}
+
+# Region qualifiers each gazetteer city may carry ("Boston, MA, USA"). A city with
+# any other qualifier ("Portland, ME", "Paris, TX") is a different place and is
+# left to the cache and Google.
+_US = ('us', 'usa', 'united states')
+_CANADA = ('canada',)
+CITY_REGIONS = {
+    'new york': ('ny', 'new york') + _US,
+    'new york city': ('ny', 'new york') + _US,
+    'nyc': ('ny', 'new york') + _US,
+    'manhattan': ('ny', 'new york') + _US,
+    'brooklyn': ('ny', 'new york') + _US,
+    'los angeles': ('ca', 'california') + _US,
+    'chicago': ('il', 'illinois') + _US,
+    'houston': ('tx', 'texas') + _US,
+    'phoenix': ('az', 'arizona') + _US,
+    'philadelphia': ('pa', 'pennsylvania') + _US,
+    'san antonio': ('tx', 'texas') + _US,
+    'san diego': ('ca', 'california') + _US,
+    'dallas': ('tx', 'texas') + _US,
+    'austin': ('tx', 'texas') + _US,
+    'san jose': ('ca', 'california') + _US,
+    'san francisco': ('ca', 'california') + _US,
+    'oakland': ('ca', 'california') + _US,
+    'berkeley': ('ca', 'california') + _US,
+    'seattle': ('wa', 'washington') + _US,
+    'portland': ('or', 'oregon') + _US,
+    'denver': ('co', 'colorado') + _US,
+    'boston': ('ma', 'massachusetts') + _US,
+    'washington dc': ('dc',) + _US,
+    'atlanta': ('ga', 'georgia') + _US,
+    'miami': ('fl', 'florida') + _US,
+    'orlando': ('fl', 'florida') + _US,
+    'las vegas': ('nv', 'nevada') + _US,
+    'new orleans': ('la', 'louisiana') + _US,
+    'nashville': ('tn', 'tennessee') + _US,
+    'minneapolis': ('mn', 'minnesota') + _US,
+    'detroit': ('mi', 'michigan') + _US,
+    'pittsburgh': ('pa', 'pennsylvania') + _US,
+    'salt lake city': ('ut', 'utah') + _US,
+    'honolulu': ('hi', 'hawaii') + _US,
+    'toronto': ('on', 'ontario') + _CANADA,
+    'montreal': ('qc', 'quebec') + _CANADA,
+    'vancouver': ('bc', 'british columbia') + _CANADA,
+    'london': ('uk', 'united kingdom', 'england'),
+    'paris': ('france',),
+    'tokyo': ('japan',),
+}
+
+# Every qualifier some city accepts; these are stripped before the name lookup
+_REGION_SUFFIXES = {region for regions in CITY_REGIONS.values() for region in regions}
+
+_MAX_NAME_TOKENS = max(len(name.split()) for name in CITY_GAZETTEER)
+
+
+def _coords(lat: float, lng: float) -> Dict:
+    return {'lat': lat, 'lng': lng}
+
+
+class GeocodingService:
+    """Resolves addresses to coordinates with one upstream call per address at most"""
+
+    def __init__(self, google_maps: Optional[GoogleMapsService] = None):
+        self.google_maps = google_maps or get_google_maps_service()
+        self.cache = create_cache(
+            "geocode",
+            settings.GEOCODE_CACHE_TTL,
+            settings.GEOCODE_CACHE_MAX_ENTRIES,
+            backend=settings.GEOCODE_CACHE_BACKEND
+        )
+
+    def geocode(self, address: str) -> Optional[Dict]:
+        """
+        Convert an address to {'lat', 'lng'}, or None if it can't be resolved.
+
+        Lookup order:
+        1. Gazetteer, when the address is just a known city ("Boston, MA")
+        2. Persistent geocode cache
+        3. Google Geocoding API (result memoized in the cache)
+        4. Gazetteer city mentioned anywhere in the address, as an approximation
+        """
+        started = time.perf_counter()
+        with start_span("geocode", address=address) as span:
+            result, source = self._geocode(address)
+            span.set_attribute("source", source)
+        GEOCODE_LATENCY.observe(time.perf_counter() - started, source=source)
+        return result
+
+    def _geocode(self, address: str) -> Tuple[Optional[Dict], str]:
+        """Resolve an address, returning (coordinates, where they came from)"""
+        key = normalize_text(address)
+        if not key:
+            return None, "empty"
+
+        city = self._match_city(key)
+        if city:
+            return city, "gazetteer"
+
+        cached = self.cache.get(key)
+        if cached is not MISSING:
+            return cached, "cache"
+
+        coords = self.google_maps.geocode_location(address)
+        if coords and (coords.get('lat') or coords.get('lng')):
+            result = _coords(coords['lat'], coords['lng'])
+            self.cache.set(key, result)
+            return result, "google"
+
+        # Upstream couldn't resolve it - fall back to the nearest known city, and
+        # remember that for a shorter time so we retry the upstream later
+        result = self._find_city_in(key)
+        self.cache.set(key, result, ttl=settings.GEOCODE_CACHE_NEGATIVE_TTL)
+        return result, "approximate"
+
+    def _match_city(self, key: str) -> Optional[Dict]:
+        """
+        Match an address that consists only of a gazetteer city plus region
+        qualifiers that belong to that city; anything else returns None.
+        """
+        tokens = key.split()
+        suffixes = []
+        while tokens:
+            name = ' '.join(tokens)
+            if name in CITY_GAZETTEER:
+                if all(suffix in CITY_REGIONS.get(name, ()) for suffix in suffixes):
+                    return _coords(*CITY_GAZETTEER[name])
+                return None
+            # Strip one trailing region qualifier ("ca", "usa", "united states") and retry
+            if len(tokens) >= 2 and ' '.join(tokens[-2:]) in _REGION_SUFFIXES:
+                suffixes.append(' '.join(tokens[-2:]))
+                tokens = tokens[:-2]
+            elif tokens[-1] in _REGION_SUFFIXES:
+                suffixes.append(tokens[-1])
+                tokens = tokens[:-1]
+            else:
+                return None
+        return None
+
+    def _find_city_in(self, key: str) -> Optional[Dict]:
+        """Find the longest gazetteer city name appearing as a token run in the address"""
+        tokens = key.split()
+        for size in range(min(_MAX_NAME_TOKENS, len(tokens)), 0, -1):
+            for start in range(len(tokens) - size + 1):
+                name = ' '.join(tokens[start:start + size])
+                if name in CITY_GAZETTEER:
+                    return _coords(*CITY_GAZETTEER[name])
+        return None
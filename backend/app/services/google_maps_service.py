@@ -1,30 +1,68 @@
 # Google Maps integration for restaurant search, geocoding, and photo retrieval
+import time
 import googlemaps
+import httpx
+import requests
 from typing import Optional, Dict, List
 from app.config import settings
+from app.services.http_client import get_session, stream
+from app.utils.async_utils import run_blocking
+from app.utils.html_images import StreamingImageExtractor, charset_from_content_type, extract_image_from_chunks
+from app.utils.cache import create_cache, MISSING
+from app.utils.helpers import PHOTO_PROXY_PATH, normalize_text, normalize_url
+from app.utils.metrics import UPSTREAM_ERRORS
+from app.utils.single_flight import SingleFlight, ThreadSingleFlight
+from app.utils.tracing import start_span
+
+def photo_proxy_url(photo_reference: str) -> str:
+    """Path of a Places photo on the backend's /api/photos proxy, resolved by the frontend against its API base"""
+    return f"{PHOTO_PROXY_PATH}{photo_reference}"
 
 class GoogleMapsService:
     """Service for Google Maps API interactions"""
     
-    def __init__(self, api_key: Optional[str] = None):
+    def __init__(self, api_key: Optional[str] = None, session: Optional[requests.Session] = None):
         self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
+        # Pooled keep-alive session shared by the googlemaps client and website scraping
+        self.session = session or get_session()
         if self.api_key:
-            self.client = googlemaps.Client(key=self.api_key)
+            self.client = googlemaps.Client(key=self.api_key, requests_session=self.session,
+                                            base_url=settings.GOOGLE_MAPS_BASE_URL.rstrip('/'))
         else:
             self.client = None
             print("⚠️ Google Maps API key not configured - photo fetching will be limited")
+        self.place_cache = create_cache(
+            "places",
+            settings.PLACE_CACHE_TTL,
+            settings.PLACE_CACHE_MAX_ENTRIES,
+            backend=settings.PLACE_CACHE_BACKEND
+        )
+        # Concurrent identical lookups (threads and coroutines) share one upstream call
+        self.lookups = ThreadSingleFlight("maps")
+        self.async_lookups = SingleFlight("website_images")
+        self.website_image_cache = create_cache(
+            "website_images",
+            settings.WEBSITE_IMAGE_CACHE_TTL,
+            settings.WEBSITE_IMAGE_CACHE_MAX_ENTRIES,
+            backend=settings.WEBSITE_IMAGE_CACHE_BACKEND
+        )
     
     def geocode_location(self, location: str) -> Dict:
-        """Convert location string to coordinates"""
+        """Convert location string to coordinates (concurrent identical lookups share one call)"""
+        return self.lookups.do(("geocode", normalize_text(location)), self._geocode_location, location)
+    
+    def _geocode_location(self, location: str) -> Dict:
         if not self.client:
             return {'lat': 0, 'lng': 0}
         
         try:
-            geocode_result = self.client.geocode(location)
+            with start_span("maps.geocode", location=location):
+                geocode_result = self.client.geocode(location)
             if geocode_result:
                 location_data = geocode_result[0]['geometry']['location']
                 return {'lat': location_data['lat'], 'lng': location_data['lng']}
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="geocode")
             print(f"Error geocoding location: {e}")
         
         return {'lat': 0, 'lng': 0}
@@ -37,10 +75,12 @@ class GoogleMapsService:
         try:
             # Search for the place using text search
             query = f"{name} {location}" if not include_restaurant_keyword else f"{name} restaurant {location}"
-            places_result = self.client.places(
-                query=query,
-                type='restaurant'
-            )
+            with start_span("maps.places_search", query=query) as span:
+                places_result = self.client.places(
+                    query=query,
+                    type='restaurant'
+                )
+                span.set_attribute("results", len(places_result.get('results', [])) if places_result else 0)
             
             if places_result and places_result.get('results'):
                 # Try to find the best match by name similarity
@@ -69,23 +109,72 @@ class GoogleMapsService:
                     'types': best_match.get('types', [])
                 }
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="places")
             print(f"Error searching place: {e}")
             import traceback
             traceback.print_exc()
         
         return None
     
+    def resolve_place(self, name: str, location: str) -> Optional[Dict]:
+        """Resolve a restaurant to its cached place record; concurrent identical lookups share one search"""
+        key = ("place", f"{normalize_text(name)}|{normalize_text(location)}")
+        return self.lookups.do(key, self._resolve_place, name, location)
+    
+    def _resolve_place(self, name: str, location: str) -> Optional[Dict]:
+        """
+        Resolve a restaurant to its place record, using the persistent place cache.
+        
+        Tries a text search with the "restaurant" keyword, then without it. Misses
+        are cached too, for the shorter PLACE_CACHE_NEGATIVE_TTL.
+        """
+        if not self.client:
+            return None
+        
+        cache_key = f"{normalize_text(name)}|{normalize_text(location)}"
+        cached = self.place_cache.get(cache_key)
+        if cached is not MISSING:
+            return cached
+        
+        place_data = self.search_place_by_name(name, location)
+        if not place_data:
+            place_data = self.search_place_by_name(name, location, include_restaurant_keyword=False)
+        
+        if place_data:
+            photos = place_data.get('photos') or []
+            photo_reference = photos[0].get('photo_reference') if photos else None
+            record = {
+                'place_id': place_data.get('place_id'),
+                'name': place_data.get('name'),
+                'rating': place_data.get('rating'),
+                'geometry': place_data.get('geometry', {}),
+                'formatted_address': place_data.get('formatted_address'),
+                'photo_reference': photo_reference,
+                'photos': [{'photo_reference': photo_reference}] if photo_reference else [],
+                'price_level': place_data.get('price_level'),
+                'types': place_data.get('types', [])
+            }
+            self.place_cache.set(cache_key, record)
+            return record
+        
+        self.place_cache.set(cache_key, None, ttl=settings.PLACE_CACHE_NEGATIVE_TTL)
+        return None
+    
     def get_place_photos(self, place_id: str, max_photos: int = 1) -> List[str]:
-        """Get photo URLs for a place using place_id"""
+        """Get photo URLs for a place using place_id (concurrent identical lookups share one call)"""
+        return self.lookups.do(("photos", place_id, max_photos), self._get_place_photos, place_id, max_photos)
+    
+    def _get_place_photos(self, place_id: str, max_photos: int = 1) -> List[str]:
         if not self.client:
             return []
         
         try:
             # Get place details with photos field
-            place_details = self.client.place(
-                place_id=place_id,
-                fields=['photos', 'name']
-            )
+            with start_span("maps.place_details", place_id=place_id):
+                place_details = self.client.place(
+                    place_id=place_id,
+                    fields=['photos', 'name']
+                )
             
             photos = place_details.get('result', {}).get('photos', [])
             photo_urls = []
@@ -94,12 +183,13 @@ class GoogleMapsService:
                 # Get photo reference
                 photo_reference = photo.get('photo_reference')
                 if photo_reference:
-                    # Build photo URL - Google Places Photo API
-                    photo_url = f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={photo_reference}&key={self.api_key}"
+                    # Served through the backend photo proxy so the API key never reaches clients
+                    photo_url = photo_proxy_url(photo_reference)
                     photo_urls.append(photo_url)
             
             return photo_urls
         except Exception as e:
+            UPSTREAM_ERRORS.inc(upstream="places")
             print(f"Error getting place photos: {e}")
             import traceback
             traceback.print_exc()
@@ -115,7 +205,7 @@ class GoogleMapsService:
         if photos:
             photo_reference = photos[0].get('photo_reference')
             if photo_reference:
-                return f"https://maps.googleapis.com/maps/api/place/photo?maxwidth=400&photoreference={photo_reference}&key={self.api_key}"
+                return photo_proxy_url(photo_reference)
         
         return None
     
@@ -126,12 +216,8 @@ class GoogleMapsService:
             return None
         
         try:
-            # Try multiple search strategies to find the restaurant
-            place_data = self.search_place_by_name(restaurant_name, location)
-            
-            # If first search didn't work, try without "restaurant" keyword
-            if not place_data:
-                place_data = self.search_place_by_name(restaurant_name, location, include_restaurant_keyword=False)
+            # Resolve the restaurant (cached, tries with and without the "restaurant" keyword)
+            place_data = self.resolve_place(restaurant_name, location)
             
             if place_data:
                 photo_url = self.get_photo_from_place_data(place_data)
@@ -150,105 +236,234 @@ class GoogleMapsService:
         return None  # Return None if no real photo found - don't use generic fallbacks
     
     def get_image_from_website(self, website_url: str, restaurant_name: str = "") -> Optional[str]:
-        """Try to extract an image from a restaurant website"""
+        """Try to extract an image from a restaurant website; concurrent scrapes of one site are shared"""
         if not website_url:
             return None
+        return self.lookups.do(("website", normalize_url(website_url)), self._get_image_from_website, website_url)
+    
+    def _get_image_from_website(self, website_url: str) -> Optional[str]:
+        """Blocking scrape over the pooled session"""
+        cache_key = normalize_url(website_url)
+        entry = self.website_image_cache.get(cache_key)
+        if self._is_fresh(entry):
+            return entry['image']
         
-        try:
-            import requests
-            from bs4 import BeautifulSoup
-            from urllib.parse import urljoin, urlparse
+        website_url = self._normalize_website_url(website_url)
+        status, image, headers = None, None, {}
+        with start_span("website.scrape", url=website_url) as span:
+            try:
+                request_headers = self._validator_headers(entry)
+                if not settings.IMAGE_SCAN_STREAMING:
+                    response = self.session.get(website_url, headers=request_headers,
+                                                timeout=settings.IMAGE_WEBSITE_TIMEOUT, allow_redirects=True)
+                    status, headers = response.status_code, response.headers
+                    if status == 200:
+                        image = self._extract_image_from_html(response.content, website_url)
+                else:
+                    # Read the page incrementally and stop once the image is known or the byte cap is hit
+                    with self.session.get(website_url, headers=request_headers, timeout=settings.IMAGE_WEBSITE_TIMEOUT,
+                                          allow_redirects=True, stream=True) as response:
+                        status, headers = response.status_code, response.headers
+                        if status == 200:
+                            image = extract_image_from_chunks(
+                                response.iter_content(settings.IMAGE_SCAN_CHUNK_SIZE),
+                                response.url,
+                                charset_from_content_type(response.headers.get('content-type')),
+                                settings.IMAGE_SCAN_MAX_BYTES
+                            )
+            except requests.exceptions.Timeout:
+                print(f"⏱️  Timeout fetching image from website (took too long)")
+                span.set_attribute("error", "timeout")
+                UPSTREAM_ERRORS.inc(upstream="website")
+            except requests.exceptions.RequestException as e:
+                print(f"🌐 Request error fetching image from website: {type(e).__name__}")
+                span.set_attribute("error", type(e).__name__)
+                UPSTREAM_ERRORS.inc(upstream="website")
+            except Exception as e:
+                print(f"⚠️  Error fetching image from website: {type(e).__name__}")
+            span.set_attribute("http.status_code", status)
+            span.set_attribute("image_found", image is not None)
+        
+        return self._store_website_image(cache_key, entry, status, image, headers)
+    
+    async def get_image_from_website_async(self, website_url: str, restaurant_name: str = "") -> Optional[str]:
+        """Async variant of get_image_from_website over the shared HTTP client"""
+        if not website_url:
+            return None
+        key = normalize_url(website_url)
+        return await self.async_lookups.do(key, self._get_image_from_website_async, website_url)
+    
+    async def _get_image_from_website_async(self, website_url: str) -> Optional[str]:
+        cache_key = normalize_url(website_url)
+        # The cache may be SQLite (shared between workers) - keep its I/O off the event loop
+        entry = await run_blocking(self.website_image_cache.get, cache_key)
+        if self._is_fresh(entry):
+            return entry['image']
+        
+        website_url = self._normalize_website_url(website_url)
+        status, image, headers = None, None, {}
+        with start_span("website.scrape", url=website_url) as span:
+            try:
+                async with stream(website_url, headers=self._validator_headers(entry),
+                                  timeout=settings.IMAGE_WEBSITE_TIMEOUT) as response:
+                    status, headers = response.status_code, response.headers
+                    if status == 200 and not settings.IMAGE_SCAN_STREAMING:
+                        image = self._extract_image_from_html(await response.aread(), str(response.url))
+                    elif status == 200:
+                        # Read the page incrementally and stop once the image is known or the byte cap is hit
+                        extractor = StreamingImageExtractor(
+                            str(response.url),
+                            charset_from_content_type(response.headers.get('content-type')),
+                            settings.IMAGE_SCAN_MAX_BYTES
+                        )
+                        async for chunk in response.aiter_bytes(settings.IMAGE_SCAN_CHUNK_SIZE):
+                            if extractor.feed(chunk):
+                                break
+                        image = extractor.result()
+            except httpx.TimeoutException:
+                print(f"⏱️  Timeout fetching image from website (took too long)")
+                span.set_attribute("error", "timeout")
+                UPSTREAM_ERRORS.inc(upstream="website")
+            except httpx.HTTPError as e:
+                print(f"🌐 Request error fetching image from website: {type(e).__name__}")
+                span.set_attribute("error", type(e).__name__)
+                UPSTREAM_ERRORS.inc(upstream="website")
+            except Exception as e:
+                print(f"⚠️  Error fetching image from website: {type(e).__name__}")
+            span.set_attribute("http.status_code", status)
+            span.set_attribute("image_found", image is not None)
+        
+        return await run_blocking(self._store_website_image, cache_key, entry, status, image, headers)
+    
+    @staticmethod
+    def _is_fresh(entry) -> bool:
+        """Whether a cached website lookup can be used without contacting the site"""
+        if entry is MISSING:
+            return False
+        if not entry.get('image'):
+            return True  # negative entries simply expire after WEBSITE_IMAGE_NEGATIVE_TTL
+        return time.time() - entry.get('checked_at', 0) < settings.WEBSITE_IMAGE_FRESH_FOR
+    
+    @staticmethod
+    def _validator_headers(entry) -> Dict:
+        """Conditional request headers from a stale cached entry"""
+        headers = {}
+        if entry is not MISSING and entry.get('image'):
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+    
+    def _store_website_image(self, cache_key: str, entry, status: Optional[int], image: Optional[str], headers) -> Optional[str]:
+        """Record the outcome of a website lookup and return the image to use"""
+        now = time.time()
+        if status == 304 and entry is not MISSING:
+            # Page unchanged since the last scrape - keep the image, restart the freshness window
+            self.website_image_cache.set(cache_key, {**entry, 'checked_at': now})
+            return entry['image']
+        
+        if status == 200 and image:
+            self.website_image_cache.set(cache_key, {
+                'image': image,
+                'etag': headers.get('etag'),
+                'last_modified': headers.get('last-modified'),
+                'checked_at': now
+            })
+            return image
+        
+        if status != 200 and entry is not MISSING and entry.get('image'):
+            # Revalidation failed (timeout, 5xx) - serve the last known image
+            return entry['image']
+        
+        # Timeouts, errors and pages without a usable image are retried after the negative TTL
+        self.website_image_cache.set(cache_key, {'image': None, 'checked_at': now},
+                                     ttl=settings.WEBSITE_IMAGE_NEGATIVE_TTL)
+        return None
+    
+    @staticmethod
+    def _normalize_website_url(website_url: str) -> str:
+        # Ensure URL has protocol
+        if not website_url.startswith(('http://', 'https://')):
+            website_url = 'https://' + website_url
+        return website_url
+    
+    @staticmethod
+    def _extract_image_from_html(content: bytes, website_url: str) -> Optional[str]:
+        """Full-page parse (IMAGE_SCAN_STREAMING=false): og:image, twitter:image, then scored <img> tags"""
+        from bs4 import BeautifulSoup
+        from urllib.parse import urljoin
+        
+        soup = BeautifulSoup(content, 'html.parser')
+        
+        # Priority 1: Try to find Open Graph image first (most reliable)
+        og_image = soup.find('meta', property='og:image')
+        if og_image and og_image.get('content'):
+            img_url = og_image.get('content').strip()
+            if img_url:
+                # Make absolute URL if relative
+                if img_url.startswith('/') or not img_url.startswith('http'):
+                    img_url = urljoin(website_url, img_url)
+                # Verify it's a valid image URL
+                if any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']) or 'image' in img_url.lower():
+                    return img_url
+        
+        # Priority 2: Try Twitter Card image
+        twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
+        if twitter_image and twitter_image.get('content'):
+            img_url = twitter_image.get('content').strip()
+            if img_url:
+                if img_url.startswith('/') or not img_url.startswith('http'):
+                    img_url = urljoin(website_url, img_url)
+                if any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']):
+                    return img_url
+        
+        # Priority 3: Find images in the page, prioritizing large/hero images
+        images = soup.find_all('img', src=True, limit=10)  # Limit to first 10 images
+        candidate_images = []
+        
+        for img in images:
+            src = img.get('src', '').strip()
+            if not src:
+                continue
             
-            # Ensure URL has protocol
-            if not website_url.startswith(('http://', 'https://')):
-                website_url = 'https://' + website_url
+            # Skip small icons/logos
+            if any(skip in src.lower() for skip in ['icon', 'logo', 'button', 'avatar', 'badge', 'favicon', 'sprite']):
+                continue
             
-            headers = {
-                'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/91.0.4472.124 Safari/537.36',
-                'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
-                'Accept-Language': 'en-US,en;q=0.5',
-            }
+            # Make absolute URL if relative
+            if src.startswith('/') or not src.startswith('http'):
+                src = urljoin(website_url, src)
             
-            # Use shorter timeout to avoid hanging
-            response = requests.get(website_url, headers=headers, timeout=5, allow_redirects=True)
-            if response.status_code == 200:
-                soup = BeautifulSoup(response.content, 'html.parser')
-                
-                # Priority 1: Try to find Open Graph image first (most reliable)
-                og_image = soup.find('meta', property='og:image')
-                if og_image and og_image.get('content'):
-                    img_url = og_image.get('content').strip()
-                    if img_url:
-                        # Make absolute URL if relative
-                        if img_url.startswith('/') or not img_url.startswith('http'):
-                            img_url = urljoin(website_url, img_url)
-                        # Verify it's a valid image URL
-                        if any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']) or 'image' in img_url.lower():
-                            return img_url
-                
-                # Priority 2: Try Twitter Card image
-                twitter_image = soup.find('meta', attrs={'name': 'twitter:image'})
-                if twitter_image and twitter_image.get('content'):
-                    img_url = twitter_image.get('content').strip()
-                    if img_url:
-                        if img_url.startswith('/') or not img_url.startswith('http'):
-                            img_url = urljoin(website_url, img_url)
-                        if any(ext in img_url.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp', '.gif']):
-                            return img_url
-                
-                # Priority 3: Find images in the page, prioritizing large/hero images
-                images = soup.find_all('img', src=True, limit=10)  # Limit to first 10 images
-                candidate_images = []
-                
-                for img in images:
-                    src = img.get('src', '').strip()
-                    if not src:
-                        continue
-                    
-                    # Skip small icons/logos
-                    if any(skip in src.lower() for skip in ['icon', 'logo', 'button', 'avatar', 'badge', 'favicon', 'sprite']):
-                        continue
-                    
-                    # Make absolute URL if relative
-                    if src.startswith('/') or not src.startswith('http'):
-                        src = urljoin(website_url, src)
-                    
-                    # Check image attributes for size hints
-                    width = img.get('width', '')
-                    height = img.get('height', '')
-                    class_name = img.get('class', [])
-                    alt_text = img.get('alt', '').lower()
-                    
-                    # Score images based on likelihood of being a restaurant photo
-                    score = 0
-                    if any(keyword in src.lower() for keyword in ['hero', 'banner', 'main', 'gallery', 'food', 'restaurant', 'interior', 'exterior', 'dish', 'meal']):
-                        score += 10
-                    if any(keyword in alt_text for keyword in ['food', 'restaurant', 'dish', 'meal', 'cuisine']):
-                        score += 5
-                    if any(keyword in ' '.join(class_name).lower() for keyword in ['hero', 'banner', 'main', 'featured', 'gallery']):
-                        score += 5
-                    if width and height:
-                        try:
-                            w, h = int(width), int(height)
-                            if w > 300 and h > 200:  # Reasonable size
-                                score += 3
-                        except:
-                            pass
-                    
-                    if score > 0 or any(ext in src.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']):
-                        candidate_images.append((score, src))
-                
-                # Return the highest scoring image
-                if candidate_images:
-                    candidate_images.sort(key=lambda x: x[0], reverse=True)
-                    return candidate_images[0][1]
-                
-        except requests.exceptions.Timeout:
-            print(f"⏱️  Timeout fetching image from website (took too long)")
-        except requests.exceptions.RequestException as e:
-            print(f"🌐 Request error fetching image from website: {type(e).__name__}")
-        except Exception as e:
-            print(f"⚠️  Error fetching image from website: {type(e).__name__}")
+            # Check image attributes for size hints
+            width = img.get('width', '')
+            height = img.get('height', '')
+            class_name = img.get('class', [])
+            alt_text = img.get('alt', '').lower()
+            
+            # Score images based on likelihood of being a restaurant photo
+            score = 0
+            if any(keyword in src.lower() for keyword in ['hero', 'banner', 'main', 'gallery', 'food', 'restaurant', 'interior', 'exterior', 'dish', 'meal']):
+                score += 10
+            if any(keyword in alt_text for keyword in ['food', 'restaurant', 'dish', 'meal', 'cuisine']):
+                score += 5
+            if any(keyword in ' '.join(class_name).lower() for keyword in ['hero', 'banner', 'main', 'featured', 'gallery']):
+                score += 5
+            if width and height:
+                try:
+                    w, h = int(width), int(height)
+                    if w > 300 and h > 200:  # Reasonable size
+                        score += 3
+                except:
+                    pass
+            
+            if score > 0 or any(ext in src.lower() for ext in ['.jpg', '.jpeg', '.png', '.webp']):
+                candidate_images.append((score, src))
+        
+        # Return the highest scoring image
+        if candidate_images:
+            candidate_images.sort(key=lambda x: x[0], reverse=True)
+            return candidate_images[0][1]
         
         return None
     
@@ -263,3 +478,14 @@ class GoogleMapsService:
         food_image_ids = [1015, 1018, 1025, 1035, 1041, 1043, 1047, 1050, 1055, 1060, 1069, 1074]
         image_id = food_image_ids[int(seed, 16) % len(food_image_ids)]
         return f"https://picsum.photos/seed/{seed}/400/300"
+
+
+_shared_service: Optional[GoogleMapsService] = None
+
+
+def get_google_maps_service() -> GoogleMapsService:
+    """Return the application-wide GoogleMapsService (one googlemaps client and place cache)"""
+    global _shared_service
+    if _shared_service is None:
+        _shared_service = GoogleMapsService()
+    return _shared_service
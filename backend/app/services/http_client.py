@@ -0,0 +1,157 @@
+# Application-wide pooled HTTP clients for scraping, photo fetching and Google Maps
+import asyncio
+import importlib.util
+from contextlib import asynccontextmanager
+from typing import Dict, Optional, Set
+from urllib.parse import urlsplit
+import httpx
+import requests
+from requests.adapters import HTTPAdapter
+from app.config import settings
+
+# HTTP/2 needs the optional h2 package (pip install "httpx[http2]")
+HTTP2_AVAILABLE = importlib.util.find_spec("h2") is not None
+
+DEFAULT_HEADERS = {
+    'User-Agent': settings.HTTP_USER_AGENT,
+    'Accept': 'text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8',
+    'Accept-Language': 'en-US,en;q=0.5',
+}
+
+_async_client: Optional[httpx.AsyncClient] = None
+_async_client_loop: Optional[asyncio.AbstractEventLoop] = None
+_host_slots: Dict[str, asyncio.Semaphore] = {}
+_session: Optional[requests.Session] = None
+_transport: Optional[httpx.AsyncBaseTransport] = None
+_closing: Set[asyncio.Task] = set()
+
+
+def _timeout() -> httpx.Timeout:
+    return httpx.Timeout(settings.HTTP_TIMEOUT, connect=settings.HTTP_CONNECT_TIMEOUT)
+
+
+def get_async_client() -> httpx.AsyncClient:
+    """
+    Return the shared keep-alive AsyncClient for the running event loop.
+
+    Scripts that call the sync wrappers run a fresh event loop each time, and a
+    client cannot outlive its loop, so a new client is created when the loop changes.
+    """
+    global _async_client, _async_client_loop
+    loop = asyncio.get_running_loop()
+    if _async_client is None or _async_client.is_closed or _async_client_loop is not loop:
+        _retire_async_client()
+        _async_client = httpx.AsyncClient(
+            headers=DEFAULT_HEADERS,
+            timeout=_timeout(),
+            limits=httpx.Limits(
+                max_connections=settings.HTTP_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.HTTP_MAX_KEEPALIVE,
+                keepalive_expiry=settings.HTTP_KEEPALIVE_EXPIRY
+            ),
+            http2=HTTP2_AVAILABLE,
+            follow_redirects=True,
+            transport=_transport
+        )
+        _async_client_loop = loop
+        _host_slots.clear()
+    return _async_client
+
+
+def set_async_transport(transport: Optional[httpx.AsyncBaseTransport]) -> None:
+    """Route the shared AsyncClient through a custom transport (e.g. httpx.MockTransport for offline benchmarks)"""
+    global _transport
+    _transport = transport
+    _retire_async_client()  # rebuilt with the new transport on next use
+
+
+def _retire_async_client() -> None:
+    """Drop the shared AsyncClient, closing its pooled connections on the loop that owns them"""
+    global _async_client, _async_client_loop
+    client, owner = _async_client, _async_client_loop
+    _async_client = _async_client_loop = None
+    _host_slots.clear()
+    if client is None or client.is_closed or owner is None or owner.is_closed():
+        # A closed loop has already torn down its sockets; nothing left to await
+        return
+    try:
+        current = asyncio.get_running_loop()
+    except RuntimeError:
+        current = None
+    if owner is current:
+        task = owner.create_task(client.aclose())
+        _closing.add(task)
+        task.add_done_callback(_closing.discard)
+    elif owner.is_running():
+        asyncio.run_coroutine_threadsafe(client.aclose(), owner)
+
+
+@asynccontextmanager
+async def host_slot(url: str):
+    """Hold one of the HTTP_MAX_CONNECTIONS_PER_HOST slots for the URL's host"""
+    host = urlsplit(url).netloc.lower()
+    semaphore = _host_slots.get(host)
+    if semaphore is None:
+        semaphore = _host_slots[host] = asyncio.Semaphore(settings.HTTP_MAX_CONNECTIONS_PER_HOST)
+    async with semaphore:
+        yield
+
+
+async def fetch(url: str, **kwargs) -> httpx.Response:
+    """GET a URL through the shared client, respecting the per-host connection limit"""
+    client = get_async_client()
+    async with host_slot(url):
+        return await client.get(url, **kwargs)
+
+
+@asynccontextmanager
+async def stream(url: str, **kwargs):
+    """Stream a GET response through the shared client; leaving early drops the rest of the body"""
+    client = get_async_client()
+    async with host_slot(url):
+        async with client.stream('GET', url, **kwargs) as response:
+            yield response
+
+
+def get_session() -> requests.Session:
+    """Return the shared pooled requests.Session used by blocking SDKs (googlemaps)"""
+    global _session
+    if _session is None:
+        session = requests.Session()
+        # pool_connections is how many per-host pools are kept, pool_maxsize the
+        # connections in each; pool_block makes extra threads wait for a free
+        # connection instead of opening throwaway ones past the per-host cap
+        adapter = HTTPAdapter(
+            pool_connections=max(1, settings.HTTP_MAX_CONNECTIONS // settings.HTTP_MAX_CONNECTIONS_PER_HOST),
+            pool_maxsize=settings.HTTP_MAX_CONNECTIONS_PER_HOST,
+            pool_block=True
+        )
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers.update(DEFAULT_HEADERS)
+        _session = session
+    return _session
+
+
+async def close_async_client() -> None:
+    """Close the shared AsyncClient if it belongs to the running loop (end of a run_sync call)"""
+    global _async_client, _async_client_loop
+    if _async_client is not None and _async_client_loop is asyncio.get_running_loop():
+        client, _async_client, _async_client_loop = _async_client, None, None
+        _host_slots.clear()
+        if not client.is_closed:
+            await client.aclose()
+
+
+async def close_http_clients() -> None:
+    """Close the shared clients (application shutdown)"""
+    global _async_client, _async_client_loop, _session
+    if _async_client is not None and not _async_client.is_closed:
+        await _async_client.aclose()
+    _async_client = _async_client_loop = None
+    _host_slots.clear()
+    if _closing:
+        await asyncio.gather(*_closing, return_exceptions=True)
+    if _session is not None:
+        _session.close()
+        _session = None
@@ -0,0 +1,123 @@
+# Concurrent image enrichment for restaurant search results
+import asyncio
+import time
+from typing import AsyncIterator, List, Dict, Optional
+from app.config import settings
+from app.services.google_maps_service import GoogleMapsService, get_google_maps_service
+from app.utils.async_utils import run_blocking
+from app.utils.helpers import is_real_image_url
+from app.utils.metrics import IMAGE_SOURCE_LATENCY
+from app.utils.tracing import start_span
+
+class ImageEnrichmentService:
+    """Fills in missing restaurant images by fanning out over all restaurants at once"""
+
+    def __init__(self, google_maps: Optional[GoogleMapsService] = None):
+        self.google_maps = google_maps or get_google_maps_service()
+
+    async def enrich(self, restaurants: List[Dict], location: str) -> List[Dict]:
+        """
+        Find real images for restaurants that lack one.
+
+        Lookups run concurrently (bounded by IMAGE_ENRICHMENT_CONCURRENCY) and each
+        source has its own timeout. Restaurants still pending when
+        IMAGE_ENRICHMENT_DEADLINE expires are returned with image=None.
+        """
+        async for _ in self.enrich_iter(restaurants, location):
+            pass
+        return restaurants
+
+    async def enrich_iter(self, restaurants: List[Dict], location: str) -> AsyncIterator[Dict]:
+        """Like enrich(), but yield each restaurant as soon as its image is found"""
+        pending = []
+        for restaurant in restaurants:
+            if is_real_image_url(restaurant.get('image')):
+                restaurant['image'] = restaurant['image'].strip()
+            else:
+                restaurant['image'] = None
+                pending.append(restaurant)
+
+        if not pending:
+            return
+
+        print(f"📸 Image Enrichment: Looking up images for {len(pending)} restaurants")
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + settings.IMAGE_ENRICHMENT_DEADLINE
+        semaphore = asyncio.Semaphore(settings.IMAGE_ENRICHMENT_CONCURRENCY)
+        tasks = {
+            asyncio.create_task(self._enrich_one(restaurant, location, semaphore)): restaurant
+            for restaurant in pending
+        }
+        try:
+            while tasks:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait(tasks, timeout=remaining, return_when=asyncio.FIRST_COMPLETED)
+                if not done:
+                    break
+                for task in done:
+                    restaurant = tasks.pop(task)
+                    if restaurant.get('image'):
+                        yield restaurant
+        finally:
+            for task in tasks:
+                task.cancel()
+            found = sum(1 for restaurant in pending if restaurant.get('image'))
+            print(f"✓ Image Enrichment: Found {found}/{len(pending)} images ({len(tasks)} timed out)")
+
+    async def _enrich_one(self, restaurant: Dict, location: str, semaphore: asyncio.Semaphore) -> None:
+        """Look up an image for a single restaurant and store it in place"""
+        with start_span("image.enrich", restaurant=restaurant.get('name', '')) as span:
+            async with semaphore:
+                image = await self.find_image(restaurant, location)
+            span.set_attribute("image_found", bool(image))
+        if image:
+            restaurant['image'] = image
+
+    async def find_image(self, restaurant: Dict, location: str) -> Optional[str]:
+        """Try the restaurant website first, then Google Maps, each with its own timeout"""
+        name = restaurant.get('name', '')
+        website = restaurant.get('website') or restaurant.get('website_url')
+
+        if website:
+            image = await self._try_source(
+                "website",
+                self.google_maps.get_image_from_website_async(website, name),
+                settings.IMAGE_WEBSITE_TIMEOUT
+            )
+            if is_real_image_url(image):
+                return image
+
+        image = await self._try_source(
+            "google_maps",
+            run_blocking(self.google_maps.get_restaurant_photo, name, location),
+            settings.IMAGE_PLACES_TIMEOUT
+        )
+        if is_real_image_url(image):
+            return image
+
+        print(f"  ⚠️ No real restaurant image found for {name}")
+        return None
+
+    async def _try_source(self, source: str, lookup, timeout: float) -> Optional[str]:
+        """Await a single image source, treating timeouts and errors as a miss"""
+        started = time.perf_counter()
+        outcome = "miss"
+        with start_span("image.source", source=source) as span:
+            try:
+                image = await asyncio.wait_for(lookup, timeout=timeout)
+                if image:
+                    outcome = "hit"
+                return image
+            except asyncio.TimeoutError:
+                outcome = "timeout"
+                print(f"  ⏱️ Image source {source} timed out after {timeout}s")
+            except Exception as e:
+                outcome = "error"
+                span.set_error(e)
+                print(f"  ✗ Image source {source} failed: {e}")
+            finally:
+                IMAGE_SOURCE_LATENCY.observe(time.perf_counter() - started, source=source, outcome=outcome)
+                span.set_attribute("outcome", outcome)
+        return None
@@ -0,0 +1,119 @@
+# Google Places photo proxy backed by a content-addressed on-disk thumbnail cache
+import hashlib
+import io
+import os
+import tempfile
+from typing import Dict, Optional, Tuple
+from app.config import settings
+from app.services.http_client import fetch
+from app.utils.async_utils import run_blocking
+from app.utils.cache import create_cache, MISSING
+from app.utils.metrics import UPSTREAM_ERRORS
+from app.utils.single_flight import SingleFlight
+
+try:
+    from PIL import Image
+except ImportError:  # minimal installs - photos are stored as fetched (already sized by maxwidth)
+    Image = None
+
+PLACES_PHOTO_PATH = "/maps/api/place/photo"
+THUMBNAIL_CONTENT_TYPE = "image/jpeg"
+EXTENSIONS = {
+    "image/jpeg": "jpg",
+    "image/png": "png",
+    "image/gif": "gif",
+    "image/webp": "webp",
+}
+
+
+class PhotoService:
+    """
+    Fetches each Places photo once, stores a thumbnail on disk and serves it from there.
+
+    Files are named by the SHA-256 of their bytes, which doubles as the ETag; a
+    persistent index maps photo references to those digests and the file's
+    content type. Concurrent requests for the same reference share a single
+    upstream fetch.
+    """
+
+    def __init__(self, api_key: Optional[str] = None, cache_dir: Optional[str] = None):
+        self.api_key = api_key or settings.GOOGLE_MAPS_API_KEY
+        self.cache_dir = cache_dir or settings.PHOTO_CACHE_DIR
+        self.index = create_cache(
+            "photos",
+            settings.PHOTO_CACHE_TTL,
+            settings.PHOTO_CACHE_MAX_ENTRIES,
+            backend=settings.PHOTO_CACHE_BACKEND
+        )
+        self.fetches = SingleFlight("photos")
+
+    def path_for(self, digest: str, content_type: str = THUMBNAIL_CONTENT_TYPE) -> str:
+        extension = EXTENSIONS.get(content_type, "img")
+        return os.path.join(self.cache_dir, digest[:2], f"{digest}.{extension}")
+
+    async def get_photo(self, photo_reference: str) -> Optional[Tuple[str, str, str]]:
+        """Return (file path, digest, content type) for a photo reference, fetching it on first use"""
+        entry = await run_blocking(self.index.get, photo_reference)
+        if entry is not MISSING:
+            # Older index entries hold just the digest of a JPEG thumbnail
+            if isinstance(entry, str):
+                entry = {"digest": entry, "content_type": THUMBNAIL_CONTENT_TYPE}
+            path = self.path_for(entry["digest"], entry["content_type"])
+            if os.path.exists(path):
+                return path, entry["digest"], entry["content_type"]
+
+        # Coalesce concurrent misses for the same reference into one fetch
+        return await self.fetches.do(photo_reference, self._fetch_and_store, photo_reference)
+
+    async def _fetch_and_store(self, photo_reference: str) -> Optional[Tuple[str, str, str]]:
+        if not self.api_key:
+            return None
+
+        response = await fetch(settings.GOOGLE_MAPS_BASE_URL.rstrip('/') + PLACES_PHOTO_PATH, params={
+            'maxwidth': settings.PHOTO_FETCH_MAX_WIDTH,
+            'photoreference': photo_reference,
+            'key': self.api_key
+        })
+        upstream_type = response.headers.get('content-type', '').split(';')[0].strip().lower()
+        if response.status_code != 200 or not upstream_type.startswith('image/'):
+            UPSTREAM_ERRORS.inc(upstream="places_photo")
+            print(f"⚠️ Places photo fetch failed with status {response.status_code}")
+            return None
+
+        entry = await run_blocking(self._store, response.content, upstream_type)
+        await run_blocking(self.index.set, photo_reference, entry)
+        path = self.path_for(entry["digest"], entry["content_type"])
+        print(f"📸 Cached Places photo {entry['digest'][:12]} ({os.path.getsize(path)} bytes)")
+        return path, entry["digest"], entry["content_type"]
+
+    def _store(self, content: bytes, content_type: str) -> Dict[str, str]:
+        """Write the thumbnail under its content digest (atomically) and return its index entry"""
+        thumbnail, content_type = make_thumbnail(content, settings.PHOTO_THUMBNAIL_WIDTH, content_type)
+        digest = hashlib.sha256(thumbnail).hexdigest()
+        path = self.path_for(digest, content_type)
+        if not os.path.exists(path):
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+            with os.fdopen(fd, 'wb') as tmp:
+                tmp.write(thumbnail)
+            os.replace(tmp_path, path)
+        return {"digest": digest, "content_type": content_type}
+
+
+def make_thumbnail(content: bytes, width: int, content_type: str) -> Tuple[bytes, str]:
+    """
+    Downscale an image to at most `width` pixels wide as JPEG and return it with
+    its content type; without Pillow the original bytes and type are kept.
+    """
+    if Image is None:
+        return content, content_type
+    try:
+        with Image.open(io.BytesIO(content)) as image:
+            if image.width > width:
+                image.thumbnail((width, width * 4))
+            output = io.BytesIO()
+            image.convert('RGB').save(output, format='JPEG', quality=82, optimize=True)
+            return output.getvalue(), THUMBNAIL_CONTENT_TYPE
+    except Exception as e:
+        print(f"⚠️ Could not build thumbnail, storing original: {type(e).__name__}")
+        return content, content_type
@@ -0,0 +1,249 @@
+# Indexed store of restaurants returned by searches, for detail lookups and listing
+import json
+import sqlite3
+import threading
+import time
+from collections import OrderedDict, deque
+from itertools import islice
+from typing import Dict, List, Optional, Tuple
+from app.config import settings
+from app.models.schemas import RestaurantResponse
+from app.utils.helpers import normalize_text, calculate_distance
+from app.utils.spatial_index import GridSpatialIndex
+
+# Searches remembered per filter combination for local radius answers
+MAX_COVERAGE_RECORDS = 500
+
+
+def sqlite_path_from_url(database_url: str) -> Optional[str]:
+    """Extract the file path from a sqlite:/// database URL"""
+    prefix = "sqlite:///"
+    if database_url and database_url.startswith(prefix):
+        return database_url[len(prefix):]
+    return None
+
+
+class RestaurantStore:
+    """
+    Restaurants written by each search, indexed by id and by search location.
+
+    An in-memory index serves lookups in O(1); when RESTAURANT_STORE_BACKEND is
+    "sqlite" every write also goes to settings.DATABASE_URL, which is used for
+    listing and for ids not in this process's memory.
+
+    A grid spatial index over the same restaurants answers radius and nearest-k
+    queries, and remembers which areas earlier searches covered so repeat
+    searches inside them can skip the AI pipeline.
+    """
+
+    def __init__(self, backend: Optional[str] = None, database_url: Optional[str] = None):
+        self.max_entries = settings.RESTAURANT_STORE_MAX_ENTRIES
+        self._by_id: "OrderedDict[str, Dict]" = OrderedDict()
+        self._by_location: Dict[str, "OrderedDict[str, None]"] = {}
+        self._locations_for: Dict[str, set] = {}
+        self.spatial_index = GridSpatialIndex(settings.SPATIAL_INDEX_CELL_DEG)
+        self._coverage: Dict[str, deque] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+
+        backend = (backend or settings.RESTAURANT_STORE_BACKEND).lower()
+        if backend == "sqlite":
+            path = sqlite_path_from_url(database_url or settings.DATABASE_URL)
+            if path:
+                self._open_database(path)
+            else:
+                print("⚠️ Unsupported DATABASE_URL for restaurant store - using memory only")
+
+    def _open_database(self, path: str) -> None:
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS restaurants (
+                id TEXT PRIMARY KEY,
+                data TEXT NOT NULL,
+                updated_at REAL NOT NULL
+            )"""
+        )
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS restaurant_locations (
+                location_key TEXT NOT NULL,
+                restaurant_id TEXT NOT NULL,
+                updated_at REAL NOT NULL,
+                rank INTEGER NOT NULL,
+                PRIMARY KEY (location_key, restaurant_id)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_restaurant_locations_recent "
+            "ON restaurant_locations (location_key, updated_at DESC, rank)"
+        )
+        self._warm_from_database()
+
+    def _warm_from_database(self) -> None:
+        """Load the most recent stored restaurants into the memory and spatial indexes"""
+        rows = self._conn.execute(
+            "SELECT id, data FROM restaurants ORDER BY updated_at ASC LIMIT ? OFFSET "
+            "MAX(0, (SELECT COUNT(*) FROM restaurants) - ?)",
+            (self.max_entries, self.max_entries)
+        ).fetchall()
+        for restaurant_id, data in rows:
+            record = json.loads(data)
+            self._by_id[restaurant_id] = record
+            self._index_point(restaurant_id, record)
+        if rows:
+            print(f"✓ Restaurant store: loaded {len(rows)} restaurants from database")
+
+    def _index_point(self, restaurant_id: str, data: Dict) -> None:
+        lat, lng = data.get('latitude'), data.get('longitude')
+        if lat or lng:
+            self.spatial_index.insert(restaurant_id, lat, lng)
+
+    def add_many(self, restaurants: List[RestaurantResponse], location: str) -> None:
+        """Store the results of one search, keeping their ranking for listing"""
+        if not restaurants:
+            return
+        location_key = normalize_text(location)
+        now = time.time()
+        records = [(restaurant.id, restaurant.model_dump()) for restaurant in restaurants]
+
+        with self._lock:
+            index = self._by_location.setdefault(location_key, OrderedDict())
+            # Insert in reverse rank order so the best match is the most recent entry
+            for restaurant_id, data in reversed(records):
+                self._by_id[restaurant_id] = data
+                self._by_id.move_to_end(restaurant_id)
+                index[restaurant_id] = None
+                index.move_to_end(restaurant_id)
+                self._locations_for.setdefault(restaurant_id, set()).add(location_key)
+                self._index_point(restaurant_id, data)
+            self._evict()
+
+            if self._conn is not None:
+                self._conn.execute("BEGIN")
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO restaurants (id, data, updated_at) VALUES (?, ?, ?)",
+                    [(restaurant_id, json.dumps(data), now) for restaurant_id, data in records]
+                )
+                self._conn.executemany(
+                    "INSERT OR REPLACE INTO restaurant_locations "
+                    "(location_key, restaurant_id, updated_at, rank) VALUES (?, ?, ?, ?)",
+                    [(location_key, restaurant_id, now, rank)
+                     for rank, (restaurant_id, _) in enumerate(records)]
+                )
+                self._conn.execute("COMMIT")
+
+    def _evict(self) -> None:
+        """Drop the least recently stored restaurants beyond max_entries (memory only)"""
+        while len(self._by_id) > self.max_entries:
+            restaurant_id, _ = self._by_id.popitem(last=False)
+            self.spatial_index.remove(restaurant_id)
+            for location_key in self._locations_for.pop(restaurant_id, ()):
+                index = self._by_location.get(location_key)
+                if index is not None:
+                    index.pop(restaurant_id, None)
+                    if not index:
+                        del self._by_location[location_key]
+
+    def get(self, restaurant_id: str) -> Optional[RestaurantResponse]:
+        """Look up a restaurant by id"""
+        data = self._by_id.get(restaurant_id)
+        if data is None and self._conn is not None:
+            with self._lock:
+                row = self._conn.execute(
+                    "SELECT data FROM restaurants WHERE id = ?", (restaurant_id,)
+                ).fetchone()
+            data = json.loads(row[0]) if row else None
+        return RestaurantResponse(**data) if data else None
+
+    def list(self, location: Optional[str] = None, skip: int = 0, limit: int = 10) -> Tuple[int, List[RestaurantResponse]]:
+        """Page through stored restaurants, most recently searched first"""
+        if self._conn is not None:
+            rows, total = self._list_from_database(location, skip, limit)
+            return total, [RestaurantResponse(**json.loads(row)) for row in rows]
+
+        with self._lock:
+            if location:
+                index = self._by_location.get(normalize_text(location), OrderedDict())
+                total = len(index)
+                ids = list(islice(reversed(index), skip, skip + limit))
+                items = [self._by_id[restaurant_id] for restaurant_id in ids]
+            else:
+                total = len(self._by_id)
+                items = list(islice(reversed(self._by_id.values()), skip, skip + limit))
+        return total, [RestaurantResponse(**data) for data in items]
+
+    def _list_from_database(self, location: Optional[str], skip: int, limit: int) -> Tuple[List[str], int]:
+        with self._lock:
+            if location:
+                location_key = normalize_text(location)
+                total = self._conn.execute(
+                    "SELECT COUNT(*) FROM restaurant_locations WHERE location_key = ?",
+                    (location_key,)
+                ).fetchone()[0]
+                rows = self._conn.execute(
+                    """SELECT r.data FROM restaurant_locations l
+                       JOIN restaurants r ON r.id = l.restaurant_id
+                       WHERE l.location_key = ?
+                       ORDER BY l.updated_at DESC, l.rank ASC
+                       LIMIT ? OFFSET ?""",
+                    (location_key, limit, skip)
+                ).fetchall()
+            else:
+                total = self._conn.execute("SELECT COUNT(*) FROM restaurants").fetchone()[0]
+                rows = self._conn.execute(
+                    "SELECT data FROM restaurants ORDER BY updated_at DESC LIMIT ? OFFSET ?",
+                    (limit, skip)
+                ).fetchall()
+        return [row[0] for row in rows], total
+
+    def nearby(self, lat: float, lng: float, radius_m: float, limit: Optional[int] = None) -> List[Tuple[RestaurantResponse, float]]:
+        """Restaurants within radius_m of a point as (restaurant, distance_m), nearest first"""
+        with self._lock:
+            hits = self.spatial_index.query_radius(lat, lng, radius_m)
+            if limit is not None:
+                hits = hits[:limit]
+            records = [(self._by_id[key], distance) for key, distance in hits if key in self._by_id]
+        return [(RestaurantResponse(**data), distance) for data, distance in records]
+
+    def nearest(self, lat: float, lng: float, k: int) -> List[Tuple[RestaurantResponse, float]]:
+        """The k stored restaurants nearest to a point as (restaurant, distance_m)"""
+        with self._lock:
+            hits = self.spatial_index.nearest(lat, lng, k)
+            records = [(self._by_id[key], distance) for key, distance in hits if key in self._by_id]
+        return [(RestaurantResponse(**data), distance) for data, distance in records]
+
+    def record_coverage(self, filters_key: str, lat: float, lng: float, radius_m: float, restaurant_ids: List[str]) -> None:
+        """Remember that a search with these filters covered the circle around (lat, lng)"""
+        with self._lock:
+            records = self._coverage.setdefault(filters_key, deque(maxlen=MAX_COVERAGE_RECORDS))
+            records.append((time.time(), lat, lng, radius_m, frozenset(restaurant_ids)))
+
+    def covered_search(self, filters_key: str, lat: float, lng: float, radius_m: float) -> Optional[List[RestaurantResponse]]:
+        """
+        Answer a search locally when an earlier search with the same filters covered
+        the whole requested circle. Returns None when the area isn't covered or too
+        few known restaurants fall inside it.
+
+        Coverage expires with the search cache, so the shortcut never serves results
+        older than a cached search would.
+        """
+        oldest = time.time() - settings.SEARCH_CACHE_TTL
+        matching_ids = set()
+        with self._lock:
+            records = self._coverage.get(filters_key)
+            # Records are appended in time order, so expired ones sit at the left
+            while records and records[0][0] < oldest:
+                records.popleft()
+            for _, prev_lat, prev_lng, prev_radius, ids in records or ():
+                if calculate_distance(lat, lng, prev_lat, prev_lng) * 1000 + radius_m <= prev_radius:
+                    matching_ids |= ids
+        if not matching_ids:
+            return None
+
+        hits = [(restaurant, distance) for restaurant, distance in self.nearby(lat, lng, radius_m)
+                if restaurant.id in matching_ids]
+        if len(hits) < settings.SPATIAL_SHORTCUT_MIN_RESULTS:
+            return None
+        hits.sort(key=lambda hit: (-(hit[0].matchScore or 0), hit[1]))
+        return [restaurant for restaurant, _ in hits]
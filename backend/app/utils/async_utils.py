@@ -0,0 +1,43 @@
+# Helpers for running blocking work without stalling the event loop
+import asyncio
+import contextvars
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Awaitable, Callable, Optional
+from app.config import settings
+
+_executor: Optional[ThreadPoolExecutor] = None
+
+
+def get_executor() -> ThreadPoolExecutor:
+    """Return the shared, bounded executor used for blocking I/O"""
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(
+            max_workers=settings.BLOCKING_IO_WORKERS,
+            thread_name_prefix="blocking-io"
+        )
+    return _executor
+
+
+async def run_blocking(func: Callable[..., Any], *args, **kwargs) -> Any:
+    """Run a blocking callable in the bounded executor and await its result"""
+    loop = asyncio.get_running_loop()
+    # Carry context variables (e.g. the current trace span) into the worker thread
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(get_executor(), functools.partial(context.run, func, *args, **kwargs))
+
+
+def run_sync(coro: Awaitable[Any]) -> Any:
+    """Run a coroutine to completion from synchronous code (scripts, CLI tools)"""
+    return asyncio.run(_closing_http_clients(coro))
+
+
+async def _closing_http_clients(coro: Awaitable[Any]) -> Any:
+    # The shared AsyncClient is bound to this short-lived loop; close its
+    # connections before the loop goes away rather than leaking them
+    from app.services.http_client import close_async_client
+    try:
+        return await coro
+    finally:
+        await close_async_client()
@@ -0,0 +1,233 @@
+# TTL + LRU caches with pluggable in-process and SQLite backends
+import json
+import os
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+from app.config import settings
+from app.utils.metrics import CACHE_REQUESTS
+
+# Sentinel returned on a cache miss, so that None can be cached as a value
+MISSING = object()
+
+
+class MemoryCacheBackend:
+    """In-process LRU store; entries are lost when the process exits"""
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[str, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return MISSING
+            expires_at, value = entry
+            if expires_at < time.time():
+                del self._entries[key]
+                return MISSING
+            self._entries.move_to_end(key)
+            return value
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.time()
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.time() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteCacheBackend:
+    """SQLite-backed LRU store that survives restarts; values must be JSON-serializable"""
+
+    def __init__(self, path: str, namespace: str, max_entries: int):
+        self.path = path
+        self.namespace = namespace
+        self.max_entries = max_entries
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA busy_timeout=5000")
+        self._conn.execute(
+            """CREATE TABLE IF NOT EXISTS cache_entries (
+                namespace TEXT NOT NULL,
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                expires_at REAL NOT NULL,
+                accessed_at REAL NOT NULL,
+                PRIMARY KEY (namespace, key)
+            )"""
+        )
+        self._conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_cache_lru ON cache_entries (namespace, accessed_at)"
+        )
+
+    def get(self, key: str) -> Any:
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            ).fetchone()
+            if row is None:
+                return MISSING
+            value, expires_at = row
+            if expires_at < now:
+                self._conn.execute(
+                    "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                    (self.namespace, key)
+                )
+                return MISSING
+            self._conn.execute(
+                "UPDATE cache_entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+                (now, self.namespace, key)
+            )
+        return json.loads(value)
+
+    def contains(self, key: str) -> bool:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT 1 FROM cache_entries WHERE namespace = ? AND key = ? AND expires_at >= ?",
+                (self.namespace, key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set(self, key: str, value: Any, ttl: float) -> None:
+        now = time.time()
+        payload = json.dumps(value, separators=(',', ':'))
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, value, expires_at, accessed_at) "
+                "VALUES (?, ?, ?, ?, ?)",
+                (self.namespace, key, payload, now + ttl, now)
+            )
+            self._evict()
+
+    def _evict(self) -> None:
+        """Drop expired entries, then the least recently used ones beyond max_entries"""
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE namespace = ? AND expires_at < ?",
+            (self.namespace, time.time())
+        )
+        self._conn.execute(
+            """DELETE FROM cache_entries WHERE namespace = ? AND key IN (
+                SELECT key FROM cache_entries WHERE namespace = ?
+                ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+            )""",
+            (self.namespace, self.namespace, self.max_entries)
+        )
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE namespace = ? AND key = ?",
+                (self.namespace, key)
+            )
+
+    def clear(self) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ?", (self.namespace,))
+
+    def __len__(self) -> int:
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT COUNT(*) FROM cache_entries WHERE namespace = ?", (self.namespace,)
+            ).fetchone()
+        return row[0]
+
+
+class TTLCache:
+    """Cache front-end with a default TTL and hit/miss counters"""
+
+    def __init__(self, namespace: str, backend, ttl: float):
+        self.namespace = namespace
+        self.backend = backend
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str, default: Any = MISSING) -> Any:
+        """Return the cached value, or default (MISSING unless given) on a miss"""
+        try:
+            value = self.backend.get(key)
+        except Exception as e:
+            print(f"⚠️ Cache '{self.namespace}' read failed: {e}")
+            value = MISSING
+        if value is MISSING:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache=self.namespace, result="miss")
+            return default
+        self.hits += 1
+        CACHE_REQUESTS.inc(cache=self.namespace, result="hit")
+        return value
+
+    def contains(self, key: str) -> bool:
+        """Whether a live entry exists, without counting a hit or miss or refreshing its LRU position"""
+        try:
+            return self.backend.contains(key)
+        except Exception as e:
+            print(f"⚠️ Cache '{self.namespace}' read failed: {e}")
+            return False
+
+    def set(self, key: str, value: Any, ttl: Optional[float] = None) -> None:
+        """Store a value; ttl overrides the cache default (e.g. for negative results)"""
+        try:
+            self.backend.set(key, value, self.ttl if ttl is None else ttl)
+        except Exception as e:
+            print(f"⚠️ Cache '{self.namespace}' write failed: {e}")
+
+    def delete(self, key: str) -> None:
+        self.backend.delete(key)
+
+    def clear(self) -> None:
+        self.backend.clear()
+
+    def stats(self) -> Dict:
+        """Hit/miss counters for this process"""
+        total = self.hits + self.misses
+        return {
+            "namespace": self.namespace,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self.backend),
+        }
+
+
+def create_cache(namespace: str, ttl: float, max_entries: int, backend: Optional[str] = None) -> TTLCache:
+    """
+    Build a cache for one namespace using the configured backend.
+
+    backend is "memory" (in-process, default) or "sqlite" (shared file at
+    settings.CACHE_DB_PATH that survives restarts).
+    """
+    backend = (backend or settings.CACHE_BACKEND).lower()
+    if backend == "sqlite":
+        store = SQLiteCacheBackend(settings.CACHE_DB_PATH, namespace, max_entries)
+    elif backend == "memory":
+        store = MemoryCacheBackend(max_entries)
+    else:
+        raise ValueError(f"Unknown cache backend: {backend}")
+    return TTLCache(namespace, store, ttl)
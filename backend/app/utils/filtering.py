@@ -0,0 +1,218 @@
+# Deterministic, rule-based filtering and scoring of raw restaurant results
+import difflib
+import re
+from typing import Dict, Iterable, List, Optional, Union
+from app.utils.helpers import format_budget, normalize_text
+
+# Filters only the LLM can judge; rating, budget, cuisine and service type are checked here
+SOFT_FILTERS = ('dietary', 'accessibility', 'operational')
+
+# Only these fields are sent to the LLM; the rest are restored from the originals afterwards
+LLM_FIELDS = (
+    'id', 'name', 'address', 'cuisine', 'cuisines', 'rating', 'budget', 'hours',
+    'menu_items', 'service_types', 'wheelchair_accessible', 'accessibility',
+    'matching_menu_items', 'dietary_accommodation',
+)
+
+
+def needs_llm_judgement(filters: Dict) -> bool:
+    """Whether any selected filter needs the LLM (dietary fit, accessibility, opening hours)"""
+    return any(filters.get(key) for key in SOFT_FILTERS)
+
+
+def _as_list(value) -> List[str]:
+    if not value:
+        return []
+    if isinstance(value, str):
+        return [part.strip() for part in re.split(r'[,/]', value) if part.strip()]
+    return [str(item).strip() for item in value if item]
+
+
+def _budget_levels(budget) -> List[int]:
+    """Parse '$$', '$$ or $$$' or '$$-$$$' into the budget levels it spans"""
+    levels = [format_budget(match) for match in re.findall(r'\$+', str(budget or ''))]
+    levels = [level for level in levels if level]
+    if len(levels) >= 2 and re.search(r'\$\s*-\s*\$', str(budget)):
+        return list(range(min(levels), max(levels) + 1))
+    return levels
+
+
+def _cuisines(restaurant: Dict) -> List[str]:
+    return [c.lower() for c in _as_list(restaurant.get('cuisines') or restaurant.get('cuisine'))]
+
+
+def _service_types(restaurant: Dict) -> List[str]:
+    return [s.lower() for s in _as_list(restaurant.get('service_types') or restaurant.get('serviceTypes'))]
+
+
+def _cuisine_matches(wanted: str, cuisines: List[str]) -> bool:
+    wanted = wanted.lower()
+    return any(wanted in cuisine or cuisine in wanted for cuisine in cuisines)
+
+
+def passes_hard_filters(restaurant: Dict, filters: Dict) -> bool:
+    """Check the hard criteria; fields the restaurant doesn't report don't disqualify it"""
+    rating = restaurant.get('rating')
+    if filters.get('minRating') and isinstance(rating, (int, float)) and rating < filters['minRating']:
+        return False
+
+    wanted_budgets = {format_budget(b) for b in filters.get('budget') or []} - {0}
+    levels = _budget_levels(restaurant.get('budget'))
+    if wanted_budgets and levels and not wanted_budgets.intersection(levels):
+        return False
+
+    cuisines = _cuisines(restaurant)
+    wanted_cuisines = filters.get('cuisines') or []
+    if wanted_cuisines and cuisines and not any(_cuisine_matches(c, cuisines) for c in wanted_cuisines):
+        return False
+
+    service_types = _service_types(restaurant)
+    wanted_services = [s.lower() for s in filters.get('serviceType') or []]
+    if wanted_services and service_types and not all(s in service_types for s in wanted_services):
+        return False
+
+    return True
+
+
+def has_hard_filter_fields(restaurant: Dict, filters: Dict) -> bool:
+    """Whether the restaurant reports every field the selected hard criteria check"""
+    if filters.get('minRating') and not isinstance(restaurant.get('rating'), (int, float)):
+        return False
+    if filters.get('budget') and not _budget_levels(restaurant.get('budget')):
+        return False
+    if filters.get('cuisines') and not _cuisines(restaurant):
+        return False
+    if filters.get('serviceType') and not _service_types(restaurant):
+        return False
+    return True
+
+
+def can_score_locally(restaurants: List[Dict], filters: Dict) -> bool:
+    """
+    Whether results can skip the LLM: no soft criteria selected, and every
+    candidate reports the fields the hard criteria need - passes_hard_filters
+    lets unknown fields through, so only the LLM can judge sparse records.
+    """
+    if needs_llm_judgement(filters):
+        return False
+    return all(has_hard_filter_fields(restaurant, filters) for restaurant in restaurants)
+
+
+def local_match_score(restaurant: Dict, filters: Dict) -> int:
+    """Score 0-100 from rating and how many selected hard criteria are confirmed (not just unknown)"""
+    rating = restaurant.get('rating')
+    score = (rating / 5 * 50) if isinstance(rating, (int, float)) else 25
+
+    checks = []
+    if filters.get('budget'):
+        wanted = {format_budget(b) for b in filters['budget']}
+        checks.append(bool(wanted.intersection(_budget_levels(restaurant.get('budget')))))
+    if filters.get('cuisines'):
+        cuisines = _cuisines(restaurant)
+        checks.append(any(_cuisine_matches(c, cuisines) for c in filters['cuisines']))
+    if filters.get('serviceType'):
+        service_types = _service_types(restaurant)
+        checks.append(all(s.lower() in service_types for s in filters['serviceType']))
+    score += (sum(checks) / len(checks) * 50) if checks else 50
+    return int(round(min(score, 100)))
+
+
+def prefilter_restaurants(restaurants: List[Dict], filters: Dict) -> List[Dict]:
+    """Drop restaurants failing the hard criteria and rank survivors by local score, best first"""
+    survivors = []
+    for restaurant in restaurants:
+        if passes_hard_filters(restaurant, filters):
+            restaurant['local_score'] = local_match_score(restaurant, filters)
+            survivors.append(restaurant)
+    survivors.sort(key=lambda r: r['local_score'], reverse=True)
+    return survivors
+
+
+def project_for_llm(restaurants: List[Dict], fields: Iterable[str] = LLM_FIELDS) -> List[Dict]:
+    """Keep only the fields the LLM needs to judge the restaurants"""
+    return [
+        {key: restaurant[key] for key in fields if restaurant.get(key) not in (None, '', [])}
+        for restaurant in restaurants
+    ]
+
+
+def build_local_results(restaurants: List[Dict], filters: Dict) -> List[Dict]:
+    """Turn pre-filtered raw restaurants into final results without an LLM call"""
+    results = []
+    for restaurant in restaurants:
+        # local_score is internal to the pipeline; match_score carries it into the result
+        result = {key: value for key, value in restaurant.items() if key != 'local_score'}
+        cuisines = _as_list(restaurant.get('cuisines') or restaurant.get('cuisine'))
+        reasons = []
+        if isinstance(restaurant.get('rating'), (int, float)):
+            reasons.append(f"rated {restaurant['rating']}")
+        if restaurant.get('budget'):
+            reasons.append(f"priced {restaurant['budget']}")
+        if cuisines:
+            reasons.append(f"serves {', '.join(cuisines)}")
+        accessibility = _as_list(restaurant.get('accessibility'))
+        if restaurant.get('wheelchair_accessible') and 'Wheelchair Accessible' not in accessibility:
+            accessibility.append('Wheelchair Accessible')
+
+        results.append({
+            **result,
+            'cuisines': cuisines,
+            'match_score': restaurant.get('local_score', local_match_score(restaurant, filters)),
+            # Without an LLM (and with no dietary filter) no dish has been judged a match
+            'matching_menu_items': [],
+            'why_it_matches': ("Matches your filters: " + "; ".join(reasons)) if reasons else "Matches your filters",
+            'accessibility_features': accessibility,
+            'service_types': _as_list(restaurant.get('service_types')),
+        })
+    return results
+
+
+class RestaurantIndex:
+    """
+    Finds the original record for a restaurant the LLM returned: by id, then by
+    normalized name, then by the closest name if the model reworded it slightly.
+    """
+
+    FUZZY_CUTOFF = 0.85
+
+    def __init__(self, restaurants: List[Dict]):
+        self.by_id: Dict[str, Dict] = {}
+        self.by_name: Dict[str, Dict] = {}
+        for restaurant in restaurants:
+            if restaurant.get('id'):
+                self.by_id.setdefault(str(restaurant['id']), restaurant)
+            self.by_name.setdefault(normalize_text(str(restaurant.get('name', ''))), restaurant)
+
+    def find(self, result: Dict) -> Optional[Dict]:
+        if result.get('id') and str(result['id']) in self.by_id:
+            return self.by_id[str(result['id'])]
+        name = normalize_text(str(result.get('name', '')))
+        if not name:
+            return None
+        if name in self.by_name:
+            return self.by_name[name]
+        close = difflib.get_close_matches(name, self.by_name.keys(), n=1, cutoff=self.FUZZY_CUTOFF)
+        return self.by_name[close[0]] if close else None
+
+
+def restore_original_fields(results: List[Dict], originals: Union[List[Dict], RestaurantIndex]) -> List[Dict]:
+    """
+    Copy back fields that were not sent to the LLM (coordinates, images, contact
+    details, earlier stage scores) - the model can only have guessed those - and
+    any field the model left out of its answer.
+    """
+    index = originals if isinstance(originals, RestaurantIndex) else RestaurantIndex(originals)
+    for result in results:
+        original = index.find(result)
+        if not original:
+            continue
+        # Ids and names are the originals' even if the model dropped or reworded them
+        for key in ('id', 'name'):
+            if original.get(key):
+                result[key] = original[key]
+        for key, value in original.items():
+            if key == 'local_score' or value in (None, '', []):
+                continue
+            if key not in LLM_FIELDS or result.get(key) in (None, '', []):
+                result[key] = value
+    return results
@@ -1,4 +1,13 @@
 # Utility functions for common operations
+import hashlib
+import json
+import re
+from urllib.parse import urlsplit, urlunsplit
+
+try:
+    import numpy as np
+except ImportError:  # minimal installs - distance batches fall back to pure Python
+    np = None
 
 def parse_rating_filter(rating_str: str) -> float:
     """Parse rating string to float"""
@@ -30,6 +39,41 @@ def calculate_distance(lat1: float, lon1: float, lat2: float, lon2: float) -> fl
     
     return R * c
 
+# Places photos are served by the backend's own proxy; the path is relative so
+# stored results don't depend on the host the backend was reached at
+PHOTO_PROXY_PATH = '/api/photos/'
+
+PLACEHOLDER_IMAGE_MARKERS = [
+    'picsum', 'unsplash', 'placeholder', 'via.placeholder', 'example.com',
+    'example.org', 'lorem', 'dummy', 'test.com',
+]
+
+def is_real_image_url(url: str) -> bool:
+    """Check that an image URL is an absolute link (or a photo proxy path) and not a generic placeholder"""
+    if not url or not isinstance(url, str):
+        return False
+    url = url.strip().lower()
+    if url.startswith(PHOTO_PROXY_PATH):
+        return True
+    if not url.startswith('http'):
+        return False
+    return not any(marker in url for marker in PLACEHOLDER_IMAGE_MARKERS)
+
+def calculate_distances(lat: float, lon: float, lats, lons):
+    """Haversine distances in kilometers from one point to many, vectorized when numpy is available"""
+    if np is None:
+        return [calculate_distance(lat, lon, lat2, lon2) for lat2, lon2 in zip(lats, lons)]
+    R = 6371  # Earth's radius in km
+    lat1_rad = np.radians(lat)
+    lat2_rad = np.radians(np.asarray(lats, dtype=float))
+    delta_lat = lat2_rad - lat1_rad
+    delta_lon = np.radians(np.asarray(lons, dtype=float) - lon)
+    
+    a = np.sin(delta_lat/2)**2 + np.cos(lat1_rad) * np.cos(lat2_rad) * np.sin(delta_lon/2)**2
+    c = 2 * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+    
+    return (R * c).tolist()
+
 def validate_filters(filters: dict) -> dict:
     """Validate and sanitize filter inputs"""
     validated = {}
@@ -42,3 +86,37 @@ def validate_filters(filters: dict) -> dict:
     validated['accessibility'] = filters.get('accessibility', [])
     validated['operational'] = filters.get('operational', [])
     return validated
+
+def normalize_text(text: str) -> str:
+    """Lowercase text, drop punctuation and collapse whitespace for use in lookup keys"""
+    return ' '.join(re.sub(r'[^\w\s]', ' ', (text or '').lower()).split())
+
+def make_restaurant_id(name: str, address: str = '') -> str:
+    """Build a stable restaurant id from its name and address"""
+    slug = '_'.join(normalize_text(name).split()) or 'restaurant'
+    digest = hashlib.sha1(f"{normalize_text(name)}|{normalize_text(address)}".encode()).hexdigest()[:8]
+    return f"{slug}_{digest}"
+
+def canonical_search_key(location: str, filters: dict) -> str:
+    """Build a canonical cache key from a location and validated filters"""
+    canonical_filters = {}
+    for key, value in (filters or {}).items():
+        if isinstance(value, list):
+            value = sorted(str(item).strip().lower() for item in value)
+        canonical_filters[key] = value
+    canonical_location = ' '.join((location or '').lower().split())
+    return json.dumps([canonical_location, canonical_filters], sort_keys=True, separators=(',', ':'))
+
+def normalize_url(url: str) -> str:
+    """Canonical form of a website URL for cache keys (scheme, lowercase host, no fragment or trailing slash)"""
+    url = (url or '').strip()
+    if not url.startswith(('http://', 'https://')):
+        url = 'https://' + url
+    parts = urlsplit(url)
+    host = (parts.hostname or '').lower()
+    if host.startswith('www.'):
+        host = host[4:]
+    if parts.port and parts.port not in (80, 443):
+        host = f"{host}:{parts.port}"
+    path = parts.path.rstrip('/')
+    return urlunsplit(('https', host, path, parts.query, ''))
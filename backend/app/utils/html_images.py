@@ -0,0 +1,158 @@
+# Incremental scan of restaurant web pages for their main photo
+import codecs
+from html.parser import HTMLParser
+from typing import Iterable, List, Optional, Tuple
+from urllib.parse import urljoin
+
+IMAGE_EXTENSIONS = ('.jpg', '.jpeg', '.png', '.webp', '.gif')
+MAX_IMG_CANDIDATES = 10  # only the first few <img> tags are scored
+SKIP_IMAGE_KEYWORDS = ('icon', 'logo', 'button', 'avatar', 'badge', 'favicon', 'sprite')
+SRC_KEYWORDS = ('hero', 'banner', 'main', 'gallery', 'food', 'restaurant', 'interior', 'exterior', 'dish', 'meal')
+ALT_KEYWORDS = ('food', 'restaurant', 'dish', 'meal', 'cuisine')
+CLASS_KEYWORDS = ('hero', 'banner', 'main', 'featured', 'gallery')
+
+
+class ImageTagScanner(HTMLParser):
+    """
+    Tokenizer-based scan for a page's best image, fed the page in chunks.
+
+    Priority matches the original full-page parse: og:image, then twitter:image,
+    then the highest scoring of the first <img> tags. `done` turns true as soon
+    as the answer can no longer change, so the caller can stop downloading.
+    """
+
+    def __init__(self, base_url: str):
+        super().__init__(convert_charrefs=True)
+        self.base_url = base_url
+        self.og_image: Optional[str] = None
+        self.twitter_image: Optional[str] = None
+        self.head_closed = False
+        self.images_seen = 0
+        self.candidates: List[Tuple[int, str]] = []
+
+    @property
+    def done(self) -> bool:
+        if self.og_image:
+            return True
+        if self.head_closed and self.twitter_image:
+            return True
+        return self.images_seen >= MAX_IMG_CANDIDATES
+
+    def handle_starttag(self, tag, attrs):
+        attrs = dict(attrs)
+        if tag == 'meta':
+            self._handle_meta(attrs)
+        elif tag == 'body':
+            self.head_closed = True
+        elif tag == 'img' and attrs.get('src'):
+            self.head_closed = True
+            self.images_seen += 1
+            if self.images_seen <= MAX_IMG_CANDIDATES:
+                self._score_img(attrs)
+
+    def handle_endtag(self, tag):
+        if tag == 'head':
+            self.head_closed = True
+
+    def _absolute(self, url: str) -> str:
+        # Make absolute URL if relative
+        if url.startswith('/') or not url.startswith('http'):
+            return urljoin(self.base_url, url)
+        return url
+
+    def _handle_meta(self, attrs):
+        content = (attrs.get('content') or '').strip()
+        if not content:
+            return
+        if attrs.get('property') == 'og:image' and not self.og_image:
+            img_url = self._absolute(content)
+            # Verify it's a valid image URL
+            if any(ext in img_url.lower() for ext in IMAGE_EXTENSIONS) or 'image' in img_url.lower():
+                self.og_image = img_url
+        elif attrs.get('name') == 'twitter:image' and not self.twitter_image:
+            img_url = self._absolute(content)
+            if any(ext in img_url.lower() for ext in IMAGE_EXTENSIONS):
+                self.twitter_image = img_url
+
+    def _score_img(self, attrs):
+        src = attrs.get('src', '').strip()
+        # Skip small icons/logos
+        if not src or any(skip in src.lower() for skip in SKIP_IMAGE_KEYWORDS):
+            return
+        src = self._absolute(src)
+        alt_text = (attrs.get('alt') or '').lower()
+        class_name = (attrs.get('class') or '').lower()
+
+        # Score images based on likelihood of being a restaurant photo
+        score = 0
+        if any(keyword in src.lower() for keyword in SRC_KEYWORDS):
+            score += 10
+        if any(keyword in alt_text for keyword in ALT_KEYWORDS):
+            score += 5
+        if any(keyword in class_name for keyword in CLASS_KEYWORDS):
+            score += 5
+        try:
+            if int(attrs.get('width') or 0) > 300 and int(attrs.get('height') or 0) > 200:
+                score += 3
+        except ValueError:
+            pass
+
+        if score > 0 or any(ext in src.lower() for ext in IMAGE_EXTENSIONS[:4]):
+            self.candidates.append((score, src))
+
+    def best_image(self) -> Optional[str]:
+        """The chosen image URL given everything scanned so far"""
+        if self.og_image:
+            return self.og_image
+        if self.twitter_image:
+            return self.twitter_image
+        if self.candidates:
+            # Highest score wins; the earliest tag wins ties
+            return max(self.candidates, key=lambda candidate: candidate[0])[1]
+        return None
+
+
+def charset_from_content_type(content_type: Optional[str]) -> Optional[str]:
+    """The charset parameter of a Content-Type header, if any"""
+    for part in (content_type or '').split(';')[1:]:
+        key, _, value = part.strip().partition('=')
+        if key.lower() == 'charset':
+            return value.strip('"\' ') or None
+    return None
+
+
+class StreamingImageExtractor:
+    """Feeds raw response bytes to an ImageTagScanner, enforcing a byte cap"""
+
+    def __init__(self, base_url: str, encoding: Optional[str] = None, max_bytes: int = 512 * 1024):
+        self.scanner = ImageTagScanner(base_url)
+        try:
+            decoder_factory = codecs.getincrementaldecoder(encoding or 'utf-8')
+        except LookupError:
+            decoder_factory = codecs.getincrementaldecoder('utf-8')
+        self._decoder = decoder_factory(errors='replace')
+        self.max_bytes = max_bytes
+        self.bytes_read = 0
+
+    def feed(self, chunk: bytes) -> bool:
+        """Scan a chunk; returns True once reading more of the page is pointless"""
+        remaining = self.max_bytes - self.bytes_read
+        if remaining <= 0:
+            return True
+        chunk = chunk[:remaining]
+        self.bytes_read += len(chunk)
+        self.scanner.feed(self._decoder.decode(chunk))
+        return self.scanner.done or self.bytes_read >= self.max_bytes
+
+    def result(self) -> Optional[str]:
+        return self.scanner.best_image()
+
+
+def extract_image_from_chunks(chunks: Iterable[bytes], base_url: str, encoding: Optional[str] = None,
+                              max_bytes: int = 512 * 1024) -> Optional[str]:
+    """Scan a page delivered as byte chunks, stopping early once the image is known"""
+    extractor = StreamingImageExtractor(base_url, encoding, max_bytes)
+    for chunk in chunks:
+        if extractor.feed(chunk):
+            break
+    return extractor.result()
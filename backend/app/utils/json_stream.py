@@ -0,0 +1,126 @@
+# Incremental parsing of JSON streamed token-by-token from an LLM
+import json
+from typing import Any, List, Optional
+
+_CLOSING = {'{': '}', '[': ']'}
+
+
+class JSONItemStream:
+    """
+    Incrementally scans streamed text and yields each object in the first JSON
+    array as soon as its closing brace arrives.
+
+    The array can be the top-level document (``[{...}, {...}]``) or a value of a
+    top-level object (``{"transformed_restaurants": [{...}], ...}``). With ``key``
+    only the array under that key of a top-level object is used, so other arrays
+    written before it (``"tags": [...]``) are skipped. Text before the first
+    bracket, such as a markdown fence or a short preamble, is ignored.
+    """
+
+    def __init__(self, key: Optional[str] = None):
+        self.key = key
+        self._text = ''
+        self._pos = 0
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._last_key: Optional[str] = None
+        self._started = False
+        self._doc_start: Optional[int] = None
+        self._doc_end: Optional[int] = None
+        self._items_depth: Optional[int] = None
+        self._item_start: Optional[int] = None
+        self._items_done = False
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Add a chunk of text and return the items completed by it"""
+        if not chunk:
+            return []
+        self._text += chunk
+        items = []
+        text = self._text
+        for i in range(self._pos, len(text)):
+            char = text[i]
+            if self._in_string:
+                if self._escape:
+                    self._escape = False
+                elif char == '\\':
+                    self._escape = True
+                elif char == '"':
+                    self._in_string = False
+                    if len(self._stack) == 1:
+                        # Before a value, the last string in the top-level object is its key
+                        self._last_key = text[self._string_start + 1:i]
+                continue
+
+            if self._doc_end is not None:
+                break
+            if not self._started:
+                if char in '[{':
+                    self._started = True
+                    self._doc_start = i
+                else:
+                    continue
+
+            if char == '"':
+                self._in_string = True
+                self._string_start = i
+            elif char in '[{':
+                if (self._items_depth is not None and len(self._stack) == self._items_depth
+                        and self._item_start is None and not self._items_done):
+                    self._item_start = i
+                self._stack.append(char)
+                if char == '[' and self._items_depth is None and self._is_items_array():
+                    self._items_depth = len(self._stack)
+            elif char in ']}':
+                if not self._stack or _CLOSING[self._stack[-1]] != char:
+                    continue  # malformed - ignore rather than lose the stream
+                self._stack.pop()
+                if self._item_start is not None and len(self._stack) == self._items_depth:
+                    item = self._parse(text[self._item_start:i + 1])
+                    if item is not None:
+                        items.append(item)
+                    self._item_start = None
+                if self._items_depth is not None and len(self._stack) == self._items_depth - 1:
+                    self._items_done = True
+                if not self._stack:
+                    self._doc_end = i + 1
+        self._pos = len(text)
+        return items
+
+    def _is_items_array(self) -> bool:
+        """Whether the array just opened is the one whose items are streamed"""
+        if len(self._stack) == 1:
+            return True  # the document itself is an array
+        if len(self._stack) != 2 or self._stack[0] != '{':
+            return False
+        return self.key is None or self._last_key == self.key
+
+    @staticmethod
+    def _parse(fragment: str) -> Any:
+        try:
+            return json.loads(fragment)
+        except json.JSONDecodeError:
+            return None
+
+    @property
+    def text(self) -> str:
+        """All text received so far"""
+        return self._text
+
+    def document(self) -> Any:
+        """Parse the complete JSON document once the stream has ended (None if invalid or unfinished)"""
+        if self._doc_start is None or self._doc_end is None:
+            return None
+        return self._parse(self._text[self._doc_start:self._doc_end])
+
+
+def parse_json_document(text: str) -> Any:
+    """
+    Parse the first JSON object or array in an LLM response, tolerating markdown
+    fences and surrounding prose. Returns None if nothing parses.
+    """
+    stream = JSONItemStream()
+    stream.feed(text or '')
+    return stream.document()
@@ -0,0 +1,82 @@
+# Compact, per-agent serialization of restaurants and filters for LLM prompts
+import json
+from typing import Dict, Iterable, List, Optional, Tuple
+from app.config import settings
+from app.utils.filtering import project_for_llm
+
+# What each agent is shown; everything else (address, coordinates, images, phone,
+# website, ...) is restored from the originals after the call
+TRANSFORMER_FIELDS = (
+    'id', 'name', 'cuisine', 'cuisines', 'rating', 'budget',
+    'menu_items', 'service_types', 'wheelchair_accessible', 'accessibility',
+)
+DIETARY_FIELDS = (
+    'id', 'name', 'cuisine', 'cuisines', 'menu_items', 'matching_menu_items', 'dietary_accommodation',
+)
+SINGLE_PASS_FIELDS = TRANSFORMER_FIELDS + ('dietary_accommodation',)
+
+ENCODINGS = ('json', 'table')
+
+_ENCODING_NOTES = {
+    'json': 'JSON',
+    'table': 'one per line, columns separated by "|", list items by ";"',
+}
+
+
+def fields_for(base: Tuple[str, ...], filters: Optional[Dict] = None) -> Tuple[str, ...]:
+    """An agent's fields, plus opening hours when the user filtered on them"""
+    if filters and filters.get('operational'):
+        return base + ('hours',)
+    return base
+
+
+def encode_restaurants(restaurants: List[Dict], fields: Iterable[str], encoding: Optional[str] = None) -> str:
+    """
+    Project restaurants down to `fields` and serialize them compactly: minified
+    JSON, or a header row plus one "|"-separated row per restaurant.
+    """
+    fields = tuple(fields)
+    rows = project_for_llm(restaurants, fields)
+    if (encoding or settings.PROMPT_ENCODING) == 'table':
+        return _table(rows, fields)
+    return json.dumps(rows, separators=(',', ':'), ensure_ascii=False)
+
+
+def restaurants_section(restaurants: List[Dict], fields: Iterable[str], encoding: Optional[str] = None) -> str:
+    """The RESTAURANTS block of a prompt, labelled with its encoding"""
+    encoding = encoding or settings.PROMPT_ENCODING
+    note = _ENCODING_NOTES.get(encoding, _ENCODING_NOTES['json'])
+    return f"RESTAURANTS ({note}):\n{encode_restaurants(restaurants, fields, encoding)}"
+
+
+def encode_filters(filters: Dict) -> str:
+    """Minified JSON of the filters the user actually set"""
+    selected = {key: value for key, value in filters.items() if value not in (None, '', [], {})}
+    return json.dumps(selected, separators=(',', ':'), ensure_ascii=False)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 characters per token) for when the API reports no usage"""
+    return (len(text) + 3) // 4
+
+
+def _table(rows: List[Dict], fields: Tuple[str, ...]) -> str:
+    # Only columns at least one restaurant has a value for
+    columns = [field for field in fields if any(field in row for row in rows)]
+    lines = ['|'.join(columns)]
+    for row in rows:
+        lines.append('|'.join(_cell(row.get(column)) for column in columns))
+    return '\n'.join(lines)
+
+
+def _cell(value) -> str:
+    if value is None:
+        return ''
+    if isinstance(value, bool):
+        return 'yes' if value else 'no'
+    if isinstance(value, (list, tuple)):
+        return ';'.join(_cell(item) for item in value)
+    if isinstance(value, dict):
+        value = json.dumps(value, separators=(',', ':'), ensure_ascii=False)
+    # Keep each restaurant on one line and the separators unambiguous
+    return str(value).replace('\n', ' ').replace('|', '/').replace(';', ',')
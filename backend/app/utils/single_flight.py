@@ -0,0 +1,142 @@
+# Request coalescing: concurrent identical calls share one in-flight computation
+import asyncio
+import threading
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, Hashable, List, Optional
+
+
+class SingleFlight:
+    """
+    Async single-flight group.
+
+    The first caller for a key starts the work as a task; callers arriving while
+    it runs await the same task. The task is shielded, so a caller that goes away
+    (e.g. a disconnected client) doesn't cancel the work for everyone else.
+    """
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self.coalesced = 0
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    @property
+    def in_flight_count(self) -> int:
+        return len(self._inflight)
+
+    def start(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> asyncio.Task:
+        """Return the in-flight task for key, starting func(*args, **kwargs) as that task if none is running"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(func(*args, **kwargs))
+            self._inflight[key] = task
+            task.add_done_callback(lambda done, key=key: self._forget(key, done))
+        else:
+            self.coalesced += 1
+        return task
+
+    async def do(self, key: Hashable, func: Callable[..., Awaitable[Any]], *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) once per key at a time and share its result"""
+        return await asyncio.shield(self.start(key, func, *args, **kwargs))
+
+    async def drain(self, timeout: Optional[float] = None) -> int:
+        """Wait for in-flight calls to finish; returns how many were still running at the timeout"""
+        tasks = list(self._inflight.values())
+        if not tasks:
+            return 0
+        _, pending = await asyncio.wait(tasks, timeout=timeout)
+        return len(pending)
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # retrieved here so abandoned failures aren't logged as unhandled
+
+
+_END = object()
+
+
+class EventFanout:
+    """
+    Fans one producer's events out to any number of subscribers. A subscriber
+    gets every event published so far, then each later one, until close().
+    """
+
+    def __init__(self):
+        self.history: List[Any] = []
+        self.closed = False
+        self._queues: List[asyncio.Queue] = []
+
+    def publish(self, event: Any) -> None:
+        self.history.append(event)
+        for queue in self._queues:
+            queue.put_nowait(event)
+
+    def close(self) -> None:
+        self.closed = True
+        for queue in self._queues:
+            queue.put_nowait(_END)
+
+    async def subscribe(self) -> AsyncIterator[Any]:
+        queue: asyncio.Queue = asyncio.Queue()
+        for event in self.history:
+            queue.put_nowait(event)
+        if self.closed:
+            queue.put_nowait(_END)
+        else:
+            self._queues.append(queue)
+        try:
+            while True:
+                event = await queue.get()
+                if event is _END:
+                    return
+                yield event
+        finally:
+            if queue in self._queues:
+                self._queues.remove(queue)
+
+
+class _Call:
+    def __init__(self):
+        self.done = threading.Event()
+        self.result: Any = None
+        self.error: Optional[BaseException] = None
+
+
+class ThreadSingleFlight:
+    """Single-flight group for blocking calls made from worker threads"""
+
+    def __init__(self, name: str = "single_flight"):
+        self.name = name
+        self.coalesced = 0
+        self._lock = threading.Lock()
+        self._calls: Dict[Hashable, _Call] = {}
+
+    def do(self, key: Hashable, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run func(*args, **kwargs) once per key at a time; other threads wait for its result"""
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.result
+
+        try:
+            call.result = func(*args, **kwargs)
+            return call.result
+        except BaseException as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            call.done.set()
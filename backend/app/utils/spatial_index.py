@@ -0,0 +1,101 @@
+# Grid-bucket spatial index for radius and nearest-k queries over known restaurants
+import math
+from typing import Dict, List, Optional, Set, Tuple
+from app.utils.helpers import calculate_distances
+
+# Same sphere as helpers.calculate_distance, so the search box never cuts off
+# points the haversine distance puts inside the circle
+EARTH_RADIUS_M = 6_371_000
+METERS_PER_DEGREE_LAT = EARTH_RADIUS_M * math.pi / 180
+
+
+class GridSpatialIndex:
+    """
+    Buckets points into fixed-size lat/lng cells.
+
+    A query only scans the cells overlapping the search circle and computes
+    exact haversine distances for those candidates in one vectorized batch.
+    """
+
+    def __init__(self, cell_size_deg: float = 0.01):
+        self.cell_size = cell_size_deg
+        self._cells: Dict[Tuple[int, int], Set[str]] = {}
+        self._points: Dict[str, Tuple[float, float]] = {}
+
+    def _cell(self, lat: float, lng: float) -> Tuple[int, int]:
+        return (math.floor(lat / self.cell_size), math.floor(lng / self.cell_size))
+
+    def insert(self, key: str, lat: float, lng: float) -> None:
+        """Add or move a point"""
+        if key in self._points:
+            self.remove(key)
+        self._points[key] = (lat, lng)
+        self._cells.setdefault(self._cell(lat, lng), set()).add(key)
+
+    def remove(self, key: str) -> None:
+        point = self._points.pop(key, None)
+        if point is None:
+            return
+        cell = self._cell(*point)
+        bucket = self._cells.get(cell)
+        if bucket is not None:
+            bucket.discard(key)
+            if not bucket:
+                del self._cells[cell]
+
+    def __len__(self) -> int:
+        return len(self._points)
+
+    def _candidates(self, lat: float, lng: float, radius_m: float) -> List[str]:
+        """Keys in every cell overlapping the bounding box of the circle"""
+        lat_span = radius_m / METERS_PER_DEGREE_LAT
+        # A circle's widest point lies poleward of its center, so the longitude
+        # extent is asin(sin(r/R) / cos(lat)) rather than r / (R cos(lat))
+        angle = radius_m / EARTH_RADIUS_M
+        cos_lat = math.cos(math.radians(lat))
+        if abs(lat) + lat_span >= 90 or math.sin(angle) >= cos_lat:
+            lng_span = 180.0  # the circle reaches a pole
+        else:
+            lng_span = math.degrees(math.asin(math.sin(angle) / cos_lat))
+
+        min_i, min_j = self._cell(lat - lat_span, lng - lng_span)
+        max_i, max_j = self._cell(lat + lat_span, lng + lng_span)
+        if (max_i - min_i + 1) * (max_j - min_j + 1) > len(self._cells):
+            # Circle covers more cells than are populated - scan the populated ones
+            return [key for (i, j), bucket in self._cells.items()
+                    if min_i <= i <= max_i and min_j <= j <= max_j for key in bucket]
+
+        candidates = []
+        for i in range(min_i, max_i + 1):
+            for j in range(min_j, max_j + 1):
+                bucket = self._cells.get((i, j))
+                if bucket:
+                    candidates.extend(bucket)
+        return candidates
+
+    def query_radius(self, lat: float, lng: float, radius_m: float) -> List[Tuple[str, float]]:
+        """Return (key, distance_m) for points within radius_m, nearest first"""
+        candidates = self._candidates(lat, lng, radius_m)
+        if not candidates:
+            return []
+        distances = calculate_distances(
+            lat, lng,
+            [self._points[key][0] for key in candidates],
+            [self._points[key][1] for key in candidates]
+        )
+        hits = [(key, km * 1000) for key, km in zip(candidates, distances) if km * 1000 <= radius_m]
+        hits.sort(key=lambda hit: hit[1])
+        return hits
+
+    def nearest(self, lat: float, lng: float, k: int, max_radius_m: Optional[float] = None) -> List[Tuple[str, float]]:
+        """Return up to k nearest (key, distance_m), widening the search ring until enough are found"""
+        if not self._points or k <= 0:
+            return []
+        radius = self.cell_size * METERS_PER_DEGREE_LAT
+        limit = max_radius_m or math.pi * 6_371_000
+        while True:
+            radius = min(radius, limit)
+            hits = self.query_radius(lat, lng, radius)
+            if len(hits) >= k or radius >= limit or len(hits) == len(self._points):
+                return hits[:k]
+            radius *= 2
@@ -0,0 +1,322 @@
+# Request-scoped tracing: nested spans over contextvars with pluggable exporters
+import contextvars
+import json
+import os
+import queue
+import random
+import secrets
+import threading
+import time
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+from typing import Any, Dict, List, Optional
+from app.config import settings
+
+_current_span: contextvars.ContextVar = contextvars.ContextVar("current_span", default=None)
+
+
+class Span:
+    """One timed operation within a trace"""
+
+    def __init__(self, name: str, trace_id: str, parent_id: Optional[str], attributes: Dict[str, Any]):
+        self.name = name
+        self.trace_id = trace_id
+        self.span_id = secrets.token_hex(8)
+        self.parent_id = parent_id
+        self.attributes = dict(attributes)
+        self.start_ns = time.time_ns()
+        self.end_ns: Optional[int] = None
+        self.status = "ok"
+        self.status_message = ""
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        self.attributes[key] = value
+
+    def set_error(self, error: BaseException) -> None:
+        self.status = "error"
+        self.status_message = f"{type(error).__name__}: {error}"
+
+    @property
+    def duration_ms(self) -> float:
+        return ((self.end_ns or time.time_ns()) - self.start_ns) / 1e6
+
+    def to_dict(self) -> Dict:
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_ns": self.start_ns,
+            "end_ns": self.end_ns,
+            "duration_ms": round(self.duration_ms, 3),
+            "status": self.status,
+            "status_message": self.status_message,
+            "attributes": self.attributes,
+        }
+
+
+class _NoopSpan:
+    """Stand-in when tracing is off or the trace isn't sampled"""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> None:
+        pass
+
+    def set_error(self, error: BaseException) -> None:
+        pass
+
+
+NOOP_SPAN = _NoopSpan()
+
+
+class BackgroundExporter(ABC):
+    """
+    Base for exporters that do their I/O on a background thread.
+
+    export() only queues the finished trace, so the event loop never waits on
+    disk or network; the thread drains whatever has queued up and hands it to
+    _write() as one batch.
+    """
+
+    thread_name = "trace-exporter"
+
+    def __init__(self, max_queued: int = 1000):
+        self._queue: "queue.Queue[Optional[List[Span]]]" = queue.Queue(maxsize=max_queued)
+        self._thread = threading.Thread(target=self._run, name=self.thread_name, daemon=True)
+        self._thread.start()
+
+    def export(self, spans: List[Span]) -> None:
+        try:
+            self._queue.put_nowait(spans)
+        except queue.Full:
+            print("⚠️ Trace export queue full - dropping trace")
+
+    def _run(self) -> None:
+        running = True
+        while running:
+            batch = [self._queue.get()]
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if None in batch:  # shutdown: write what came before it, then stop
+                batch = batch[:batch.index(None)]
+                running = False
+            if not batch:
+                continue
+            try:
+                self._write(batch)
+            except Exception as e:
+                print(f"⚠️ Trace export failed: {type(e).__name__}")
+
+    @abstractmethod
+    def _write(self, traces: List[List[Span]]) -> None:
+        """Export one batch of finished traces (runs on the background thread)"""
+
+    def shutdown(self) -> None:
+        self._queue.put(None)
+        self._thread.join(timeout=5)
+
+
+class JSONFileExporter(BackgroundExporter):
+    """Writes each finished trace to <directory>/<trace_id>.json for offline analysis"""
+
+    thread_name = "json-trace-exporter"
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        super().__init__()
+
+    def _write(self, traces: List[List[Span]]) -> None:
+        # Spans of one trace that arrive together are written to its file once
+        by_trace: Dict[str, List[Dict]] = {}
+        for spans in traces:
+            by_trace.setdefault(spans[0].trace_id, []).extend(span.to_dict() for span in spans)
+        for trace_id, records in by_trace.items():
+            path = os.path.join(self.directory, f"{trace_id}.json")
+            if os.path.exists(path):  # late spans are merged into the trace already written
+                with open(path) as f:
+                    records = json.load(f)["spans"] + records
+            with open(path, "w") as f:
+                json.dump({"trace_id": trace_id, "spans": records}, f, indent=2)
+
+
+class OTLPHTTPExporter(BackgroundExporter):
+    """Posts traces as OTLP/JSON to a collector (e.g. http://localhost:4318/v1/traces)"""
+
+    thread_name = "otlp-exporter"
+
+    def __init__(self, endpoint: str, service_name: str = "restaurant-finder-api"):
+        self.endpoint = endpoint
+        self.service_name = service_name
+        self._session = None
+        super().__init__()
+
+    def _write(self, traces: List[List[Span]]) -> None:
+        if self._session is None:
+            import requests
+            self._session = requests.Session()
+        spans = [span for trace in traces for span in trace]
+        self._session.post(self.endpoint, json=self._payload(spans), timeout=5)
+
+    def _payload(self, spans: List[Span]) -> Dict:
+        return {"resourceSpans": [{
+            "resource": {"attributes": [_otlp_attribute("service.name", self.service_name)]},
+            "scopeSpans": [{
+                "scope": {"name": "app.utils.tracing"},
+                "spans": [{
+                    "traceId": span.trace_id,
+                    "spanId": span.span_id,
+                    "parentSpanId": span.parent_id or "",
+                    "name": span.name,
+                    "kind": 1,
+                    "startTimeUnixNano": str(span.start_ns),
+                    "endTimeUnixNano": str(span.end_ns),
+                    "attributes": [_otlp_attribute(k, v) for k, v in span.attributes.items()],
+                    "status": {"code": 2 if span.status == "error" else 1, "message": span.status_message},
+                } for span in spans],
+            }],
+        }]}
+
+
+def _otlp_attribute(key: str, value: Any) -> Dict:
+    if isinstance(value, bool):
+        return {"key": key, "value": {"boolValue": value}}
+    if isinstance(value, int):
+        return {"key": key, "value": {"intValue": str(value)}}
+    if isinstance(value, float):
+        return {"key": key, "value": {"doubleValue": value}}
+    return {"key": key, "value": {"stringValue": str(value)}}
+
+
+class Tracer:
+    """Collects the spans of each trace and hands the whole trace to the exporter when its root ends"""
+
+    def __init__(self, exporter=None, sample_rate: float = 1.0):
+        self.exporter = exporter
+        self.sample_rate = sample_rate
+        self._traces: Dict[str, List[Span]] = {}
+        self._open_roots = set()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.exporter is not None
+
+    @contextmanager
+    def span(self, name: str, **attributes):
+        """Time the with-block as a child of the current span (or as a new trace root)"""
+        parent = _current_span.get()
+        if not self.enabled or parent is NOOP_SPAN:
+            yield NOOP_SPAN
+            return
+        if parent is None and random.random() >= self.sample_rate:
+            token = _current_span.set(NOOP_SPAN)
+            try:
+                yield NOOP_SPAN
+            finally:
+                _reset(token, parent)
+            return
+
+        trace_id = parent.trace_id if parent else secrets.token_hex(16)
+        span = Span(name, trace_id, parent.span_id if parent else None, attributes)
+        if parent is None:
+            with self._lock:
+                self._open_roots.add(trace_id)
+        token = _current_span.set(span)
+        try:
+            yield span
+        except Exception as e:
+            span.set_error(e)
+            raise
+        finally:
+            span.end_ns = time.time_ns()
+            _reset(token, parent)
+            self._finish(span, is_root=parent is None)
+
+    def _finish(self, span: Span, is_root: bool) -> None:
+        with self._lock:
+            if is_root:
+                self._open_roots.discard(span.trace_id)
+                spans = self._traces.pop(span.trace_id, []) + [span]
+            elif span.trace_id in self._open_roots:
+                self._traces.setdefault(span.trace_id, []).append(span)
+                return
+            else:
+                # Work that outlived its request (e.g. a shared search after the client left)
+                spans = [span]
+        try:
+            self.exporter.export(sorted(spans, key=lambda s: s.start_ns))
+        except Exception as e:
+            print(f"⚠️ Trace export failed: {e}")
+
+    def shutdown(self) -> None:
+        if self.exporter is not None:
+            self.exporter.shutdown()
+
+
+def _reset(token, parent) -> None:
+    try:
+        _current_span.reset(token)
+    except ValueError:
+        # Async generators may finish a span from another context - restore the parent directly
+        _current_span.set(parent)
+
+
+def current_span():
+    """The innermost active span, or a no-op span"""
+    return _current_span.get() or NOOP_SPAN
+
+
+def create_exporter(kind: str):
+    kind = (kind or "none").lower()
+    if kind == "json":
+        return JSONFileExporter(settings.TRACE_DIR)
+    if kind == "otlp":
+        return OTLPHTTPExporter(settings.OTLP_ENDPOINT)
+    return None
+
+
+tracer = Tracer(create_exporter(settings.TRACING_EXPORTER), settings.TRACE_SAMPLE_RATE)
+
+
+def start_span(name: str, **attributes):
+    """Context manager for a span on the global tracer"""
+    return tracer.span(name, **attributes)
+
+
+class TracingMiddleware:
+    """
+    ASGI middleware that opens a root span per HTTP request.
+
+    It wraps the whole ASGI call, so streamed responses are traced until their
+    last byte. The trace id is returned in the X-Trace-Id response header.
+    """
+
+    def __init__(self, app, exclude_paths=("/health", "/metrics")):
+        self.app = app
+        self.exclude_paths = set(exclude_paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not tracer.enabled or scope.get("path") in self.exclude_paths:
+            await self.app(scope, receive, send)
+            return
+
+        with start_span(f"{scope['method']} {scope['path']}", **{
+            "http.method": scope["method"],
+            "http.target": scope["path"],
+        }) as span:
+            async def send_with_trace(message):
+                if message["type"] == "http.response.start":
+                    span.set_attribute("http.status_code", message["status"])
+                    if span.trace_id:
+                        headers = list(message.get("headers", []))
+                        headers.append((b"x-trace-id", span.trace_id.encode()))
+                        message = {**message, "headers": headers}
+                await send(message)
+
+            await self.app(scope, receive, send_with_trace)
@@ -0,0 +1 @@
+# Offline benchmarks for the search pipeline (python -m benchmarks.run)
@@ -0,0 +1,236 @@
+"""
+Offline stand-ins for Gemini, Google Maps and restaurant websites
+
+Each one replays a recorded fixture (benchmarks/fixtures/*.json) and sleeps for
+the recorded upstream latency, scaled and jittered, so the pipeline can be
+benchmarked without network access or API keys.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import random
+import time
+from types import SimpleNamespace
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+def load_fixture(name: str) -> Dict:
+    """Load a fixture by file name (without .json) or path"""
+    path = name if os.path.exists(name) else os.path.join(FIXTURES_DIR, f"{name}.json")
+    with open(path) as f:
+        return json.load(f)
+
+
+class Latency:
+    """Turns recorded latencies into sleep times: scaled, with +/- jitter"""
+
+    def __init__(self, scale: float = 1.0, jitter: float = 0.2, seed: Optional[int] = None):
+        self.scale = scale
+        self.jitter = jitter
+        self._random = random.Random(seed)
+
+    def seconds(self, recorded_ms: float) -> float:
+        base = recorded_ms / 1000 * self.scale
+        return max(0.0, base * (1 + self._random.uniform(-self.jitter, self.jitter)))
+
+
+def _usage(recording: Dict):
+    usage = recording.get("usage")
+    return SimpleNamespace(**usage) if usage else None
+
+
+def render_text(recording: Dict) -> str:
+    """The model output for a recording, formatted the way Gemini writes it"""
+    if "text" in recording:
+        return recording["text"]
+    text = json.dumps(recording["response"], indent=2)
+    return f"```json\n{text}\n```" if recording.get("fenced") else text
+
+
+class ReplayResponse:
+    def __init__(self, text: str, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class ReplayStream:
+    """Async iterable of response chunks, like generate_content_async(stream=True)"""
+
+    def __init__(self, text: str, chunk_chars: int, chunk_delay: float, usage_metadata=None):
+        self.chunks = [text[i:i + chunk_chars] for i in range(0, len(text), chunk_chars)] or [""]
+        self.chunk_delay = chunk_delay
+        self.usage_metadata = usage_metadata
+
+    async def __aiter__(self):
+        for index, chunk in enumerate(self.chunks):
+            if index:
+                await asyncio.sleep(self.chunk_delay)
+            yield ReplayResponse(chunk)
+
+
+class ReplayModel:
+    """
+    Drop-in for genai.GenerativeModel that answers every prompt with one recording.
+
+    Streamed calls wait for a time-to-first-chunk share of the recorded latency and
+    spread the rest over the chunks, as a real streaming response would.
+    """
+
+    FIRST_CHUNK_SHARE = 0.3
+
+    def __init__(self, recording: Dict, latency: Latency, chunk_chars: int = 160):
+        self.recording = recording
+        self.latency = latency
+        self.chunk_chars = chunk_chars
+        self.calls = 0
+        self.prompt_chars = 0
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        self.calls += 1
+        self.prompt_chars += len(str(prompt))
+        text = render_text(self.recording)
+        total = self.latency.seconds(self.recording.get("latency_ms", 0))
+        if not stream:
+            await asyncio.sleep(total)
+            return ReplayResponse(text, _usage(self.recording))
+
+        response = ReplayStream(text, self.chunk_chars, 0.0, _usage(self.recording))
+        await asyncio.sleep(total * self.FIRST_CHUNK_SHARE)
+        response.chunk_delay = total * (1 - self.FIRST_CHUNK_SHARE) / max(1, len(response.chunks) - 1)
+        return response
+
+
+class DietaryReplayModel(ReplayModel):
+    """
+    ReplayModel for the dietary validator that also answers batched checks: a
+    restaurant supports a requirement if the recording's validated list has it.
+    """
+
+    CHECKS_HEADER = "CHECKS (restaurant id: requirements):\n"
+
+    async def generate_content_async(self, prompt, stream: bool = False, **kwargs):
+        prompt = str(prompt)
+        if self.CHECKS_HEADER not in prompt:
+            return await super().generate_content_async(prompt, stream=stream, **kwargs)
+        self.calls += 1
+        self.prompt_chars += len(prompt)
+        await asyncio.sleep(self.latency.seconds(self.recording.get("latency_ms", 0)))
+        return ReplayResponse(json.dumps({"verdicts": self._verdicts(prompt)}), _usage(self.recording))
+
+    def _verdicts(self, prompt: str) -> List[Dict]:
+        from app.utils.helpers import normalize_text
+
+        # Restaurant ids are "<name slug>_<digest>", see make_restaurant_id
+        supported = {
+            "_".join(normalize_text(r["name"]).split()): r
+            for r in self.recording["response"].get("validated_restaurants", [])
+        }
+        checks = prompt.split(self.CHECKS_HEADER, 1)[1].split("\n\n", 1)[0]
+        verdicts = []
+        for line in checks.splitlines():
+            restaurant_id, _, requirements = line.partition(": ")
+            match = supported.get(restaurant_id.rsplit("_", 1)[0])
+            for requirement in requirements.split(", "):
+                verdicts.append({
+                    "id": restaurant_id,
+                    "requirement": requirement,
+                    "supported": match is not None,
+                    "confidence": match.get("dietary_match_confidence", 90) if match else 20,
+                    "matching_menu_items": match.get("matching_menu_items", []) if match else [],
+                    "notes": match.get("dietary_validation_notes", "") if match else f"Too few {requirement} options",
+                })
+        return verdicts
+
+
+class ReplayMapsClient:
+    """Drop-in for googlemaps.Client (geocode, places text search and place details); calls block like the real SDK"""
+
+    def __init__(self, recording: Dict, latency: Latency):
+        self.recording = recording
+        self.latency = latency
+        self.calls: Dict[str, int] = {"geocode": 0, "places": 0, "place": 0}
+
+    def _wait(self, kind: str) -> None:
+        self.calls[kind] += 1
+        time.sleep(self.latency.seconds(self.recording.get(kind, {}).get("latency_ms", 0)))
+
+    def geocode(self, address: str, **kwargs) -> List[Dict]:
+        self._wait("geocode")
+        return self.recording["geocode"]["response"]
+
+    def places(self, query: str, **kwargs) -> Dict:
+        self._wait("places")
+        query = query.lower()
+        results = [place for place in self.recording["places"]["results"] if place["name"].lower() in query]
+        return {"status": "OK" if results else "ZERO_RESULTS", "results": results}
+
+    def place(self, place_id: str, fields=None, **kwargs) -> Dict:
+        self._wait("place")
+        for place in self.recording["places"]["results"]:
+            if place["place_id"] == place_id:
+                return {"status": "OK", "result": {"name": place["name"], "photos": place.get("photos", [])}}
+        return {"status": "NOT_FOUND", "result": {}}
+
+
+def website_transport(recording: Dict, latency: Latency, calls: Optional[Dict[str, int]] = None) -> httpx.MockTransport:
+    """httpx transport serving the recorded homepages, with ETags so revalidation returns 304"""
+    pages = {_site_key(url): html for url, html in recording["pages"].items()}
+    calls = calls if calls is not None else {}
+
+    async def handle(request: httpx.Request) -> httpx.Response:
+        calls["website"] = calls.get("website", 0) + 1
+        await asyncio.sleep(latency.seconds(recording.get("latency_ms", 0)))
+        html = pages.get(_site_key(str(request.url)))
+        if html is None:
+            return httpx.Response(404, text="Not found")
+        etag = '"' + hashlib.sha1(html.encode()).hexdigest()[:16] + '"'
+        if request.headers.get("if-none-match") == etag:
+            return httpx.Response(304, headers={"ETag": etag})
+        return httpx.Response(200, text=html, headers={
+            "Content-Type": "text/html; charset=utf-8", "ETag": etag, "Cache-Control": "max-age=3600"
+        })
+
+    return httpx.MockTransport(handle)
+
+
+def _site_key(url: str) -> str:
+    parts = urlsplit(url)
+    host = parts.netloc.lower()
+    return host[4:] if host.startswith("www.") else host
+
+
+class Replay:
+    """Installs the replay stand-ins into a GeminiAgentService and keeps their call counts"""
+
+    def __init__(self, fixture: Dict, latency: Latency):
+        self.fixture = fixture
+        self.latency = latency
+        self.models: Dict[str, ReplayModel] = {}
+        self.maps: Optional[ReplayMapsClient] = None
+        self.website_calls: Dict[str, int] = {}
+
+    def install(self, service) -> None:
+        from app.services.http_client import set_async_transport
+
+        for agent in (service.web_scraper, service.data_transformer, service.dietary_validator, service.single_pass):
+            model_class = DietaryReplayModel if agent is service.dietary_validator else ReplayModel
+            model = model_class(self.fixture["gemini"][agent.agent_name], self.latency)
+            agent._model = model
+            self.models[agent.agent_name] = model
+        self.maps = ReplayMapsClient(self.fixture["maps"], self.latency)
+        service.web_scraper.google_maps.client = self.maps
+        set_async_transport(website_transport(self.fixture["websites"], self.latency, self.website_calls))
+
+    def call_counts(self) -> Dict[str, int]:
+        counts = {f"gemini.{name}": model.calls for name, model in self.models.items()}
+        if self.maps:
+            counts.update({f"maps.{kind}": calls for kind, calls in self.maps.calls.items()})
+        counts.update(self.website_calls)
+        return counts
@@ -0,0 +1,259 @@
+"""
+Offline search benchmark: replays recorded upstream responses and measures the pipeline
+
+Drives GeminiAgentService.search_restaurants_async and the /api/restaurants/search
+route at several concurrency levels and reports throughput, latency percentiles
+and allocations (tracemalloc).
+
+Usage (from backend/):
+    python -m benchmarks.run
+    python -m benchmarks.run --target service --concurrency 1,8,32 --requests 64
+    python -m benchmarks.run --latency-scale 0.1 --save before.json
+    python -m benchmarks.run --latency-scale 0.1 --compare before.json
+"""
+
+import argparse
+import asyncio
+import contextlib
+import gc
+import json
+import math
+import os
+import sys
+import time
+import tracemalloc
+from typing import Awaitable, Callable, Dict, List
+
+# Offline, in-memory configuration; anything already set in the environment wins
+BENCHMARK_ENV = {
+    "GEMINI_API_KEY": "offline-benchmark",
+    "CACHE_BACKEND": "memory",
+    "PLACE_CACHE_BACKEND": "memory",
+    "WEBSITE_IMAGE_CACHE_BACKEND": "memory",
+    "GEOCODE_CACHE_BACKEND": "memory",
+    "DIETARY_VERDICT_CACHE_BACKEND": "memory",
+    "PHOTO_CACHE_BACKEND": "memory",
+    "RESTAURANT_STORE_BACKEND": "memory",
+    "SPATIAL_SHORTCUT_ENABLED": "false",  # every request should reach the pipeline
+    "WARM_UP_ON_STARTUP": "false",
+    "TRACING_EXPORTER": "none",
+}
+for key, value in BENCHMARK_ENV.items():
+    os.environ.setdefault(key, value)
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import httpx  # noqa: E402
+from benchmarks.replay import Latency, Replay, load_fixture  # noqa: E402
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile of a list of numbers"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+async def drive(request: Callable[[int], Awaitable[bool]], concurrency: int, total: int) -> Dict:
+    """Issue `total` requests from `concurrency` workers and time each one"""
+    latencies: List[float] = []
+    errors = 0
+    next_index = iter(range(total))
+
+    async def worker():
+        nonlocal errors
+        for index in next_index:
+            started = time.perf_counter()
+            try:
+                ok = await request(index)
+            except Exception as e:
+                print(f"❌ Request {index} failed: {type(e).__name__}: {e}", file=sys.stderr)
+                ok = False
+            latencies.append(time.perf_counter() - started)
+            if not ok:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+    return {
+        "requests": total,
+        "errors": errors,
+        "seconds": round(elapsed, 3),
+        "throughput": round(total / elapsed, 2) if elapsed else 0.0,
+        "p50_ms": round(percentile(latencies, 50) * 1000, 1),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 1),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 1),
+    }
+
+
+def reset_caches(service) -> None:
+    """Start each scenario cold: no cached searches, places, website images, geocodes or dietary verdicts"""
+    service.search_cache.clear()
+    service.dietary_scheduler.cache.clear()
+    service.web_scraper.google_maps.place_cache.clear()
+    service.web_scraper.google_maps.website_image_cache.clear()
+    service.web_scraper.geocoder.cache.clear()
+
+
+def make_request(target: str, service, client: httpx.AsyncClient, search: Dict, args, run_id: str):
+    def location(index: int) -> str:
+        # Distinct locations keep the search cache and request coalescing out of the measurement
+        if args.queries == "repeat":
+            return search["location"]
+        return f"{search['location']} (benchmark {run_id}-{index})"
+
+    async def via_service(index: int) -> bool:
+        result = await service.search_restaurants_async(location(index), search["filters"])
+        return bool(result.get("restaurants"))
+
+    async def via_route(index: int) -> bool:
+        response = await client.post("/api/restaurants/search", json={
+            "location": location(index), "filters": search["filters"]
+        })
+        return response.status_code == 200 and bool(response.json().get("restaurants"))
+
+    return via_service if target == "service" else via_route
+
+
+async def run_scenario(target: str, concurrency: int, service, client, search: Dict, args) -> Dict:
+    run_id = f"{target}-{concurrency}-{time.time_ns()}"
+    reset_caches(service)
+    request = make_request(target, service, client, search, args, run_id)
+    result = await drive(request, concurrency, args.requests)
+
+    if args.allocations:
+        # Separate pass so tracemalloc overhead doesn't distort the latencies above
+        reset_caches(service)
+        request = make_request(target, service, client, search, args, run_id + "-alloc")
+        gc.collect()
+        tracemalloc.start()
+        before = tracemalloc.take_snapshot()
+        await drive(request, concurrency, args.requests)
+        gc.collect()
+        after = tracemalloc.take_snapshot()
+        current, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        result.update({
+            "peak_kib": round(peak / 1024, 1),
+            "retained_kib": round(current / 1024, 1),
+        })
+        if args.alloc_top:
+            result["top_allocations"] = [
+                str(stat) for stat in after.compare_to(before, "lineno")[:args.alloc_top]
+            ]
+    return result
+
+
+async def run_all(args) -> List[Dict]:
+    fixture = load_fixture(args.fixture)
+    search = fixture["search"]
+
+    from app import app
+    from app.dependencies import get_gemini_service
+    from app.services.http_client import close_http_clients
+
+    service = get_gemini_service()
+    if args.pipeline:
+        service.pipeline_mode = args.pipeline  # the route has no per-request pipeline option
+    replay = Replay(fixture, Latency(args.latency_scale, args.jitter, args.seed))
+    replay.install(service)
+
+    results = []
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://benchmark", timeout=None) as client:
+        for target in args.targets:
+            for concurrency in args.concurrency:
+                with quiet(args.verbose):
+                    result = await run_scenario(target, concurrency, service, client, search, args)
+                result.update(target=target, concurrency=concurrency)
+                results.append(result)
+                print_result(result)
+    await close_http_clients()
+    print(f"\nUpstream calls: {replay.call_counts()}")
+    return results
+
+
+@contextlib.contextmanager
+def quiet(verbose: bool):
+    """Silence the pipeline's progress prints while measuring"""
+    if verbose:
+        yield
+        return
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def print_header(args) -> None:
+    print("=" * 100)
+    print(f"🏁 Offline search benchmark: fixture={args.fixture} pipeline={args.pipeline or 'default'} "
+          f"latency_scale={args.latency_scale} queries={args.queries} requests={args.requests}")
+    print("=" * 100)
+    print(f"{'target':8} {'conc':>5} {'req/s':>8} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'errors':>7}"
+          f" {'peak KiB':>10} {'kept KiB':>9}")
+
+
+def print_result(result: Dict) -> None:
+    print(f"{result['target']:8} {result['concurrency']:>5} {result['throughput']:>8} {result['p50_ms']:>9}"
+          f" {result['p95_ms']:>9} {result['p99_ms']:>9} {result['errors']:>7}"
+          f" {result.get('peak_kib', '-'):>10} {result.get('retained_kib', '-'):>9}")
+    for line in result.get("top_allocations", []):
+        print(f"    {line}")
+
+
+def print_comparison(results: List[Dict], baseline_path: str) -> None:
+    """Show each scenario's change against a saved run (negative latency change = faster)"""
+    with open(baseline_path) as f:
+        baseline = {(r["target"], r["concurrency"]): r for r in json.load(f)["results"]}
+
+    def change(new, old):
+        return f"{(new - old) / old * 100:+.1f}%" if old else "n/a"
+
+    print(f"\n📊 Compared with {baseline_path}")
+    for result in results:
+        old = baseline.get((result["target"], result["concurrency"]))
+        if not old:
+            continue
+        print(f"{result['target']:8} {result['concurrency']:>5}  req/s {change(result['throughput'], old['throughput']):>8}"
+              f"  p50 {change(result['p50_ms'], old['p50_ms']):>8}  p95 {change(result['p95_ms'], old['p95_ms']):>8}"
+              f"  p99 {change(result['p99_ms'], old['p99_ms']):>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--fixture", default="sf_vegetarian", help="fixture name in benchmarks/fixtures or a path")
+    parser.add_argument("--target", choices=["service", "route", "both"], default="both")
+    parser.add_argument("--concurrency", default="1,4,16", help="comma-separated concurrency levels")
+    parser.add_argument("--requests", type=int, default=32, help="requests per scenario")
+    parser.add_argument("--pipeline", choices=["three_stage", "single_pass"], default=None)
+    parser.add_argument("--queries", choices=["distinct", "repeat"], default="distinct",
+                        help="repeat sends one query, exercising the search cache and coalescing")
+    parser.add_argument("--latency-scale", type=float, default=1.0, help="multiplier for recorded latencies (0 = none)")
+    parser.add_argument("--jitter", type=float, default=0.2, help="+/- fraction of random latency variation")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--no-allocations", dest="allocations", action="store_false",
+                        help="skip the tracemalloc pass")
+    parser.add_argument("--alloc-top", type=int, default=0, help="show the N largest allocation sites")
+    parser.add_argument("--save", help="write results to this JSON file")
+    parser.add_argument("--compare", help="compare with results saved by --save")
+    parser.add_argument("--verbose", action="store_true", help="keep the pipeline's progress output")
+    args = parser.parse_args()
+    args.targets = ["service", "route"] if args.target == "both" else [args.target]
+    args.concurrency = [int(level) for level in args.concurrency.split(",")]
+
+    print_header(args)
+    results = asyncio.run(run_all(args))
+
+    if args.save:
+        with open(args.save, "w") as f:
+            json.dump({"args": {k: v for k, v in vars(args).items() if k not in ("save", "compare")},
+                       "results": results}, f, indent=2)
+        print(f"💾 Saved results to {args.save}")
+    if args.compare:
+        print_comparison(results, args.compare)
+
+
+if __name__ == "__main__":
+    main()
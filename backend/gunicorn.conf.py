@@ -0,0 +1,27 @@
+"""
+Gunicorn configuration for running the API with uvicorn workers
+
+Usage: gunicorn -c gunicorn.conf.py app:app
+
+Values come from Settings (SERVER_* and WEB_CONCURRENCY env vars), so
+gunicorn and serve.py behave the same.
+"""
+
+from app.config import settings
+from serve import use_shared_backends
+
+bind = f"{settings.SERVER_HOST}:{settings.SERVER_PORT}"
+workers = settings.WEB_CONCURRENCY
+# UvicornWorker picks uvloop and httptools automatically when they are installed
+worker_class = "uvicorn.workers.UvicornWorker"
+backlog = settings.SERVER_BACKLOG
+keepalive = settings.SERVER_KEEPALIVE
+# Workers get this long after SIGTERM to finish in-flight searches
+graceful_timeout = settings.SERVER_GRACEFUL_TIMEOUT
+# Searches can legitimately take a while; only kill truly stuck workers
+timeout = max(120, settings.SERVER_GRACEFUL_TIMEOUT * 2)
+max_requests = settings.SERVER_MAX_REQUESTS
+max_requests_jitter = settings.SERVER_MAX_REQUESTS // 10
+forwarded_allow_ips = "*"
+
+use_shared_backends(workers)
@@ -0,0 +1,69 @@
+"""
+Measure backend import time and time to a first /health response
+
+Usage: python measure_startup.py [--top N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+HEALTH_CHECK = """
+import time
+started = time.perf_counter()
+from fastapi.testclient import TestClient
+from app import app
+imported = time.perf_counter()
+with TestClient(app) as client:
+    client.get('/health').raise_for_status()
+    ready = time.perf_counter()
+print(f"{imported - started:.3f} {ready - started:.3f}")
+"""
+
+
+def run_python(code: str, *flags: str) -> subprocess.CompletedProcess:
+    """Run code in a fresh interpreter so nothing is already imported"""
+    env = dict(os.environ, WARM_UP_ON_STARTUP="false")
+    return subprocess.run(
+        [sys.executable, *flags, "-c", code],
+        cwd=BACKEND_DIR, env=env, capture_output=True, text=True
+    )
+
+
+def import_times(top: int):
+    """Parse `python -X importtime` output into the slowest modules by cumulative time"""
+    result = run_python("import app", "-X", "importtime")
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        self_us, cumulative_us, module = [part.strip() for part in line[len("import time:"):].split("|")]
+        rows.append((int(cumulative_us), int(self_us), module))
+    rows.sort(reverse=True)
+    return rows[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--top", type=int, default=15, help="number of slowest imports to show")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("⏱️  Import time for `import app` (cumulative, slowest first)")
+    print("=" * 60)
+    for cumulative_us, self_us, module in import_times(args.top):
+        print(f"{cumulative_us / 1000:9.1f} ms  {self_us / 1000:8.1f} ms self  {module}")
+
+    result = run_python(HEALTH_CHECK)
+    if result.returncode != 0:
+        print(f"\n❌ Health check failed:\n{result.stderr}")
+        sys.exit(1)
+    imported, ready = result.stdout.strip().splitlines()[-1].split()
+    print(f"\n✓ App imported in {float(imported):.3f}s, first /health answered after {float(ready):.3f}s")
+
+
+if __name__ == "__main__":
+    main()
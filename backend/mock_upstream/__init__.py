@@ -0,0 +1 @@
+# Local fake upstream (Gemini, Google Maps, websites) and load tester
@@ -0,0 +1,149 @@
+"""
+Open-loop load test for POST /api/restaurants/search, stepping up the request rate
+
+Requests are started on a fixed schedule (not when earlier ones finish), so a
+saturated server shows up as growing latency and errors instead of a silently
+lower request rate. Each step reports achieved throughput, latency percentiles
+and errors; the run stops at the first step that breaks the latency or error
+budget and reports the last healthy rate as the saturation point.
+
+Usage (from backend/, with the app running against mock_upstream.server):
+    python -m mock_upstream.loadtest --url http://127.0.0.1:8000 --rates 25,50,100,200,400 --duration 20
+    python -m mock_upstream.loadtest --repeat-ratio 0.5   # half the searches repeat earlier ones (cache hits)
+"""
+
+import argparse
+import asyncio
+import math
+import random
+import time
+from collections import Counter
+from typing import Dict, List
+
+import httpx
+
+LOCATIONS = ["San Francisco, CA", "Oakland, CA", "Berkeley, CA", "San Jose, CA", "Palo Alto, CA"]
+FILTERS = [
+    {"dietary": ["Vegetarian"], "minRating": 4.0},
+    {"dietary": ["Vegan"], "budget": ["$$"]},
+    {"cuisines": ["Italian"], "minRating": 3.5},
+    {"dietary": ["Gluten-Free"], "serviceType": ["Takeout"]},
+]
+
+
+def percentile(values: List[float], pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[max(0, min(len(ordered) - 1, math.ceil(pct / 100 * len(ordered)) - 1))]
+
+
+class QueryMix:
+    """Distinct searches, with a share repeating an earlier one to exercise caching and coalescing"""
+
+    def __init__(self, repeat_ratio: float, seed: int):
+        self.repeat_ratio = repeat_ratio
+        self.random = random.Random(seed)
+        self.seen: List[Dict] = []
+        self.counter = 0
+
+    def next(self) -> Dict:
+        if self.seen and self.random.random() < self.repeat_ratio:
+            return self.random.choice(self.seen)
+        self.counter += 1
+        query = {
+            "location": f"{self.random.choice(LOCATIONS)} (load {self.counter})",
+            "filters": self.random.choice(FILTERS),
+        }
+        self.seen.append(query)
+        return query
+
+
+async def run_step(client: httpx.AsyncClient, url: str, rate: float, duration: float, queries: QueryMix) -> Dict:
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+
+    async def one(query: Dict):
+        started = time.perf_counter()
+        try:
+            response = await client.post(f"{url}/api/restaurants/search", json=query)
+            outcomes[str(response.status_code)] += 1
+        except httpx.HTTPError as e:
+            outcomes[type(e).__name__] += 1
+        latencies.append(time.perf_counter() - started)
+
+    tasks = []
+    started = time.perf_counter()
+    total = int(rate * duration)
+    for index in range(total):
+        # Fixed schedule: request i starts at i / rate seconds, however slow the server is
+        delay = started + index / rate - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        tasks.append(asyncio.create_task(one(queries.next())))
+    await asyncio.gather(*tasks)
+    elapsed = time.perf_counter() - started
+
+    errors = sum(count for outcome, count in outcomes.items() if outcome != "200")
+    return {
+        "rate": rate,
+        "requests": total,
+        "achieved": round(outcomes["200"] / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000),
+        "p95_ms": round(percentile(latencies, 95) * 1000),
+        "p99_ms": round(percentile(latencies, 99) * 1000),
+        "error_rate": round(errors / total, 4) if total else 0.0,
+        "outcomes": dict(outcomes),
+    }
+
+
+async def run(args) -> None:
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    timeout = httpx.Timeout(args.timeout)
+    queries = QueryMix(args.repeat_ratio, args.seed)
+    saturation = None
+
+    print("=" * 90)
+    print(f"🚦 Load test: {args.url}  step={args.duration}s  repeat_ratio={args.repeat_ratio}"
+          f"  budget: p99<={args.p99_budget_ms}ms, errors<={args.error_budget:.1%}")
+    print("=" * 90)
+    print(f"{'target/s':>9} {'ok/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'errors':>8}  outcomes")
+
+    async with httpx.AsyncClient(limits=limits, timeout=timeout) as client:
+        await client.get(f"{args.url}/health")
+        for rate in args.rates:
+            result = await run_step(client, args.url, rate, args.duration, queries)
+            print(f"{result['rate']:>9} {result['achieved']:>8} {result['p50_ms']:>8} {result['p95_ms']:>8}"
+                  f" {result['p99_ms']:>8} {result['error_rate']:>8.2%}  {result['outcomes']}")
+            if result["p99_ms"] > args.p99_budget_ms or result["error_rate"] > args.error_budget:
+                print(f"\n🔥 Budget exceeded at {rate}/s")
+                break
+            saturation = rate
+            if args.pause:
+                await asyncio.sleep(args.pause)
+
+    if saturation is None:
+        print("❌ Even the lowest rate exceeded the budget")
+    else:
+        print(f"✓ Highest rate within budget: {saturation}/s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default="http://127.0.0.1:8000", help="base URL of the app under test")
+    parser.add_argument("--rates", default="10,25,50,100,200", help="comma-separated requests/second per step")
+    parser.add_argument("--duration", type=float, default=15, help="seconds per step")
+    parser.add_argument("--pause", type=float, default=2, help="seconds to let the server drain between steps")
+    parser.add_argument("--repeat-ratio", type=float, default=0.0, help="share of searches repeating an earlier one")
+    parser.add_argument("--p99-budget-ms", type=float, default=15000)
+    parser.add_argument("--error-budget", type=float, default=0.01, help="highest acceptable error rate")
+    parser.add_argument("--max-connections", type=int, default=2000)
+    parser.add_argument("--timeout", type=float, default=60)
+    parser.add_argument("--seed", type=int, default=1)
+    args = parser.parse_args()
+    args.rates = [float(rate) for rate in args.rates.split(",")]
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,441 @@
+"""
+Fake upstream for load tests: Gemini REST, Google Maps web services and restaurant websites
+
+Serves canned but realistic responses with lognormal latency, injected errors
+and configurable page sizes, so the whole FastAPI app can be load-tested on one
+box without API keys or network access.
+
+Usage (from backend/):
+    python -m mock_upstream.server --port 9100 --gemini-latency 2500 --website-error-rate 0.02
+
+Then start the app against it:
+    GEMINI_API_BASE_URL=http://127.0.0.1:9100 GEMINI_API_KEY=mock \\
+    GOOGLE_MAPS_BASE_URL=http://127.0.0.1:9100 GOOGLE_MAPS_API_KEY=AIza-mock \\
+    python serve.py
+
+Settings can be changed while running: POST /_mock/config with a JSON object of
+the fields below; GET /_mock/stats returns request and error counts.
+"""
+
+import argparse
+import asyncio
+import base64
+import dataclasses
+import hashlib
+import json
+import math
+import random
+import re
+from collections import Counter
+from typing import Dict, List, Optional
+
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import HTMLResponse, JSONResponse, Response, StreamingResponse
+
+
+@dataclasses.dataclass
+class MockConfig:
+    """Latency (median ms, lognormal sigma), error rate (0-1) and payload shape per upstream"""
+
+    gemini_latency_ms: float = 2500
+    gemini_sigma: float = 0.35
+    gemini_error_rate: float = 0.0
+    gemini_chunk_chars: int = 200
+    maps_latency_ms: float = 120
+    maps_sigma: float = 0.3
+    maps_error_rate: float = 0.0
+    website_latency_ms: float = 300
+    website_sigma: float = 0.6
+    website_error_rate: float = 0.02
+    website_page_kb: int = 64
+    website_image_rate: float = 0.8  # share of pages that advertise an og:image
+    restaurants: int = 8
+    public_url: str = "http://127.0.0.1:9100"  # where the app can reach this server (website links)
+
+
+config = MockConfig()
+stats: Counter = Counter()
+app = FastAPI(title="Mock upstream", docs_url=None, redoc_url=None)
+
+# Tiny valid JPEG served for Places photos and website images
+PIXEL_JPEG = base64.b64decode(
+    "/9j/4AAQSkZJRgABAQEASABIAAD/2wBDAP//////////////////////////////////////////////////////////////////////////////"
+    "////////////////////////wgALCAABAAEBAREA/8QAFBABAAAAAAAAAAAAAAAAAAAAAP/aAAgBAQABPxA="
+)
+
+ADJECTIVES = ["Golden", "Little", "Green", "Blue", "Rustic", "Urban", "Hidden", "Happy", "Wild", "Copper"]
+NOUNS = ["Garden", "Table", "Kitchen", "Spoon", "Lantern", "Harvest", "Bowl", "Olive", "Fig", "Ember"]
+CUISINES = ["Italian", "Mexican", "Japanese", "Thai", "Indian", "Mediterranean", "American", "Vietnamese"]
+DISHES = ["Roasted Vegetable Bowl", "Mushroom Risotto", "Chickpea Curry", "Tofu Banh Mi", "Falafel Plate",
+          "Margherita Pizza", "Vegetable Pad Thai", "Black Bean Tacos", "Miso Ramen", "Eggplant Parmesan"]
+
+
+def _latency(median_ms: float, sigma: float) -> float:
+    if median_ms <= 0:
+        return 0.0
+    return random.lognormvariate(math.log(median_ms / 1000), sigma)
+
+
+async def _upstream(kind: str) -> bool:
+    """Count the request, sleep for its latency and decide whether it fails"""
+    stats[f"{kind}_requests"] += 1
+    await asyncio.sleep(_latency(getattr(config, f"{kind}_latency_ms"), getattr(config, f"{kind}_sigma")))
+    if random.random() < getattr(config, f"{kind}_error_rate"):
+        stats[f"{kind}_errors"] += 1
+        return False
+    return True
+
+
+# ---------------------------------------------------------------------------
+# Canned data
+# ---------------------------------------------------------------------------
+
+def _slug(name: str) -> str:
+    return re.sub(r'[^a-z0-9]+', '-', name.lower()).strip('-')
+
+
+def make_restaurants(location: str, count: int, cuisines: Optional[List[str]] = None,
+                     budgets: Optional[List[str]] = None, min_rating: float = 3.6) -> List[Dict]:
+    """Deterministic restaurants for a location that fit the requested criteria, with websites hosted here"""
+    rng = random.Random(hashlib.sha1(location.encode()).hexdigest())
+    city = location.split('(')[0].strip() or "Springfield"
+    restaurants = []
+    for index in range(count):
+        name = f"{rng.choice(ADJECTIVES)} {rng.choice(NOUNS)} {index + 1}"
+        cuisine = [rng.choice(cuisines)] if cuisines else rng.sample(CUISINES, 2)
+        restaurants.append({
+            "name": name,
+            "address": f"{100 + index * 17} {rng.choice(NOUNS)} St, {city}",
+            "phone": f"+1 555-{rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+            "website": f"{config.public_url}/sites/{_slug(name)}",
+            "cuisine": cuisine,
+            "rating": round(rng.uniform(max(min_rating, 3.6), 4.9), 1),
+            "budget": rng.choice(budgets or ["$", "$$", "$$", "$$$"]),
+            "hours": "Mon-Sun 11am-10pm",
+            "wheelchair_accessible": rng.random() < 0.8,
+            "image": None,
+            "menu_items": [f"{dish} - house favourite" for dish in rng.sample(DISHES, 3)],
+            "service_types": ["Dine-in", "Takeout"] + (["Delivery"] if rng.random() < 0.5 else []),
+        })
+    return restaurants
+
+
+TABLE_LIST_COLUMNS = {"cuisine", "cuisines", "menu_items", "matching_menu_items", "service_types", "accessibility"}
+
+
+def _restaurants_in_prompt(prompt: str) -> List[Dict]:
+    """The restaurant list the pipeline embedded after 'RESTAURANTS (<encoding>):'"""
+    match = re.search(r"^RESTAURANTS[^\n]*:\n", prompt, re.MULTILINE)
+    if not match:
+        return []
+    text = prompt[match.end():].lstrip()
+    try:
+        restaurants, _ = json.JSONDecoder().raw_decode(text)
+        return [r for r in restaurants if isinstance(r, dict)]
+    except ValueError:
+        pass
+    # Table encoding: a "|"-separated header row, then one row per restaurant until a blank line
+    lines = text.split("\n\n", 1)[0].splitlines()
+    if len(lines) < 2 or "|" not in lines[0]:
+        return []
+    columns = lines[0].split("|")
+    restaurants = []
+    for line in lines[1:]:
+        row = dict(zip(columns, line.split("|")))
+        for column, value in row.items():
+            if column in TABLE_LIST_COLUMNS:
+                row[column] = [item for item in value.split(";") if item]
+            elif value in ("yes", "no"):
+                row[column] = value == "yes"
+        if row.get("rating"):
+            row["rating"] = float(row["rating"])
+        restaurants.append(row)
+    return restaurants
+
+
+def _scored(restaurants: List[Dict], keep: float, seed: str) -> List[Dict]:
+    rng = random.Random(seed)
+    kept = [dict(r) for r in restaurants if rng.random() < keep] or [dict(r) for r in restaurants[:1]]
+    for rank, restaurant in enumerate(kept):
+        menu = restaurant.get("menu_items") or []
+        restaurant.update({
+            "match_score": max(50, 96 - rank * 4),
+            "matching_menu_items": [item.split(' - ')[0] for item in menu[:2]],
+            "why_it_matches": f"{restaurant.get('name')} offers several dishes that fit the requested filters.",
+            "accessibility_features": ["Wheelchair accessible entrance"],
+            "tags": ["popular", "local favourite"],
+        })
+    return kept
+
+
+CHECKS_HEADER = "CHECKS (restaurant id: requirements):\n"
+
+
+def _verdicts(prompt: str) -> List[Dict]:
+    """Batched dietary checks: one verdict per restaurant and requirement, most supported"""
+    names = {r.get("id"): r.get("name") for r in _restaurants_in_prompt(prompt)}
+    verdicts = []
+    for line in prompt.split(CHECKS_HEADER, 1)[1].split("\n\n", 1)[0].splitlines():
+        restaurant_id, _, requirements = line.partition(": ")
+        for requirement in requirements.split(", "):
+            # Stable per restaurant and requirement, like a real model's judgement of the same menu
+            rng = random.Random(f"{restaurant_id}|{requirement}")
+            supported = rng.random() < 0.85
+            verdicts.append({
+                "id": restaurant_id,
+                "name": names.get(restaurant_id, ""),
+                "requirement": requirement,
+                "supported": supported,
+                "confidence": rng.randint(75, 98) if supported else rng.randint(10, 40),
+                "matching_menu_items": [f"{requirement} bowl"] if supported else [],
+                "notes": f"Several substantial {requirement} mains." if supported else f"Too few {requirement} options.",
+            })
+    return verdicts
+
+
+def gemini_answer(prompt: str) -> str:
+    """Pick the agent from the prompt and answer the way Gemini would"""
+    seed = hashlib.sha1(prompt.encode()).hexdigest()
+    if "data transformer" in prompt:
+        restaurants = _scored(_restaurants_in_prompt(prompt), 0.85, seed)
+        return json.dumps({
+            "transformed_restaurants": restaurants,
+            "total_matching": len(restaurants),
+            "search_summary": f"Found {len(restaurants)} restaurants matching your criteria",
+        }, indent=2)
+    if CHECKS_HEADER in prompt:
+        return json.dumps({"verdicts": _verdicts(prompt)})
+    if "dietary validation expert" in prompt:
+        restaurants = _scored(_restaurants_in_prompt(prompt), 0.8, seed)
+        for restaurant in restaurants:
+            restaurant["dietary_match_confidence"] = 90
+            restaurant["dietary_validation_notes"] = "Several substantial mains fit the requirements."
+        return "```json\n" + json.dumps({
+            "validated_restaurants": restaurants,
+            "total_validated": len(restaurants),
+            "removed_count": 0,
+        }, indent=2) + "\n```"
+    if "restaurant matching expert" in prompt:
+        restaurants = _scored(_restaurants_in_prompt(prompt), 0.75, seed)
+        for restaurant in restaurants:
+            restaurant["dietary_match_confidence"] = 88
+        return json.dumps({
+            "transformed_restaurants": restaurants,
+            "removed_count": 0,
+            "search_summary": f"Found {len(restaurants)} restaurants matching your criteria",
+        })
+    match = re.search(r"restaurants in (.+?) (?:matching|with these)", prompt)
+    location = match.group(1) if match else "Springfield"
+    cuisine = re.search(r"^Cuisines?: (.+)$", prompt, re.MULTILINE)
+    cuisines = [c.strip() for c in cuisine.group(1).split(",") if c.strip() not in ("", "Any")] if cuisine else []
+    budget = re.search(r"^Budget: (.+)$", prompt, re.MULTILINE)
+    budgets = re.findall(r"\$+", budget.group(1)) if budget else []
+    rating = re.search(r"^Min(?:imum)? Rating: ([\d.]+)", prompt, re.MULTILINE)
+    restaurants = make_restaurants(location, config.restaurants, cuisines, budgets, float(rating.group(1)) if rating else 3.6)
+    return "```json\n" + json.dumps(restaurants, indent=2) + "\n```"
+
+
+def _gemini_payload(text: str, prompt: str, final: bool = True) -> Dict:
+    payload = {"candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "index": 0}]}
+    if final:
+        payload["candidates"][0]["finishReason"] = "STOP"
+        payload["usageMetadata"] = {
+            "promptTokenCount": len(prompt) // 4,
+            "candidatesTokenCount": len(text) // 4,
+            "totalTokenCount": (len(prompt) + len(text)) // 4,
+        }
+    return payload
+
+
+# ---------------------------------------------------------------------------
+# Gemini REST API
+# ---------------------------------------------------------------------------
+
+@app.post("/v1beta/models/{model_method}")
+async def gemini(model_method: str, request: Request):
+    """generateContent and streamGenerateContent (?alt=sse)"""
+    _, _, method = model_method.partition(":")
+    body = await request.json()
+    prompt = "".join(part.get("text", "") for content in body.get("contents", []) for part in content.get("parts", []))
+
+    if method == "generateContent":
+        if not await _upstream("gemini"):
+            return JSONResponse({"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                                status_code=503)
+        return _gemini_payload(gemini_answer(prompt), prompt)
+
+    if method == "streamGenerateContent":
+        # Time to first chunk is ~30% of the latency, the rest is spread over the chunks
+        stats["gemini_requests"] += 1
+        total = _latency(config.gemini_latency_ms, config.gemini_sigma)
+        await asyncio.sleep(total * 0.3)
+        if random.random() < config.gemini_error_rate:
+            stats["gemini_errors"] += 1
+            return JSONResponse({"error": {"code": 503, "message": "The model is overloaded.", "status": "UNAVAILABLE"}},
+                                status_code=503)
+        text = gemini_answer(prompt)
+        size = config.gemini_chunk_chars
+        chunks = [text[i:i + size] for i in range(0, len(text), size)] or [""]
+        delay = total * 0.7 / max(1, len(chunks) - 1)
+
+        async def events():
+            for index, chunk in enumerate(chunks):
+                if index:
+                    await asyncio.sleep(delay)
+                payload = _gemini_payload(chunk, prompt, final=index == len(chunks) - 1)
+                yield f"data: {json.dumps(payload)}\r\n\r\n"
+
+        return StreamingResponse(events(), media_type="text/event-stream")
+
+    raise HTTPException(status_code=404, detail=f"Unknown method {method}")
+
+
+# ---------------------------------------------------------------------------
+# Google Maps web services (the endpoints googlemaps.Client calls)
+# ---------------------------------------------------------------------------
+
+def _maps_error() -> JSONResponse:
+    return JSONResponse({"status": "UNKNOWN_ERROR", "error_message": "Injected error"})
+
+
+@app.get("/maps/api/geocode/json")
+async def geocode(address: str = ""):
+    if not await _upstream("maps"):
+        return _maps_error()
+    rng = random.Random(address)
+    return {"status": "OK", "results": [{
+        "formatted_address": address,
+        "geometry": {"location": {"lat": round(37.70 + rng.random() * 0.1, 6), "lng": round(-122.50 + rng.random() * 0.1, 6)}},
+    }]}
+
+
+@app.get("/maps/api/place/textsearch/json")
+async def place_text_search(query: str = ""):
+    if not await _upstream("maps"):
+        return _maps_error()
+    name = query.split(" restaurant ")[0].strip() or query
+    rng = random.Random(query)
+    slug = _slug(name)
+    return {"status": "OK", "results": [{
+        "place_id": f"mock-{slug}",
+        "name": name,
+        "rating": round(rng.uniform(3.6, 4.9), 1),
+        "formatted_address": query,
+        "price_level": rng.randint(1, 3),
+        "types": ["restaurant", "food", "establishment"],
+        "geometry": {"location": {"lat": round(37.70 + rng.random() * 0.1, 6), "lng": round(-122.50 + rng.random() * 0.1, 6)}},
+        "photos": [{"photo_reference": f"mockphoto{slug.replace('-', '')}", "width": 1600, "height": 1200}],
+    }]}
+
+
+@app.get("/maps/api/place/details/json")
+async def place_details(place_id: str = ""):
+    if not await _upstream("maps"):
+        return _maps_error()
+    slug = place_id.replace("mock-", "")
+    return {"status": "OK", "result": {
+        "name": slug.replace("-", " ").title(),
+        "photos": [{"photo_reference": f"mockphoto{slug.replace('-', '')}", "width": 1600, "height": 1200}],
+    }}
+
+
+@app.get("/maps/api/place/photo")
+async def place_photo(photoreference: str = ""):
+    if not await _upstream("maps"):
+        return Response(status_code=500)
+    return Response(PIXEL_JPEG, media_type="image/jpeg")
+
+
+# ---------------------------------------------------------------------------
+# Restaurant websites
+# ---------------------------------------------------------------------------
+
+@app.get("/sites/{slug}/hero.jpg")
+async def website_image(slug: str):
+    return Response(PIXEL_JPEG, media_type="image/jpeg")
+
+
+@app.get("/sites/{slug}")
+async def website(slug: str, request: Request):
+    if not await _upstream("website"):
+        return Response("Internal Server Error", status_code=500)
+    html = render_page(slug)
+    etag = '"' + hashlib.sha1(html.encode()).hexdigest()[:16] + '"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304, headers={"ETag": etag})
+    return HTMLResponse(html, headers={"ETag": etag, "Cache-Control": "max-age=3600"})
+
+
+def render_page(slug: str) -> str:
+    """A homepage of about website_page_kb kilobytes, with the og:image on most pages"""
+    rng = random.Random(slug)
+    title = slug.replace("-", " ").title()
+    og_image = ""
+    if rng.random() < config.website_image_rate:
+        og_image = f'<meta property="og:image" content="{config.public_url}/sites/{slug}/hero.jpg">'
+    head = (f'<!DOCTYPE html><html><head><meta charset="utf-8"><title>{title}</title>'
+            f'<link rel="stylesheet" href="/styles.css">{og_image}</head><body>'
+            f'<header><img src="/logo.svg" alt="logo"><nav><a href="/menu">Menu</a></nav></header><main>')
+    item = "".join(f"<li><h3>{dish}</h3><p>Seasonal ingredients, made in house.</p></li>" for dish in DISHES)
+    body = []
+    size = len(head)
+    while size < config.website_page_kb * 1024:
+        body.append(item)
+        size += len(item)
+    tail = f'<img src="/sites/{slug}/dining.jpg" alt="Dining room" width="1200" height="800"></main></body></html>'
+    return head + "<ul>" + "".join(body) + "</ul>" + tail
+
+
+# ---------------------------------------------------------------------------
+# Control
+# ---------------------------------------------------------------------------
+
+@app.get("/_mock/config")
+async def get_config():
+    return dataclasses.asdict(config)
+
+
+@app.post("/_mock/config")
+async def update_config(changes: Dict):
+    fields = {field.name: field.type for field in dataclasses.fields(MockConfig)}
+    unknown = set(changes) - set(fields)
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown settings: {sorted(unknown)}")
+    for name, value in changes.items():
+        setattr(config, name, type(getattr(config, name))(value))
+    return dataclasses.asdict(config)
+
+
+@app.get("/_mock/stats")
+async def get_stats():
+    return dict(stats)
+
+
+@app.post("/_mock/stats/reset")
+async def reset_stats():
+    stats.clear()
+    return {}
+
+
+def main(argv: Optional[List[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    for field in dataclasses.fields(MockConfig):
+        if field.name != "public_url":
+            parser.add_argument(f"--{field.name.replace('_', '-')}", type=type(field.default), default=field.default)
+    parser.add_argument("--public-url", help="base URL the app uses to reach this server (default http://HOST:PORT)")
+    args = parser.parse_args(argv)
+
+    for field in dataclasses.fields(MockConfig):
+        if field.name != "public_url":
+            setattr(config, field.name, getattr(args, field.name))
+    config.public_url = args.public_url or f"http://{args.host}:{args.port}"
+
+    import uvicorn
+    print(f"🧪 Mock upstream listening on {config.public_url}")
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning", backlog=4096)
+
+
+if __name__ == "__main__":
+    main()
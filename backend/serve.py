@@ -0,0 +1,90 @@
+"""
+Production entry point: runs the API with multiple uvicorn worker processes
+
+Usage: python serve.py [--workers N] [--port PORT]
+
+Configuration comes from Settings (SERVER_* and WEB_CONCURRENCY env vars).
+For development with auto-reload use run.py instead.
+"""
+
+import argparse
+import importlib.util
+import os
+
+# Caches that must be shared by every worker process once there is more than one
+SHARED_BACKEND_SETTINGS = (
+    "CACHE_BACKEND",
+    "PLACE_CACHE_BACKEND",
+    "GEOCODE_CACHE_BACKEND",
+    "WEBSITE_IMAGE_CACHE_BACKEND",
+    "PHOTO_CACHE_BACKEND",
+    "DIETARY_VERDICT_CACHE_BACKEND",
+    "RESTAURANT_STORE_BACKEND",
+)
+
+
+def use_shared_backends(workers: int) -> None:
+    """
+    Switch every cache and the restaurant store to SQLite when running several workers,
+    and turn off the spatial shortcut, whose index is per process.
+    
+    In-memory caches are per process, so with N workers a repeated search would only
+    hit the cache one time in N. Environment variables are set for spawned workers;
+    settings is updated too for forked (gunicorn) workers that inherit it.
+    """
+    if workers <= 1:
+        return
+    from app.config import settings
+    for name in SHARED_BACKEND_SETTINGS:
+        if getattr(settings, name).lower() != "sqlite":
+            print(f"🔗 {name}=sqlite so all {workers} workers share it")
+        os.environ[name] = "sqlite"
+        setattr(settings, name, "sqlite")
+    # The spatial index and its coverage records live in each worker's memory, so a
+    # worker would answer from a partial view of what the others have found
+    if settings.SPATIAL_SHORTCUT_ENABLED:
+        print(f"🔗 SPATIAL_SHORTCUT_ENABLED=false with {workers} workers (spatial index is per process)")
+    os.environ["SPATIAL_SHORTCUT_ENABLED"] = "false"
+    settings.SPATIAL_SHORTCUT_ENABLED = False
+
+
+def event_loop() -> str:
+    return "uvloop" if importlib.util.find_spec("uvloop") else "asyncio"
+
+
+def http_protocol() -> str:
+    return "httptools" if importlib.util.find_spec("httptools") else "h11"
+
+
+def main():
+    from app.config import settings
+    
+    parser = argparse.ArgumentParser(description="Run the Restaurant Finder API in production mode")
+    parser.add_argument("--host", default=settings.SERVER_HOST)
+    parser.add_argument("--port", type=int, default=settings.SERVER_PORT)
+    parser.add_argument("--workers", type=int, default=settings.WEB_CONCURRENCY)
+    args = parser.parse_args()
+    
+    use_shared_backends(args.workers)
+    loop, http = event_loop(), http_protocol()
+    print(f"🚀 Starting {args.workers} workers on {args.host}:{args.port} ({loop} loop, {http} parser)")
+    
+    import uvicorn
+    uvicorn.run(
+        "app:app",
+        host=args.host,
+        port=args.port,
+        workers=args.workers,
+        loop=loop,
+        http=http,
+        backlog=settings.SERVER_BACKLOG,
+        timeout_keep_alive=settings.SERVER_KEEPALIVE,
+        timeout_graceful_shutdown=settings.SERVER_GRACEFUL_TIMEOUT,
+        limit_max_requests=settings.SERVER_MAX_REQUESTS or None,
+        proxy_headers=True,
+        access_log=False
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -4,8 +4,9 @@ Run this to verify the agents work correctly
 """
 
 import json
+import os
 import sys
-sys.path.insert(0, '/Users/andrexue/GitHub/HackCamp/backend')
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
 
 from app.services.gemini_agent_service import GeminiAgentService
 
@@ -0,0 +1,17 @@
+# Offline, in-memory settings for the unit tests; read by app.config at import time
+import os
+
+TEST_ENV = {
+    "GEMINI_API_KEY": "test",
+    "CACHE_BACKEND": "memory",
+    "PLACE_CACHE_BACKEND": "memory",
+    "WEBSITE_IMAGE_CACHE_BACKEND": "memory",
+    "GEOCODE_CACHE_BACKEND": "memory",
+    "PHOTO_CACHE_BACKEND": "memory",
+    "DIETARY_VERDICT_CACHE_BACKEND": "memory",
+    "RESTAURANT_STORE_BACKEND": "memory",
+    "WARM_UP_ON_STARTUP": "false",
+    "TRACING_EXPORTER": "none",
+}
+for key, value in TEST_ENV.items():
+    os.environ.setdefault(key, value)
@@ -0,0 +1,58 @@
+import time
+import pytest
+from app.utils.cache import MISSING, MemoryCacheBackend, SQLiteCacheBackend, TTLCache
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def make_backend(request, tmp_path):
+    def make(max_entries=10):
+        if request.param == "sqlite":
+            return SQLiteCacheBackend(str(tmp_path / "cache.db"), "test", max_entries)
+        return MemoryCacheBackend(max_entries)
+    return make
+
+
+def test_entries_expire_after_their_ttl(make_backend):
+    backend = make_backend()
+    backend.set("short", 1, ttl=0.05)
+    backend.set("long", 2, ttl=60)
+    assert backend.get("short") == 1
+    time.sleep(0.1)
+    assert backend.get("short") is MISSING
+    assert backend.get("long") == 2
+
+
+def test_least_recently_used_entry_is_evicted(make_backend):
+    backend = make_backend(max_entries=2)
+    backend.set("a", 1, ttl=60)
+    time.sleep(0.01)
+    backend.set("b", 2, ttl=60)
+    time.sleep(0.01)
+    assert backend.get("a") == 1  # "b" is now the least recently used
+    time.sleep(0.01)
+    backend.set("c", 3, ttl=60)
+    assert backend.get("b") is MISSING
+    assert (backend.get("a"), backend.get("c")) == (1, 3)
+    assert len(backend) == 2
+
+
+def test_contains_has_no_side_effects(make_backend):
+    cache = TTLCache("test", make_backend(max_entries=2), ttl=60)
+    cache.set("a", 1)
+    time.sleep(0.01)
+    cache.set("b", 2)
+    assert cache.contains("a") and not cache.contains("missing")
+    assert (cache.hits, cache.misses) == (0, 0)
+    time.sleep(0.01)
+    cache.set("c", 3)  # "a" was only probed, so it is still the oldest
+    assert cache.get("a") is MISSING
+    cache.set("gone", 1, ttl=-1)
+    assert not cache.contains("gone")
+
+
+def test_none_is_a_cacheable_value(make_backend):
+    cache = TTLCache("test", make_backend(), ttl=60)
+    cache.set("negative", None)
+    assert cache.get("negative") is None
+    assert cache.get("other") is MISSING
+    assert cache.stats()["hits"] == 1 and cache.stats()["misses"] == 1
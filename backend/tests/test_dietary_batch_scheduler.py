@@ -0,0 +1,83 @@
+import asyncio
+
+from app.services.dietary_batch_scheduler import DietaryBatchScheduler
+from app.utils.cache import create_cache
+from app.utils.helpers import normalize_text
+
+
+class FakeValidator:
+    def __init__(self, delay=0.01, fail=False):
+        self.calls = []
+        self.delay = delay
+        self.fail = fail
+
+    async def judge_batch_async(self, checks):
+        self.calls.append(len(checks))
+        await asyncio.sleep(self.delay)
+        if self.fail:
+            raise RuntimeError("upstream down")
+        return {
+            (restaurant["id"], normalize_text(requirement)): {
+                "id": restaurant["id"], "requirement": requirement,
+                "supported": not restaurant["name"].startswith("Bad"),
+                "confidence": 80, "matching_menu_items": ["Salad"], "notes": f"{requirement} checked",
+            }
+            for restaurant, requirement in checks
+        }
+
+
+def restaurants(prefix, count):
+    return [{"id": f"{prefix}{i}", "name": f"{'Bad' if i == 0 else 'Good'} {prefix}{i}"} for i in range(count)]
+
+
+def make_scheduler(validator, **kwargs):
+    cache = create_cache("dietary_verdicts_test", 60, 1000, backend="memory")
+    return DietaryBatchScheduler(validator, window=0.01, cache=cache, **kwargs)
+
+
+def test_concurrent_searches_share_one_batch_and_the_cache():
+    validator = FakeValidator()
+    scheduler = make_scheduler(validator)
+    shared = restaurants("s", 3)
+
+    async def run():
+        results = await asyncio.gather(*(
+            scheduler.validate(shared + restaurants(f"q{k}_", 2), ["Vegan", "Gluten-Free"]) for k in range(5)
+        ))
+        again = await scheduler.validate(shared, ["vegan"])
+        return results, again
+
+    results, again = asyncio.run(run())
+    assert validator.calls == [3 * 2 + 5 * 2 * 2]
+    assert results[0]["removed_count"] == 2
+    assert results[0]["validated_restaurants"][0]["dietary_match_confidence"] == 80
+    assert again["total_validated"] == 2 and validator.calls == [26]
+
+
+def test_failed_batch_keeps_restaurants_and_is_not_cached():
+    validator = FakeValidator(fail=True)
+    scheduler = make_scheduler(validator)
+
+    async def run():
+        first = await scheduler.validate(restaurants("x", 2), ["Vegan"])
+        second = await scheduler.validate(restaurants("x", 2), ["Vegan"])
+        return first, second
+
+    first, second = asyncio.run(run())
+    assert first["total_validated"] == 2 and second["total_validated"] == 2
+    assert validator.calls == [2, 2]
+
+
+def test_cancelled_batch_releases_waiters():
+    scheduler = make_scheduler(FakeValidator(delay=10))
+
+    async def run():
+        search = asyncio.ensure_future(scheduler.validate(restaurants("c", 2), ["Vegan"]))
+        await asyncio.sleep(0.05)
+        for batch in list(scheduler._batches):
+            batch.cancel()
+        return await asyncio.wait_for(search, timeout=1)
+
+    result = asyncio.run(run())
+    assert result["total_validated"] == 2
+    assert scheduler._waiting == {}
@@ -0,0 +1,70 @@
+import asyncio
+
+from app.services.gemini_agent_service import GeminiAgentService
+from app.utils.filtering import build_local_results, can_score_locally, has_hard_filter_fields, prefilter_restaurants
+
+FILTERS = {"budget": ["$"], "minRating": 4.5, "dietary": [], "cuisines": [], "serviceType": [],
+           "accessibility": [], "operational": []}
+
+# What _search_google_places_equivalent yields: no rating, price level or service types
+SPARSE = [
+    {"id": "fancy_steak_1", "name": "Fancy Steak", "address": "1 Main St", "cuisine": "Steakhouse"},
+    {"id": "taco_spot_2", "name": "Taco Spot", "address": "2 Main St", "cuisine": "Mexican"},
+]
+COMPLETE = [
+    {"id": "taco_spot_2", "name": "Taco Spot", "address": "2 Main St", "cuisine": "Mexican",
+     "rating": 4.7, "budget": "$"},
+]
+
+
+def test_sparse_records_cannot_be_scored_locally():
+    assert not has_hard_filter_fields(SPARSE[0], FILTERS)
+    assert not can_score_locally(SPARSE, FILTERS)
+
+
+def test_complete_records_are_scored_locally():
+    assert can_score_locally(COMPLETE, FILTERS)
+
+
+def test_soft_filters_always_need_the_llm():
+    assert not can_score_locally(COMPLETE, {**FILTERS, "dietary": ["Vegan"]})
+
+
+def test_pipeline_sends_sparse_records_to_the_transformer():
+    service = GeminiAgentService()
+    transformed_inputs = []
+
+    async def scrape(location, filters):
+        for restaurant in SPARSE:
+            yield dict(restaurant)
+
+    async def transform(restaurants, filters, summary=None):
+        transformed_inputs.append(restaurants)
+        yield {"id": "taco_spot_2", "name": "Taco Spot", "rating": 4.6, "budget": "$", "match_score": 90}
+
+    async def no_images(restaurants, location):
+        for restaurant in []:
+            yield restaurant
+
+    service.web_scraper.stream_restaurants_web = scrape
+    service.data_transformer.stream_transformed_restaurants = transform
+    service.image_enricher.enrich_iter = no_images
+
+    async def run():
+        return [event async for event in service._pipeline_events("Springfield", FILTERS, "three_stage")]
+
+    events = asyncio.run(run())
+    result = events[-1]["result"]
+    assert len(transformed_inputs) == 1
+    assert [r["name"] for r in result["restaurants"]] == ["Taco Spot"]
+    assert not any(event.get("stage") == "local_score" for event in events)
+
+
+def test_local_results_drop_internal_scores_and_claim_no_dish_matches():
+    restaurants = [{**COMPLETE[0], "menu_items": ["Al Pastor Taco", "Horchata"]}]
+    results = build_local_results(prefilter_restaurants(restaurants, FILTERS), FILTERS)
+    assert len(results) == 1
+    assert "local_score" not in results[0]
+    assert results[0]["match_score"] == restaurants[0]["local_score"]
+    assert results[0]["matching_menu_items"] == []
+    assert results[0]["menu_items"] == ["Al Pastor Taco", "Horchata"]
@@ -0,0 +1,33 @@
+from app.services.geocoding_service import CITY_GAZETTEER, GeocodingService
+
+
+class FakeMaps:
+    def __init__(self):
+        self.calls = []
+
+    def geocode_location(self, address):
+        self.calls.append(address)
+        return {"lat": 1.0, "lng": 2.0}
+
+
+def make_service():
+    return GeocodingService(FakeMaps())
+
+
+def test_city_with_its_own_region_uses_gazetteer():
+    service = make_service()
+    assert service.geocode("Portland, OR") == {"lat": 45.5152, "lng": -122.6784}
+    assert service.geocode("Boston, MA, USA") == {"lat": 42.3601, "lng": -71.0589}
+    assert service.google_maps.calls == []
+
+
+def test_same_name_in_another_region_goes_upstream():
+    service = make_service()
+    for address in ("Portland, ME", "Paris, TX", "London, ON"):
+        assert service.geocode(address) == {"lat": 1.0, "lng": 2.0}
+    assert service.google_maps.calls == ["Portland, ME", "Paris, TX", "London, ON"]
+
+
+def test_every_gazetteer_city_has_regions():
+    from app.services.geocoding_service import CITY_REGIONS
+    assert set(CITY_REGIONS) == set(CITY_GAZETTEER)
@@ -0,0 +1,68 @@
+import pytest
+from app.utils.html_images import StreamingImageExtractor, charset_from_content_type, extract_image_from_chunks
+
+BASE = "https://diner.example/menu/"
+PAGE = (
+    '<html><head><title>Café Crème — ☕</title>'
+    '<meta name="twitter:image" content="/img/twitter-card.jpg">'
+    '</head><body>'
+    '<img src="/static/logo.png" alt="logo">'
+    '<img src="photos/dish.jpg" alt="Our signature dish" width="800" height="600">'
+    '<img src="/hero-banner.jpg" class="hero">'
+    '</body></html>'
+).encode("utf-8")
+
+
+def chunked(data, size):
+    return [data[i:i + size] for i in range(0, len(data), size)]
+
+
+@pytest.mark.parametrize("size", [1, 2, 3, 7, 64, len(PAGE)])
+def test_result_does_not_depend_on_chunk_boundaries(size):
+    # Sizes 1-3 split the multi-byte characters and every tag and attribute
+    assert extract_image_from_chunks(chunked(PAGE, size), BASE) == "https://diner.example/img/twitter-card.jpg"
+
+
+@pytest.mark.parametrize("size", [1, 5, len(PAGE)])
+def test_best_img_tag_wins_without_meta_images(size):
+    page = PAGE.replace(b'<meta name="twitter:image" content="/img/twitter-card.jpg">', b'')
+    # dish.jpg scores 10 (src) + 5 (alt) + 3 (size), hero-banner.jpg 10 (src) + 5 (class); the logo is skipped
+    assert extract_image_from_chunks(chunked(page, size), BASE) == "https://diner.example/menu/photos/dish.jpg"
+
+
+def test_stops_reading_once_og_image_is_found():
+    page = b'<html><head><meta property="og:image" content="https://cdn.example/og.jpg"></head>' + b'<p>filler</p>' * 1000
+    consumed = []
+
+    def chunks():
+        for chunk in chunked(page, 32):
+            consumed.append(chunk)
+            yield chunk
+
+    assert extract_image_from_chunks(chunks(), BASE) == "https://cdn.example/og.jpg"
+    assert len(consumed) < 5
+
+
+def test_twitter_image_only_settles_once_the_head_closes():
+    extractor = StreamingImageExtractor(BASE)
+    assert not extractor.feed(b'<head><meta name="twitter:image" content="/t.jpg">')
+    assert extractor.feed(b'</head>')
+    assert extractor.result() == "https://diner.example/t.jpg"
+
+
+def test_byte_cap_stops_the_scan():
+    page = b'<html><body>' + b' ' * 200 + b'<img src="/food.jpg"></body></html>'
+    extractor = StreamingImageExtractor(BASE, max_bytes=100)
+    finished = [extractor.feed(chunk) for chunk in chunked(page, 40)]
+    assert finished[:3] == [False, False, True]
+    assert extractor.bytes_read == 100
+    assert extractor.result() is None
+
+
+def test_page_charset_is_honoured_and_unknown_charsets_fall_back():
+    page = '<img src="/café-food.jpg">'.encode("latin-1")
+    assert extract_image_from_chunks(chunked(page, 1), BASE, encoding="latin-1") == "https://diner.example/café-food.jpg"
+    assert extract_image_from_chunks([b'<img src="/food.jpg">'], BASE, encoding="no-such-charset") == \
+        "https://diner.example/food.jpg"
+    assert charset_from_content_type('text/html; charset="ISO-8859-1"') == "ISO-8859-1"
+    assert charset_from_content_type("text/html") is None
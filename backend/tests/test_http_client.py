@@ -0,0 +1,40 @@
+import asyncio
+import httpx
+from app.config import settings
+from app.services import http_client
+from app.utils.async_utils import run_sync
+
+
+def test_session_caps_connections_per_host():
+    session = http_client.get_session()
+    adapter = session.get_adapter('https://maps.googleapis.com')
+    assert adapter._pool_maxsize == settings.HTTP_MAX_CONNECTIONS_PER_HOST
+    assert adapter._pool_block is True
+
+
+def test_client_from_a_finished_loop_is_closed():
+    async def grab():
+        return http_client.get_async_client()
+
+    first = run_sync(grab())
+    assert first.is_closed
+    second = run_sync(grab())
+    assert second is not first and second.is_closed
+
+
+def test_switching_transport_closes_the_old_client():
+    async def scenario():
+        old = http_client.get_async_client()
+        http_client.set_async_transport(httpx.MockTransport(lambda request: httpx.Response(200)))
+        new = http_client.get_async_client()
+        await asyncio.sleep(0)
+        closed = old.is_closed
+        await http_client.close_http_clients()
+        return old, new, closed
+
+    try:
+        old, new, closed = asyncio.run(scenario())
+    finally:
+        http_client.set_async_transport(None)
+    assert new is not old
+    assert closed
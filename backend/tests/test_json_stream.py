@@ -0,0 +1,71 @@
+import json
+
+from app.utils.json_stream import JSONItemStream, parse_json_document
+
+
+def stream_items(text, chunk_size=7, **kwargs):
+    parser = JSONItemStream(**kwargs)
+    items = []
+    for i in range(0, len(text), chunk_size):
+        items.extend(parser.feed(text[i:i + chunk_size]))
+    return items, parser
+
+
+def test_top_level_array_streams_each_item():
+    items, _ = stream_items('```json\n[{"id": 1}, {"id": 2, "tags": ["a]"]}]\n```')
+    assert items == [{"id": 1}, {"id": 2, "tags": ["a]"]}]
+
+
+def test_array_under_key_skips_earlier_arrays():
+    text = json.dumps({"tags": ["a"], "transformed_restaurants": [{"id": 1}, {"id": 2}], "total_matching": 2})
+    items, parser = stream_items(text, key="transformed_restaurants")
+    assert items == [{"id": 1}, {"id": 2}]
+    assert parser.document()["total_matching"] == 2
+
+
+def test_key_that_appears_as_a_value_is_not_a_match():
+    text = '{"note": "transformed_restaurants", "other": [{"id": 0}], "transformed_restaurants": [{"id": 1}]}'
+    items, _ = stream_items(text, key="transformed_restaurants")
+    assert items == [{"id": 1}]
+
+
+def test_without_key_first_array_is_used():
+    items, _ = stream_items('{"restaurants": [{"id": 1}], "more": [{"id": 2}]}')
+    assert items == [{"id": 1}]
+
+
+def test_parse_json_document_tolerates_prose():
+    assert parse_json_document('Sure! {"a": [1, 2]} hope this helps') == {"a": [1, 2]}
+
+
+def test_transformer_streams_restaurants_after_another_array():
+    import asyncio
+    from app.services.gemini_agent_service import DataTransformerAgent
+
+    response = json.dumps({"tags": ["a"], "transformed_restaurants": [{"id": "r1", "name": "Diner", "match_score": 90}]})
+
+    class Chunk:
+        def __init__(self, text):
+            self.text = text
+
+    class Stream:
+        usage_metadata = None
+
+        async def __aiter__(self):
+            for i in range(0, len(response), 5):
+                yield Chunk(response[i:i + 5])
+
+    class Model:
+        async def generate_content_async(self, prompt, stream=False, **kwargs):
+            return Stream()
+
+    agent = DataTransformerAgent()
+    agent._model = Model()
+    raw = [{"id": "r1", "name": "Diner", "image": "https://example.org/diner.jpg"}]
+
+    async def run():
+        return [item async for item in agent.stream_transformed_restaurants(raw, {"dietary": []})]
+
+    items = asyncio.run(run())
+    assert [item["id"] for item in items] == ["r1"]
+    assert items[0]["image"] == "https://example.org/diner.jpg"
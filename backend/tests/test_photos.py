@@ -0,0 +1,53 @@
+import asyncio
+import httpx
+from fastapi.testclient import TestClient
+from app import app
+from app.dependencies import get_photo_service
+from app.routes.restaurants import to_restaurant_response
+from app.services.google_maps_service import photo_proxy_url
+from app.services import http_client, photo_service
+from app.services.photo_service import PhotoService
+
+REFERENCE = "A" * 32
+PNG_BYTES = b"\x89PNG\r\n\x1a\nnot-really-a-png"
+
+
+def serve_png(request):
+    return httpx.Response(200, content=PNG_BYTES, headers={"content-type": "image/png"})
+
+
+def test_photo_is_served_with_its_stored_content_type(tmp_path, monkeypatch):
+    # Without a usable thumbnail the upstream bytes, and their type, are kept
+    monkeypatch.setattr(photo_service, "Image", None)
+    service = PhotoService(api_key="key", cache_dir=str(tmp_path))
+    app.dependency_overrides[get_photo_service] = lambda: service
+    http_client.set_async_transport(httpx.MockTransport(serve_png))
+    try:
+        with TestClient(app) as client:
+            first = client.get(f"/api/photos/{REFERENCE}")
+            again = client.get(f"/api/photos/{REFERENCE}")
+    finally:
+        app.dependency_overrides.clear()
+        http_client.set_async_transport(None)
+
+    for response in (first, again):
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "image/png"
+        assert response.content == PNG_BYTES
+    assert service.index.get(REFERENCE)["content_type"] == "image/png"
+
+
+def test_legacy_index_entries_are_jpeg(tmp_path):
+    service = PhotoService(api_key="key", cache_dir=str(tmp_path))
+    path = service.path_for("ab" * 32)
+    (tmp_path / "ab").mkdir()
+    open(path, "wb").close()
+    service.index.set(REFERENCE, "ab" * 32)
+    assert asyncio.run(service.get_photo(REFERENCE)) == (path, "ab" * 32, "image/jpeg")
+
+
+def test_photo_urls_are_relative_to_the_backend():
+    url = photo_proxy_url(REFERENCE)
+    assert url == f"/api/photos/{REFERENCE}"
+    restaurant = {"name": "Diner", "address": "1 Main St", "latitude": 1, "longitude": 2, "image": url}
+    assert to_restaurant_response(restaurant).image == url
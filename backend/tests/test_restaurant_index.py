@@ -0,0 +1,47 @@
+from app.utils.filtering import RestaurantIndex, restore_original_fields
+
+ORIGINALS = [
+    {"id": "joes_1", "name": "Joe's Pizza", "address": "1 Main St", "latitude": 1.0, "longitude": 2.0,
+     "image": "https://joes.example/pie.jpg", "local_score": 80},
+    {"id": "golden_2", "name": "Golden Dragon Palace", "address": "2 Main St", "latitude": 3.0, "longitude": 4.0},
+    {"id": "blue_3", "name": "The Blue Door Bistro", "address": "3 Main St"},
+]
+
+
+def test_finds_by_id_before_name():
+    index = RestaurantIndex(ORIGINALS)
+    assert index.find({"id": "golden_2", "name": "Joe's Pizza"})["id"] == "golden_2"
+
+
+def test_finds_by_normalized_name():
+    index = RestaurantIndex(ORIGINALS)
+    assert index.find({"name": "  joe's PIZZA "})["id"] == "joes_1"
+    assert index.find({"id": "unknown", "name": "Golden Dragon Palace"})["id"] == "golden_2"
+
+
+def test_finds_slightly_reworded_names():
+    index = RestaurantIndex(ORIGINALS)
+    assert index.find({"name": "Golden Dragon Palace Restaurant"}) is None  # too far from 0.85
+    assert index.find({"name": "Golden Dragon Palac"})["id"] == "golden_2"
+    assert index.find({"name": "The Blue Door Bistrot"})["id"] == "blue_3"
+
+
+def test_unrelated_or_empty_names_match_nothing():
+    index = RestaurantIndex(ORIGINALS)
+    assert index.find({"name": "Taco Town"}) is None
+    assert index.find({"name": "Joe's Tacos"}) is None
+    assert index.find({"name": ""}) is None
+    assert index.find({}) is None
+
+
+def test_restore_puts_back_ids_names_and_unsent_fields():
+    results = [{"name": "Golden Dragon Palac", "rating": 4.2, "latitude": 99.0},
+               {"name": "Joe's Pizza"}]
+    restore_original_fields(results, ORIGINALS)
+    assert results[0]["id"] == "golden_2" and results[0]["name"] == "Golden Dragon Palace"
+    # Coordinates were not sent to the LLM, so the original wins over the model's guess
+    assert (results[0]["latitude"], results[0]["longitude"]) == (3.0, 4.0)
+    assert results[0]["rating"] == 4.2
+    assert results[1]["image"] == "https://joes.example/pie.jpg"
+    # The pipeline-internal score is never copied into results
+    assert "local_score" not in results[1]
@@ -0,0 +1,84 @@
+import pytest
+from app.config import settings
+from app.models.schemas import RestaurantResponse
+from app.services.restaurant_store import RestaurantStore
+
+
+def restaurant(i, lat=39.80, lng=-89.60):
+    return RestaurantResponse(
+        id=f"r{i}", name=f"Diner {i}", address=f"{i} Main St",
+        latitude=lat + i * 0.0001, longitude=lng, rating=4.0, budget="$", cuisines=["American"],
+    )
+
+
+def test_coverage_expires_with_the_search_cache():
+    store = RestaurantStore(backend="memory")
+    restaurants = [restaurant(i) for i in range(3)]
+    store.add_many(restaurants, "Springfield")
+    store.record_coverage("f", 39.80, -89.60, 5000, [r.id for r in restaurants])
+
+    assert [r.id for r in store.covered_search("f", 39.80, -89.60, 1000)] == ["r0", "r1", "r2"]
+    assert store.covered_search("other-filters", 39.80, -89.60, 1000) is None
+
+    # Age the record past the search cache TTL
+    recorded_at, *area = store._coverage["f"][0]
+    store._coverage["f"][0] = (recorded_at - settings.SEARCH_CACHE_TTL - 1, *area)
+    assert store.covered_search("f", 39.80, -89.60, 1000) is None
+    assert not store._coverage["f"]
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def store(request, tmp_path):
+    return RestaurantStore(backend=request.param, database_url=f"sqlite:///{tmp_path / 'store.db'}")
+
+
+def ids(page):
+    return [r.id for r in page[1]]
+
+
+def test_listing_pages_most_recent_search_first(store):
+    store.add_many([restaurant(i) for i in range(5)], "Springfield")
+    store.add_many([restaurant(i) for i in range(5, 8)], "Shelbyville")
+
+    total, first = store.list(skip=0, limit=4)
+    assert total == 8
+    # The latest search comes first, each search in its own ranking order
+    assert [r.id for r in first] == ["r5", "r6", "r7", "r0"]
+    assert ids(store.list(skip=4, limit=4)) == ["r1", "r2", "r3", "r4"]
+    assert ids(store.list(skip=8, limit=4)) == []
+
+
+def test_listing_by_location_pages_in_rank_order(store):
+    store.add_many([restaurant(i) for i in range(5)], "Springfield")
+    store.add_many([restaurant(i) for i in range(5, 8)], "Shelbyville")
+
+    assert store.list("springfield ", skip=0, limit=3) == (5, store.list("Springfield", 0, 3)[1])
+    assert ids(store.list("Springfield", skip=0, limit=3)) == ["r0", "r1", "r2"]
+    assert ids(store.list("Springfield", skip=3, limit=3)) == ["r3", "r4"]
+    assert store.list("Nowhere") == (0, [])
+
+
+def test_store_survives_a_restart_and_lookups_fall_back_to_sqlite(tmp_path):
+    url = f"sqlite:///{tmp_path / 'store.db'}"
+    RestaurantStore(backend="sqlite", database_url=url).add_many([restaurant(i) for i in range(3)], "Springfield")
+
+    reopened = RestaurantStore(backend="sqlite", database_url=url)
+    assert reopened.get("r1").name == "Diner 1"
+    assert ids(reopened.list("Springfield", skip=1, limit=5)) == ["r1", "r2"]
+    reopened._by_id.clear()  # not in this process's memory
+    assert reopened.get("r2").name == "Diner 2"
+    assert reopened.get("missing") is None
+
+
+def test_memory_store_evicts_the_least_recently_stored(monkeypatch):
+    monkeypatch.setattr(settings, "RESTAURANT_STORE_MAX_ENTRIES", 4)
+    store = RestaurantStore(backend="memory")
+    store.add_many([restaurant(i) for i in range(3)], "Springfield")
+    store.add_many([restaurant(i) for i in range(3, 6)], "Shelbyville")
+
+    total, _ = store.list()
+    assert total == 4
+    # Lower-ranked results of the older search go first
+    assert store.get("r1") is None and store.get("r2") is None
+    assert ids(store.list("Springfield")) == ["r0"]
+    assert len(store.spatial_index) == 4
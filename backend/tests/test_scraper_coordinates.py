@@ -0,0 +1,51 @@
+import asyncio
+import threading
+from app.services.gemini_agent_service import WebScraperAgent
+
+
+class SlowGeocoder:
+    """Blocks each lookup until released, recording the addresses asked for"""
+
+    def __init__(self):
+        self.calls = []
+        self.release = threading.Event()
+
+    def geocode(self, address):
+        self.calls.append(address)
+        self.release.wait(timeout=5)
+        return None if address == "Nowhere Ln" else {"lat": 1.0, "lng": 2.0}
+
+
+def test_items_stream_on_while_addresses_are_geocoded_once_each():
+    agent = WebScraperAgent()
+    agent.geocoder = SlowGeocoder()
+    read = []
+
+    async def model_items():
+        for item in [
+            {"name": "A", "address": "1 Main St"},
+            {"name": "B", "address": "1 Main St"},
+            {"name": "C", "address": "2 Oak Ave", "latitude": 5.0, "longitude": 6.0},
+            {"name": "D", "address": "Nowhere Ln"},
+        ]:
+            read.append(item["name"])
+            yield item
+
+    async def run():
+        yielded = []
+        stream = agent._with_coordinates(model_items(), "Springfield")
+        # C already has coordinates, so it arrives while the lookups are still blocked
+        yielded.append(await stream.__anext__())
+        assert read == ["A", "B", "C", "D"]
+        agent.geocoder.release.set()
+        yielded.extend([item async for item in stream])
+        return yielded
+
+    results = asyncio.run(run())
+    assert results[0]["name"] == "C" and (results[0]["latitude"], results[0]["longitude"]) == (5.0, 6.0)
+    by_name = {item["name"]: item for item in results}
+    assert set(by_name) == {"A", "B", "C", "D"}
+    assert (by_name["A"]["latitude"], by_name["B"]["longitude"]) == (1.0, 2.0)
+    # D's address failed, so it falls back to the search location
+    assert (by_name["D"]["latitude"], by_name["D"]["longitude"]) == (1.0, 2.0)
+    assert sorted(agent.geocoder.calls) == ["1 Main St", "Nowhere Ln", "Springfield"]
@@ -0,0 +1,66 @@
+import asyncio
+
+from app.services.gemini_agent_service import GeminiAgentService
+
+FILTERS = {"budget": ["$"], "minRating": 4.0, "dietary": [], "cuisines": [], "serviceType": [],
+           "accessibility": [], "operational": []}
+RESTAURANTS = [
+    {"name": f"Diner {i}", "address": f"{i} Main St", "cuisine": "American", "rating": 4.5, "budget": "$"}
+    for i in range(3)
+]
+
+
+def make_service():
+    service = GeminiAgentService()
+    service.scrapes = 0
+
+    async def scrape(location, filters):
+        service.scrapes += 1
+        for restaurant in RESTAURANTS:
+            await asyncio.sleep(0.01)
+            yield service.web_scraper._with_id(dict(restaurant))
+
+    async def no_images(restaurants, location):
+        for restaurant in []:
+            yield restaurant
+
+    service.web_scraper.stream_restaurants_web = scrape
+    service.image_enricher.enrich_iter = no_images
+    return service
+
+
+async def collect(stream):
+    return [event async for event in stream]
+
+
+def test_identical_streams_share_one_pipeline_run():
+    service = make_service()
+
+    async def run():
+        streams = [collect(service.search_restaurants_stream("Springfield", FILTERS)) for _ in range(3)]
+        return await asyncio.gather(*streams, service.search_restaurants_async("Springfield", FILTERS))
+
+    *streams, result = asyncio.run(run())
+    assert service.scrapes == 1
+    for events in streams:
+        candidates = [e for e in events if e["event"] == "candidates"]
+        assert len(candidates) == len(RESTAURANTS)
+        assert events[-1]["event"] == "done"
+        assert events[-1]["result"] == result
+    assert streams[0][-1]["result"] is not streams[1][-1]["result"]
+
+
+def test_stream_pipeline_is_visible_to_drain():
+    service = make_service()
+
+    async def run():
+        stream = service.search_restaurants_stream("Springfield", FILTERS)
+        first = await stream.__anext__()
+        in_flight = service.search_flights.in_flight_count
+        await service.drain(5)
+        rest = [event async for event in stream]
+        return first, in_flight, rest
+
+    first, in_flight, rest = asyncio.run(run())
+    assert in_flight == 1
+    assert rest[-1]["event"] == "done"
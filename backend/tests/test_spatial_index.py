@@ -0,0 +1,81 @@
+import random
+import pytest
+from app.utils.helpers import calculate_distance
+from app.utils.spatial_index import GridSpatialIndex
+
+
+def brute_force(points, lat, lng, radius_m):
+    hits = [(key, calculate_distance(lat, lng, p_lat, p_lng) * 1000) for key, (p_lat, p_lng) in points.items()]
+    return sorted((hit for hit in hits if hit[1] <= radius_m), key=lambda hit: hit[1])
+
+
+def random_points(rng, count, lat, lng, spread_deg):
+    return {
+        f"p{i}": (lat + rng.uniform(-spread_deg, spread_deg), lng + rng.uniform(-spread_deg, spread_deg))
+        for i in range(count)
+    }
+
+
+@pytest.mark.parametrize("center", [(39.80, -89.60), (64.15, -21.94), (-33.87, 151.21), (0.0, 179.999)])
+def test_query_radius_matches_brute_force(center):
+    rng = random.Random(7)
+    points = random_points(rng, 400, *center, spread_deg=0.2)
+    index = GridSpatialIndex(cell_size_deg=0.01)
+    for key, (lat, lng) in points.items():
+        index.insert(key, lat, lng)
+
+    for _ in range(25):
+        lat = center[0] + rng.uniform(-0.1, 0.1)
+        lng = center[1] + rng.uniform(-0.1, 0.1)
+        radius_m = rng.choice([150, 800, 2500, 9000])
+        got = index.query_radius(lat, lng, radius_m)
+        expected = brute_force(points, lat, lng, radius_m)
+        assert [key for key, _ in got] == [key for key, _ in expected]
+        assert [round(d, 3) for _, d in got] == [round(d, 3) for _, d in expected]
+
+
+def test_points_just_inside_the_radius_across_a_cell_boundary_are_found():
+    # The point sits just past the cell edge that an approximate search box would stop at
+    index = GridSpatialIndex(cell_size_deg=0.001)
+    radius_m = 5000
+    lat = 39.845 - radius_m / 111_320 - 1e-6
+    index.insert("north", 39.845 + 1e-5, -89.60)
+    assert calculate_distance(lat, -89.60, 39.845 + 1e-5, -89.60) * 1000 < radius_m
+    assert [key for key, _ in index.query_radius(lat, -89.60, radius_m)] == ["north"]
+
+
+def test_high_latitude_circle_reaches_its_widest_longitude():
+    # Near the poles the circle bulges east-west beyond radius / (R cos(lat))
+    index = GridSpatialIndex(cell_size_deg=0.05)
+    lat, lng, radius_m = 80.0, 10.0, 200_000
+    points = {f"p{i}": (80.0 + i * 0.05, 10.0 + 10.3 + i * 0.01) for i in range(-10, 30)}
+    for key, (p_lat, p_lng) in points.items():
+        index.insert(key, p_lat, p_lng)
+    expected = brute_force(points, lat, lng, radius_m)
+    assert expected
+    assert [key for key, _ in index.query_radius(lat, lng, radius_m)] == [key for key, _ in expected]
+
+
+def test_nearest_matches_brute_force_and_honours_max_radius():
+    rng = random.Random(11)
+    points = random_points(rng, 300, 39.80, -89.60, spread_deg=0.5)
+    index = GridSpatialIndex(cell_size_deg=0.01)
+    for key, (lat, lng) in points.items():
+        index.insert(key, lat, lng)
+
+    for k in (1, 5, 40):
+        expected = brute_force(points, 39.81, -89.62, float("inf"))[:k]
+        assert [key for key, _ in index.nearest(39.81, -89.62, k)] == [key for key, _ in expected]
+
+    within = brute_force(points, 39.81, -89.62, 1500)
+    assert [key for key, _ in index.nearest(39.81, -89.62, 50, max_radius_m=1500)] == [key for key, _ in within]
+
+
+def test_moved_and_removed_points_leave_the_index():
+    index = GridSpatialIndex(cell_size_deg=0.01)
+    index.insert("a", 39.80, -89.60)
+    index.insert("a", 40.80, -89.60)  # moved ~111km north
+    assert index.query_radius(39.80, -89.60, 1000) == []
+    assert [key for key, _ in index.query_radius(40.80, -89.60, 1000)] == ["a"]
+    index.remove("a")
+    assert len(index) == 0 and index.nearest(40.80, -89.60, 1) == []
@@ -0,0 +1,52 @@
+from fastapi.testclient import TestClient
+import serve
+from app import app
+from app.config import settings
+from app.dependencies import get_gemini_service, get_restaurant_store
+from app.services.restaurant_store import RestaurantStore
+from tests.test_search_coalescing import FILTERS, make_service
+
+
+class FakeGeocoder:
+    def __init__(self):
+        self.calls = []
+
+    def geocode(self, location):
+        self.calls.append(location)
+        return {"lat": 39.8, "lng": -89.6}
+
+
+def test_cached_search_skips_the_spatial_geocode(monkeypatch):
+    monkeypatch.setattr(settings, "SPATIAL_SHORTCUT_ENABLED", True)
+    service = make_service()
+    geocoder = service.web_scraper.geocoder = FakeGeocoder()
+    store = RestaurantStore(backend="memory")
+    app.dependency_overrides[get_gemini_service] = lambda: service
+    app.dependency_overrides[get_restaurant_store] = lambda: store
+    try:
+        client = TestClient(app)
+        body = {"location": "Springfield", "filters": FILTERS}
+        first = client.post("/api/restaurants/search", json=body)
+        second = client.post("/api/restaurants/search", json=body)
+    finally:
+        app.dependency_overrides.clear()
+
+    assert first.status_code == second.status_code == 200
+    assert second.json()["restaurants"] == first.json()["restaurants"]
+    assert service.scrapes == 1
+    assert geocoder.calls == ["Springfield"]
+    # The cache probe must not count as a lookup of its own
+    assert (service.search_cache.hits, service.search_cache.misses) == (1, 1)
+
+
+def test_multiple_workers_turn_off_the_spatial_shortcut(monkeypatch):
+    for name in serve.SHARED_BACKEND_SETTINGS + ("SPATIAL_SHORTCUT_ENABLED",):
+        monkeypatch.setattr(settings, name, getattr(settings, name))
+        monkeypatch.delenv(name, raising=False)
+    monkeypatch.setattr(settings, "SPATIAL_SHORTCUT_ENABLED", True)
+
+    serve.use_shared_backends(1)
+    assert settings.SPATIAL_SHORTCUT_ENABLED
+
+    serve.use_shared_backends(4)
+    assert not settings.SPATIAL_SHORTCUT_ENABLED
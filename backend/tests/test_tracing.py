@@ -0,0 +1,52 @@
+import json
+import threading
+import pytest
+from app.utils.tracing import BackgroundExporter, JSONFileExporter, Span, Tracer
+
+
+def test_json_exporter_writes_off_the_calling_thread(tmp_path, monkeypatch):
+    exporter = JSONFileExporter(str(tmp_path))
+    writers = []
+    write = exporter._write
+
+    def recording_write(traces):
+        writers.append(threading.current_thread().name)
+        write(traces)
+
+    monkeypatch.setattr(exporter, "_write", recording_write)
+    tracer = Tracer(exporter)
+    with tracer.span("request") as root:
+        with tracer.span("stage"):
+            pass
+    tracer.shutdown()
+
+    assert writers and threading.current_thread().name not in writers
+    trace = json.loads((tmp_path / f"{root.trace_id}.json").read_text())
+    assert [span["name"] for span in trace["spans"]] == ["request", "stage"]
+    assert len(list(tmp_path.iterdir())) == 1
+
+
+def test_late_spans_are_merged_into_the_written_trace(tmp_path):
+    exporter = JSONFileExporter(str(tmp_path))
+    tracer = Tracer(exporter)
+    with tracer.span("request") as root:
+        pass
+    exporter.export([_late_span(root)])
+    exporter.shutdown()
+
+    trace = json.loads((tmp_path / f"{root.trace_id}.json").read_text())
+    assert [span["name"] for span in trace["spans"]] == ["request", "search"]
+
+
+def _late_span(root):
+    span = Span("search", root.trace_id, root.span_id, {})
+    span.end_ns = span.start_ns
+    return span
+
+
+def test_exporter_without_write_fails_at_construction():
+    class Incomplete(BackgroundExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
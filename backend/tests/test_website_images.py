@@ -0,0 +1,85 @@
+import asyncio
+import httpx
+import pytest
+from app.config import settings
+from app.services import http_client
+from app.services.google_maps_service import GoogleMapsService
+from app.utils.helpers import normalize_url
+
+URL = "https://diner.example/"
+PAGE = b'<html><head><meta property="og:image" content="https://diner.example/og.jpg"></head></html>'
+
+
+class Site:
+    """A website that answers conditional requests for its current ETag with 304"""
+
+    def __init__(self):
+        self.etag = '"v1"'
+        self.status = None  # force a status (e.g. 500) instead of serving the page
+        self.requests = []
+
+    def __call__(self, request):
+        self.requests.append(request)
+        if self.status:
+            return httpx.Response(self.status)
+        if request.headers.get("if-none-match") == self.etag:
+            return httpx.Response(304, headers={"etag": self.etag})
+        return httpx.Response(200, content=PAGE, headers={
+            "content-type": "text/html", "etag": self.etag, "last-modified": "Sun, 18 Oct 2026 00:00:00 GMT",
+        })
+
+
+@pytest.fixture
+def site():
+    site = Site()
+    http_client.set_async_transport(httpx.MockTransport(site))
+    yield site
+    http_client.set_async_transport(None)
+
+
+def lookup(service):
+    return asyncio.run(service.get_image_from_website_async(URL))
+
+
+def test_fresh_entries_are_served_without_contacting_the_site(site):
+    service = GoogleMapsService()
+    assert lookup(service) == "https://diner.example/og.jpg"
+    assert lookup(service) == "https://diner.example/og.jpg"
+    assert len(site.requests) == 1
+    assert "if-none-match" not in site.requests[0].headers
+
+
+def test_stale_entries_are_revalidated_with_their_validators(site, monkeypatch):
+    monkeypatch.setattr(settings, "WEBSITE_IMAGE_FRESH_FOR", 0)
+    service = GoogleMapsService()
+    assert lookup(service) == "https://diner.example/og.jpg"
+    first_checked = service.website_image_cache.get(normalize_url(URL))
+
+    assert lookup(service) == "https://diner.example/og.jpg"
+    revalidation = site.requests[1]
+    assert revalidation.headers["if-none-match"] == '"v1"'
+    assert revalidation.headers["if-modified-since"] == "Sun, 18 Oct 2026 00:00:00 GMT"
+    entry = service.website_image_cache.get(normalize_url(URL))
+    assert entry["etag"] == '"v1"' and entry["checked_at"] >= first_checked["checked_at"]
+
+    # A changed page (new ETag) is scraped again in full
+    site.etag = '"v2"'
+    assert lookup(service) == "https://diner.example/og.jpg"
+    entry = service.website_image_cache.get(normalize_url(URL))
+    assert entry["etag"] == '"v2"'
+
+
+def test_failed_revalidation_serves_the_last_known_image(site, monkeypatch):
+    monkeypatch.setattr(settings, "WEBSITE_IMAGE_FRESH_FOR", 0)
+    service = GoogleMapsService()
+    assert lookup(service) == "https://diner.example/og.jpg"
+    site.status = 503
+    assert lookup(service) == "https://diner.example/og.jpg"
+
+
+def test_pages_without_an_image_are_cached_as_negative(site):
+    site.status = 404
+    service = GoogleMapsService()
+    assert lookup(service) is None
+    assert lookup(service) is None
+    assert len(site.requests) == 1
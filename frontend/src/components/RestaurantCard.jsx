@@ -1,4 +1,5 @@
 import React, { useState, useEffect } from 'react';
+import { resolveApiUrl } from '../utils/api';
 import '../styles/RestaurantCard.css';
 
 function RestaurantCard({ restaurant, style }) {
@@ -6,17 +7,19 @@ function RestaurantCard({ restaurant, style }) {
   
   // Only use REAL restaurant images - show placeholder if no real image available
   const getImageUrl = () => {
+    // Photo proxy paths are relative to the backend
+    const image = resolveApiUrl(restaurant.image);
     // Only use if it's a real restaurant image (not generic placeholder or example URL)
-    if (restaurant.image && 
-        restaurant.image.startsWith('http') && 
-        !restaurant.image.includes('picsum') && 
-        !restaurant.image.includes('unsplash') &&
-        !restaurant.image.includes('placeholder') &&
-        !restaurant.image.includes('example.com') &&
-        !restaurant.image.includes('example.org') &&
-        !restaurant.image.includes('lorem') &&
-        !restaurant.image.includes('dummy')) {
-      return restaurant.image;
+    if (image && 
+        image.startsWith('http') && 
+        !image.includes('picsum') && 
+        !image.includes('unsplash') &&
+        !image.includes('placeholder') &&
+        !image.includes('example.com') &&
+        !image.includes('example.org') &&
+        !image.includes('lorem') &&
+        !image.includes('dummy')) {
+      return image;
     }
     // Return null if no real image (will show placeholder SVG)
     return null;
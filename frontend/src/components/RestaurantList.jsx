@@ -27,7 +27,7 @@ function RestaurantList({ restaurants, loading }) {
       >
         {restaurants.slice(0, displayedCount).map((restaurant, index) => (
           <RestaurantCard 
-            key={index} 
+            key={restaurant.id || index} 
             restaurant={restaurant}
             style={{ 
               animationDelay: `${index * 0.1}s`,
@@ -1,19 +1,50 @@
-import React, { useState } from 'react';
+import React, { useRef, useState } from 'react';
 import SearchBar from '../components/SearchBar';
 import FilterOverlay from '../components/FilterOverlay';
 import LoadingPopup from '../components/LoadingPopup';
 import MapContainer from '../components/MapContainer';
 import RestaurantList from '../components/RestaurantList';
-import { searchRestaurants } from '../utils/api';
+import { streamSearchRestaurants } from '../utils/api';
 import '../styles/LandingPage.css';
 
+// Apply one streamed search event to the restaurants shown so far. Restaurants
+// keep their id across stages, so later events patch earlier ones in place.
+const applySearchEvent = (current, event) => {
+  switch (event.event) {
+    case 'candidates': {
+      const next = [...current];
+      event.restaurants.forEach((restaurant) => {
+        const index = next.findIndex((existing) => existing.id === restaurant.id);
+        if (index === -1) {
+          next.push(restaurant);
+        } else {
+          next[index] = restaurant;
+        }
+      });
+      return next;
+    }
+    case 'update':
+      return event.restaurants;
+    case 'image':
+      return current.map((restaurant) =>
+        restaurant.id === event.id ? { ...restaurant, image: event.image } : restaurant
+      );
+    case 'done':
+      return event.restaurants || [];
+    default:
+      return current;
+  }
+};
+
 function LandingPage() {
   const [location, setLocation] = useState('');
   const [filters, setFilters] = useState({});
   const [restaurants, setRestaurants] = useState([]);
   const [showFilterOverlay, setShowFilterOverlay] = useState(false);
   const [loading, setLoading] = useState(false);
+  const [streaming, setStreaming] = useState(false);
   const [mapCenter, setMapCenter] = useState({ lat: 40.7128, lng: -74.0060 });
+  const latestSearch = useRef(0);
 
   const handleSearch = async (searchLocation, searchFilters = null) => {
     // Use provided location or current location state
@@ -35,30 +66,44 @@ function LandingPage() {
       return;
     }
     
+    // Events from a search that has since been replaced by a newer one are ignored
+    const searchId = latestSearch.current + 1;
+    latestSearch.current = searchId;
+    let centered = false;
+    
+    setRestaurants([]);
     setLoading(true);
+    setStreaming(true);
     try {
-      // Call backend API with current location and current filters (including dietary restrictions)
+      // Stream results from the backend with current location and filters (including dietary restrictions)
       console.log('🔍 Searching with:', { location: locationToUse, filters: filtersToUse });
-      const response = await searchRestaurants(locationToUse, filtersToUse);
-      
-      if (response.restaurants && response.restaurants.length > 0) {
-        setRestaurants(response.restaurants);
-        // Update map center to first restaurant or use geocoded location
-        if (response.restaurants[0]) {
-          setMapCenter({
-            lat: response.restaurants[0].latitude,
-            lng: response.restaurants[0].longitude
-          });
+      await streamSearchRestaurants(locationToUse, filtersToUse, (event) => {
+        if (latestSearch.current !== searchId) return;
+        setRestaurants((current) => applySearchEvent(current, event));
+        
+        const arrived = event.restaurants || [];
+        if (arrived.length > 0) {
+          // Show results as soon as the first ones arrive
+          setLoading(false);
         }
-      } else {
+        // Center the map on the first restaurant with coordinates
+        const located = arrived.find((restaurant) => restaurant.latitude || restaurant.longitude);
+        if (located && !centered) {
+          centered = true;
+          setMapCenter({ lat: located.latitude, lng: located.longitude });
+        }
+      });
+    } catch (error) {
+      if (latestSearch.current === searchId) {
+        console.error('Search error:', error);
+        alert('Error searching restaurants. Please try again.');
         setRestaurants([]);
       }
-    } catch (error) {
-      console.error('Search error:', error);
-      alert('Error searching restaurants. Please try again.');
-      setRestaurants([]);
     } finally {
-      setLoading(false);
+      if (latestSearch.current === searchId) {
+        setLoading(false);
+        setStreaming(false);
+      }
     }
   };
 
@@ -136,7 +181,9 @@ function LandingPage() {
             <h2>
               {loading 
                 ? '⏳ Searching...' 
-                : restaurants.length > 0 
+                : streaming
+                  ? `⏳ Found ${restaurants.length} so far, refining...`
+                  : restaurants.length > 0 
                   ? `✓ Found ${restaurants.length} restaurants` 
                   : '🔍 Search to discover restaurants'}
             </h2>
@@ -2,6 +2,14 @@ import axios from 'axios';
 
 const API_BASE_URL = process.env.REACT_APP_BACKEND_URL || 'http://localhost:8000';
 
+// Backend-relative URLs (e.g. /api/photos/... for Places photos) point at the API server
+export const resolveApiUrl = (url) => {
+  if (url && url.startsWith('/')) {
+    return `${API_BASE_URL.replace(/\/$/, '')}${url}`;
+  }
+  return url;
+};
+
 export const searchRestaurants = async (location, filters) => {
   try {
     const response = await axios.post(`${API_BASE_URL}/api/restaurants/search`, {
@@ -15,6 +23,45 @@ export const searchRestaurants = async (location, filters) => {
   }
 };
 
+// Streams search progress as NDJSON events; onEvent is called for each one.
+// Restaurants carry stable ids, so "update" and "image" events can patch
+// earlier results in place. Resolves with the final "done" event.
+export const streamSearchRestaurants = async (location, filters, onEvent) => {
+  const response = await fetch(`${API_BASE_URL}/api/restaurants/search/stream`, {
+    method: 'POST',
+    headers: { 'Content-Type': 'application/json' },
+    body: JSON.stringify({ location, filters }),
+  });
+  if (!response.ok) {
+    throw new Error(`Search failed with status ${response.status}`);
+  }
+
+  const reader = response.body.getReader();
+  const decoder = new TextDecoder();
+  let buffer = '';
+  let finalEvent = null;
+
+  while (true) {
+    const { value, done } = await reader.read();
+    if (done) break;
+    buffer += decoder.decode(value, { stream: true });
+    const lines = buffer.split('\n');
+    buffer = lines.pop();
+    for (const line of lines) {
+      if (!line.trim()) continue;
+      const event = JSON.parse(line);
+      if (event.event === 'error') {
+        throw new Error(event.detail);
+      }
+      if (event.event === 'done') {
+        finalEvent = event;
+      }
+      onEvent(event);
+    }
+  }
+  return finalEvent;
+};
+
 export const getRestaurantDetails = async (restaurantId) => {
   try {
     const response = await axios.get(`${API_BASE_URL}/api/restaurants/${restaurantId}`);
@@ -26,7 +73,9 @@ export const getRestaurantDetails = async (restaurantId) => {
 };
 
 const api = {
+  resolveApiUrl,
   searchRestaurants,
+  streamSearchRestaurants,
   getRestaurantDetails,
 };
 